@@ -1,17 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import timedelta
 
 from app.core.database import get_db
 from app.core.config import settings
-from app.services.auth_service import auth_service
+from app.api.dependencies import get_current_user
 from app.models.database import User
+from app.services.auth_service import auth_service, AuthPoolBusyError
 
 router = APIRouter()
-security = HTTPBearer()
 
 
 class UserCreate(BaseModel):
@@ -56,8 +55,17 @@ class APIKeyResponse(BaseModel):
         from_attributes = True
 
 
+def auth_busy(error: AuthPoolBusyError) -> HTTPException:
+    """503 for requests shed by the auth worker pool"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/register", response_model=UserResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Register a new user
 
@@ -66,7 +74,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     - **password**: Password (min 6 characters recommended)
     """
     # Check if username exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await auth_service.get_user_by_username(db, user_data.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -74,7 +82,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Check if email exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await auth_service.get_user_by_email(db, user_data.email)
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -82,25 +90,31 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
 
     # Create user
-    user = auth_service.create_user(
-        db,
-        username=user_data.username,
-        email=user_data.email,
-        password=user_data.password
-    )
+    try:
+        user = await auth_service.create_user(
+            db,
+            username=user_data.username,
+            email=user_data.email,
+            password=user_data.password
+        )
+    except AuthPoolBusyError as e:
+        raise auth_busy(e)
 
     return user
 
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Login to get access token
 
     - **username**: Your username
     - **password**: Your password
     """
-    user = auth_service.authenticate_user(db, credentials.username, credentials.password)
+    try:
+        user = await auth_service.authenticate_user(db, credentials.username, credentials.password)
+    except AuthPoolBusyError as e:
+        raise auth_busy(e)
 
     if not user:
         raise HTTPException(
@@ -128,8 +142,8 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
 @router.post("/api-keys", response_model=APIKeyResponse)
 async def create_api_key(
     key_data: APIKeyCreate,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new API key
@@ -139,26 +153,10 @@ async def create_api_key(
     - **name**: Optional name for the key
     - **rate_limit**: Requests per hour (default 100)
     """
-    # Verify token
-    payload = auth_service.verify_token(credentials.credentials)
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-    user_id = payload.get("user_id")
-    if not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload"
-        )
-
     # Create API key
-    api_key = auth_service.create_api_key(
+    api_key = await auth_service.create_api_key(
         db,
-        user_id=user_id,
+        user_id=user.id,
         name=key_data.name,
         rate_limit=key_data.rate_limit
     )
@@ -172,37 +170,50 @@ async def create_api_key(
     }
 
 
-@router.get("/me", response_model=UserResponse)
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+@router.delete("/api-keys/{key_id}")
+async def revoke_api_key(
+    key_id: int,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
-    Get current user information
+    Revoke an API key
 
-    Requires authentication via Bearer token.
+    Requires authentication via Bearer token. The key stops working
+    immediately on the server that handled the revocation; other server
+    workers may still accept it from their key cache for up to
+    API_KEY_CACHE_TTL seconds.
     """
-    # Verify token
-    payload = auth_service.verify_token(credentials.credentials)
-    if not payload:
+    api_key = await auth_service.revoke_api_key(db, user_id=user.id, key_id=key_id)
+    if not api_key:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key not found"
         )
 
-    username = payload.get("sub")
-    if not username:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token payload"
-        )
+    return {"message": "API key revoked", "id": api_key.id}
 
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
 
+@router.get("/me", response_model=UserResponse)
+async def read_current_user(user: User = Depends(get_current_user)):
+    """
+    Get current user information
+
+    Requires authentication via Bearer token.
+    """
     return user
+
+
+@router.delete("/me")
+async def deactivate_current_user(
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Deactivate your account
+
+    Requires authentication via Bearer token. Existing tokens stop working.
+    """
+    await auth_service.deactivate_user(db, user)
+
+    return {"message": "User deactivated", "id": user.id}
@@ -0,0 +1,173 @@
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Set, Type
+
+from app.core.config import settings
+from app.core.database import get_db
+from app.models.database import User
+from app.models.schemas import SentimentResult, EmotionResult
+from app.services.auth_service import auth_service
+from app.services.rate_limiter import rate_limiter
+
+security = HTTPBearer()
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Resolve the active user of a bearer token from the token and user caches"""
+    payload = auth_service.verify_token(credentials.credentials)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    username = payload.get("sub")
+    if not username:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+
+    user = await auth_service.get_cached_user(db, username)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+
+    return user
+
+
+class RateLimitIdentity:
+    """Who a request is charged to, and their hourly limit"""
+
+    def __init__(self, key: str, limit: int):
+        self.key = key
+        self.limit = limit
+
+    def cap(self, cost: int) -> int:
+        """cost lowered to the most the identity's bucket can ever hold"""
+        if settings.RATE_LIMIT_ENABLED and self.limit > 0:
+            return min(cost, self.limit)
+        return cost
+
+
+async def get_rate_limit_identity(
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+) -> RateLimitIdentity:
+    """
+    Resolve the rate limit identity of a request
+
+    API keys (X-API-Key header) use their own rate_limit, bearer token users
+    get RATE_LIMIT_USER and anonymous clients RATE_LIMIT_ANONYMOUS per IP.
+    """
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        key = await auth_service.verify_api_key(db, api_key)
+        if not key:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key"
+            )
+        return RateLimitIdentity(f"key:{key.id}", key.rate_limit)
+
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        payload = auth_service.verify_token(authorization[7:])
+        if payload and payload.get("user_id"):
+            return RateLimitIdentity(f"user:{payload['user_id']}", settings.RATE_LIMIT_USER)
+
+    client = request.client.host if request.client else "unknown"
+    return RateLimitIdentity(f"ip:{client}", settings.RATE_LIMIT_ANONYMOUS)
+
+
+async def enforce_rate_limit(identity: RateLimitIdentity, response: Response, cost: int = 1):
+    """
+    Charge cost tokens to identity, raising 429 when its bucket is empty
+
+    A cost above the hourly limit could never be paid, so it is rejected
+    with 413 instead of a Retry-After that would never come true.
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    if 0 < identity.limit < cost:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=(
+                f"Request costs {cost} texts, more than the limit of "
+                f"{identity.limit} texts per hour"
+            )
+        )
+
+    result = await rate_limiter.acquire(identity.key, identity.limit, cost)
+
+    if not result.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded: {identity.limit} texts per hour",
+            headers=result.headers
+        )
+
+    response.headers.update(result.headers)
+
+
+async def refund_rate_limit(identity: RateLimitIdentity, tokens: int):
+    """Give back tokens charged up front for texts that were not analyzed"""
+    if not settings.RATE_LIMIT_ENABLED or tokens <= 0:
+        return
+
+    await rate_limiter.refund(identity.key, identity.limit, tokens)
+
+
+# Left out of every result by compact=true
+COMPACT_EXCLUDE = {"text", "scores", "model_used"}
+
+RESULT_FIELDS = set(SentimentResult.model_fields) | set(EmotionResult.model_fields)
+
+
+class ResultFields:
+    """Fields of the analysis results a response keeps, from the fields and compact parameters"""
+
+    def __init__(
+        self,
+        fields: Optional[str] = Query(
+            None, description="Comma separated result fields to return, all by default"
+        ),
+        compact: bool = Query(
+            False, description="Leave out the echoed text, the per-class scores and model_used"
+        )
+    ):
+        self.fields = (
+            {name.strip() for name in fields.split(",") if name.strip()} if fields else None
+        )
+        self.compact = compact
+
+        unknown = (self.fields or set()) - RESULT_FIELDS
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Unknown result fields: {', '.join(sorted(unknown))}"
+            )
+
+    def exclude(self, model: Type[BaseModel]) -> Optional[Set[str]]:
+        """Fields of model to leave out, None to keep them all"""
+        excluded = {
+            name for name in model.model_fields
+            if (self.fields is not None and name not in self.fields)
+            or (self.compact and name in COMPACT_EXCLUDE)
+        }
+        return excluded or None
@@ -1,15 +1,29 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from functools import partial
 from typing import List
 import logging
 from app.models.schemas import (
     TextInput, SentimentResult, EmotionResult,
     CombinedAnalysisResult, BatchTextInput, BatchSentimentResult,
     TwitterSearchInput, TwitterAnalysisResult, HealthCheck,
-    SentimentLabel
+    SentimentLabel, ModelType, Priority
 )
-from app.services.sentiment_analyzer import sentiment_analyzer
+from app.services.sentiment_analyzer import sentiment_analyzer, ModelNotReadyError
+from app.services.text_normalizer import text_normalizer
 from app.services.twitter_service import twitter_service
+from app.services.job_service import job_service, Job
+from app.services.event_broker import event_broker
+from app.services.inference_scheduler import (
+    inference_scheduler, gather_or_cancel, DeadlineExceededError, ClientDisconnectedError
+)
+from app.services.batch_tuner import batch_tuner
+from app.services.micro_batcher import micro_batcher
+from app.services.auth_service import auth_pool, token_cache, user_cache
 from app.core.config import settings
+from app.api.dependencies import (
+    RateLimitIdentity, ResultFields, get_rate_limit_identity, enforce_rate_limit, refund_rate_limit
+)
+from app.api.responses import each, model_response
 
 logger = logging.getLogger(__name__)
 
@@ -26,8 +40,134 @@ async def health_check():
     )
 
 
+@router.get("/health/live")
+async def liveness():
+    """Liveness probe, succeeds as soon as the process serves requests"""
+    return {"status": "alive"}
+
+
+@router.get("/health/ready")
+async def readiness(response: Response):
+    """
+    Readiness probe.
+
+    Returns 503 until the default model is loaded and warmed up. The other
+    models keep loading in the background; `models` shows each one's
+    status (pending, loading, warming_up, ready or failed) and load time.
+    """
+    ready = sentiment_analyzer.is_ready()
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+    return {
+        "status": "ready" if ready else "loading",
+        "default_model": settings.DEFAULT_MODEL,
+        "models": sentiment_analyzer.model_status
+    }
+
+
+# Left out of /twitter/analyze responses by compact=true
+TWEET_COMPACT_EXCLUDE = {"tweets": {"__all__": {"text": True, "sentiment": {"scores"}}}}
+
+
+def model_not_ready(error: ModelNotReadyError) -> HTTPException:
+    """503 asking the client to retry while models load"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": "10"}
+    )
+
+
+def not_scheduled(error: Exception) -> HTTPException:
+    """504 when the analysis waited past its deadline, 499 when the client left first"""
+    expired = isinstance(error, DeadlineExceededError)
+    return HTTPException(
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT if expired else 499,
+        detail=str(error)
+    )
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Runtime metrics of the worker pools"""
+    return {
+        "auth_pool": auth_pool.stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "result_cache": sentiment_analyzer.result_cache.stats(),
+        "text_normalizer": text_normalizer.stats(),
+        "near_duplicates": sentiment_analyzer.near_duplicates.stats(),
+        "in_flight": sentiment_analyzer.in_flight.stats(),
+        "inference": inference_scheduler.stats(),
+        "micro_batcher": micro_batcher.stats(),
+        "twitter": twitter_service.fetcher.stats() if twitter_service.fetcher else None,
+        "events": event_broker.stats()
+    }
+
+
+@router.get("/debug/batch-tuner")
+async def get_batch_tuner():
+    """
+    Batching of single-text transformer calls.
+
+    Shows the batch size and wait window the tuner currently applies,
+    its bounds and target p95, and its recent decisions with the
+    latencies and queue depth behind each one.
+    """
+    return {**batch_tuner.stats(), "micro_batcher": micro_batcher.stats()}
+
+
+async def sentiment_of(input_data: TextInput, request: Request) -> SentimentResult:
+    """Sentiment of one text, batched with concurrent requests on the transformer models"""
+    if ModelType(input_data.model or ModelType.TRANSFORMERS) != ModelType.TRANSFORMERS:
+        return await inference_scheduler.run(
+            Priority.INTERACTIVE,
+            partial(
+                sentiment_analyzer.analyze_sentiment,
+                text=input_data.text,
+                language=input_data.language,
+                model=input_data.model,
+                approximate=input_data.approximate
+            ),
+            is_disconnected=request.is_disconnected
+        )
+
+    approximate = input_data.approximate
+    return await micro_batcher.submit(
+        ("sentiment", approximate),
+        lambda items: sentiment_analyzer.analyze_sentiment_batch(
+            [text for text, _ in items],
+            [language for _, language in items],
+            ModelType.TRANSFORMERS,
+            approximate
+        ),
+        (input_data.text, input_data.language),
+        is_disconnected=request.is_disconnected
+    )
+
+
+async def emotions_of(input_data: TextInput, request: Request) -> EmotionResult:
+    """Emotions of one text, batched with concurrent requests"""
+    approximate = input_data.approximate
+    return await micro_batcher.submit(
+        ("emotion", approximate),
+        lambda items: sentiment_analyzer.analyze_emotions_batch(
+            [text for text, _ in items], [language for _, language in items], approximate
+        ),
+        (input_data.text, input_data.language),
+        is_disconnected=request.is_disconnected
+    )
+
+
 @router.post("/sentiment", response_model=SentimentResult)
-async def analyze_sentiment(input_data: TextInput):
+async def analyze_sentiment(
+    input_data: TextInput,
+    request: Request,
+    response: Response,
+    fields: ResultFields = Depends(),
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
     """
     Analyze sentiment of a single text.
 
@@ -38,13 +178,15 @@ async def analyze_sentiment(input_data: TextInput):
     - language: detected language
     - model_used: model used for analysis
     """
+    await enforce_rate_limit(identity, response)
+
     try:
-        result = sentiment_analyzer.analyze_sentiment(
-            text=input_data.text,
-            language=input_data.language,
-            model=input_data.model
-        )
-        return result
+        result = await sentiment_of(input_data, request)
+        return model_response(result, response, fields.exclude(SentimentResult))
+    except ModelNotReadyError as e:
+        raise model_not_ready(e)
+    except (DeadlineExceededError, ClientDisconnectedError) as e:
+        raise not_scheduled(e)
     except Exception as e:
         logger.error(f"Error analyzing sentiment: {e}")
         raise HTTPException(
@@ -54,7 +196,13 @@ async def analyze_sentiment(input_data: TextInput):
 
 
 @router.post("/emotion", response_model=EmotionResult)
-async def analyze_emotion(input_data: TextInput):
+async def analyze_emotion(
+    input_data: TextInput,
+    request: Request,
+    response: Response,
+    fields: ResultFields = Depends(),
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
     """
     Analyze emotions in a single text.
 
@@ -65,12 +213,15 @@ async def analyze_emotion(input_data: TextInput):
     - language: detected language
     - model_used: model used for analysis
     """
+    await enforce_rate_limit(identity, response)
+
     try:
-        result = sentiment_analyzer.analyze_emotions(
-            text=input_data.text,
-            language=input_data.language
-        )
-        return result
+        result = await emotions_of(input_data, request)
+        return model_response(result, response, fields.exclude(EmotionResult))
+    except ModelNotReadyError as e:
+        raise model_not_ready(e)
+    except (DeadlineExceededError, ClientDisconnectedError) as e:
+        raise not_scheduled(e)
     except Exception as e:
         logger.error(f"Error analyzing emotion: {e}")
         raise HTTPException(
@@ -80,28 +231,38 @@ async def analyze_emotion(input_data: TextInput):
 
 
 @router.post("/analyze", response_model=CombinedAnalysisResult)
-async def analyze_combined(input_data: TextInput):
+async def analyze_combined(
+    input_data: TextInput,
+    request: Request,
+    response: Response,
+    fields: ResultFields = Depends(),
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
     """
     Perform combined sentiment and emotion analysis.
 
     Returns both sentiment and emotion analysis results.
     """
-    try:
-        sentiment_result = sentiment_analyzer.analyze_sentiment(
-            text=input_data.text,
-            language=input_data.language,
-            model=input_data.model
-        )
+    await enforce_rate_limit(identity, response)
 
-        emotion_result = sentiment_analyzer.analyze_emotions(
-            text=input_data.text,
-            language=input_data.language
+    try:
+        sentiment_result, emotion_result = await gather_or_cancel(
+            sentiment_of(input_data, request),
+            emotions_of(input_data, request)
         )
 
-        return CombinedAnalysisResult(
+        combined = CombinedAnalysisResult.model_construct(
             sentiment=sentiment_result,
             emotion=emotion_result
         )
+        return model_response(combined, response, {
+            "sentiment": fields.exclude(SentimentResult) or set(),
+            "emotion": fields.exclude(EmotionResult) or set()
+        })
+    except ModelNotReadyError as e:
+        raise model_not_ready(e)
+    except (DeadlineExceededError, ClientDisconnectedError) as e:
+        raise not_scheduled(e)
     except Exception as e:
         logger.error(f"Error in combined analysis: {e}")
         raise HTTPException(
@@ -111,41 +272,74 @@ async def analyze_combined(input_data: TextInput):
 
 
 @router.post("/sentiment/batch", response_model=BatchSentimentResult)
-async def analyze_sentiment_batch(input_data: BatchTextInput):
+async def analyze_sentiment_batch(
+    input_data: BatchTextInput,
+    request: Request,
+    response: Response,
+    fields: ResultFields = Depends(),
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
     """
     Analyze sentiment for multiple texts.
 
+    Each text counts against the rate limit.
+
     Returns:
     - results: list of sentiment analysis results
     - summary: count of positive/negative/neutral sentiments
     - average_confidence: average confidence across all predictions
     """
+    await enforce_rate_limit(identity, response, cost=len(input_data.texts))
+
     try:
-        results = sentiment_analyzer.analyze_batch(
-            texts=input_data.texts,
-            language=input_data.language,
-            model=input_data.model
-        )
+        # Scheduled in model-sized chunks, so single-text requests get in between them
+        size = settings.MODEL_BATCH_SIZE
+        chunks = [
+            input_data.texts[start:start + size]
+            for start in range(0, len(input_data.texts), size)
+        ]
+        chunk_results = await gather_or_cancel(*(
+            inference_scheduler.run(
+                Priority.BATCH,
+                partial(
+                    sentiment_analyzer.analyze_batch,
+                    texts=chunk,
+                    language=input_data.language,
+                    model=input_data.model,
+                    approximate=input_data.approximate
+                ),
+                cost=len(chunk),
+                is_disconnected=request.is_disconnected
+            )
+            for chunk in chunks
+        ))
+        results = [result for chunk in chunk_results for result in chunk]
 
         # Calculate summary
         summary = {
-            SentimentLabel.POSITIVE: 0,
-            SentimentLabel.NEGATIVE: 0,
-            SentimentLabel.NEUTRAL: 0
+            SentimentLabel.POSITIVE.value: 0,
+            SentimentLabel.NEGATIVE.value: 0,
+            SentimentLabel.NEUTRAL.value: 0
         }
         total_confidence = 0.0
 
         for result in results:
-            summary[result.label] += 1
+            summary[result.label.value] += 1
             total_confidence += result.confidence
 
         avg_confidence = total_confidence / len(results) if results else 0.0
 
-        return BatchSentimentResult(
+        batch = BatchSentimentResult.model_construct(
             results=results,
             summary=summary,
             average_confidence=avg_confidence
         )
+        exclude = each(fields.exclude(SentimentResult))
+        return model_response(batch, response, {"results": exclude} if exclude else None)
+    except ModelNotReadyError as e:
+        raise model_not_ready(e)
+    except (DeadlineExceededError, ClientDisconnectedError) as e:
+        raise not_scheduled(e)
     except Exception as e:
         logger.error(f"Error in batch analysis: {e}")
         raise HTTPException(
@@ -154,11 +348,94 @@ async def analyze_sentiment_batch(input_data: BatchTextInput):
         )
 
 
+def job_accepted(request: Request, response: Response, job: Job) -> dict:
+    """202 body pointing to a job's status and event stream"""
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": job.total,
+        "status_url": str(request.url_for("get_job", job_id=job.id)),
+        "events_url": str(request.url_for("stream_job", job_id=job.id))
+    }
+
+
+@router.post("/sentiment/batch/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def start_sentiment_batch_job(
+    input_data: BatchTextInput,
+    request: Request,
+    response: Response,
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
+    """
+    Analyze multiple texts in the background.
+
+    Each text counts against the rate limit. Follow `events_url` for
+    per-text results as they are ready, or poll `status_url`.
+    """
+    await enforce_rate_limit(identity, response, cost=len(input_data.texts))
+
+    job = job_service.start_batch(
+        texts=input_data.texts,
+        language=input_data.language,
+        model=input_data.model,
+        approximate=input_data.approximate
+    )
+    return job_accepted(request, response, job)
+
+
+@router.post("/twitter/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def start_twitter_job(
+    input_data: TwitterSearchInput,
+    request: Request,
+    response: Response,
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
+    """
+    Search and analyze tweets in the background.
+
+    Each requested tweet counts against the rate limit, and the ones the
+    search did not return are refunded when the job finishes. max_results
+    is lowered to the caller's hourly limit. Follow `events_url` to
+    receive each analyzed page as it is ready.
+    """
+    max_results = identity.cap(input_data.max_results)
+    await enforce_rate_limit(identity, response, cost=max_results)
+
+    async def refund(analyzed: int):
+        await refund_rate_limit(identity, max_results - analyzed)
+
+    try:
+        job = job_service.start_twitter(
+            query=input_data.query,
+            max_results=max_results,
+            language=input_data.language,
+            on_finish=refund
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return job_accepted(request, response, job)
+
+
 @router.post("/twitter/analyze", response_model=TwitterAnalysisResult)
-async def analyze_twitter(input_data: TwitterSearchInput):
+async def analyze_twitter(
+    input_data: TwitterSearchInput,
+    response: Response,
+    compact: bool = Query(
+        False, description="Leave out the tweet texts and per-tweet sentiment scores"
+    ),
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
     """
     Search and analyze sentiment of tweets.
 
+    Each requested tweet counts against the rate limit, and the ones the
+    search did not return are refunded. max_results is lowered to the
+    caller's hourly limit.
+
     Returns:
     - query: search query used
     - total_tweets: number of tweets analyzed
@@ -167,18 +444,26 @@ async def analyze_twitter(input_data: TwitterSearchInput):
     - average_sentiment_scores: average sentiment scores
     - tweets: list of tweets with sentiment analysis
     """
+    max_results = identity.cap(input_data.max_results)
+    await enforce_rate_limit(identity, response, cost=max_results)
+
     try:
-        result = twitter_service.analyze_tweets(
+        result = await twitter_service.analyze_tweets(
             query=input_data.query,
-            max_results=input_data.max_results,
+            max_results=max_results,
             language=input_data.language
         )
-        return result
+        await refund_rate_limit(identity, max_results - result.total_tweets)
+        return model_response(result, response, TWEET_COMPACT_EXCLUDE if compact else None)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except ModelNotReadyError as e:
+        raise model_not_ready(e)
+    except DeadlineExceededError as e:
+        raise not_scheduled(e)
     except Exception as e:
         logger.error(f"Error analyzing Twitter: {e}")
         raise HTTPException(
@@ -196,12 +481,14 @@ async def list_models():
                 "name": "NLTK (VADER)",
                 "type": "nltk",
                 "loaded": sentiment_analyzer.models_loaded.get("nltk", False),
+                "status": sentiment_analyzer.model_status["nltk"]["status"],
                 "description": "Rule-based sentiment analysis, good for social media"
             },
             {
                 "name": "spaCy",
                 "type": "spacy",
                 "loaded": sentiment_analyzer.models_loaded.get("spacy", False),
+                "status": sentiment_analyzer.model_status["spacy"]["status"],
                 "description": "NLP processing with entity recognition",
                 "languages": ["en", "pt", "es"]
             },
@@ -209,6 +496,7 @@ async def list_models():
                 "name": "Transformers (BERT)",
                 "type": "transformers",
                 "loaded": sentiment_analyzer.models_loaded.get("transformers", False),
+                "status": sentiment_analyzer.model_status["transformers"]["status"],
                 "description": "State-of-the-art deep learning models",
                 "capabilities": ["sentiment", "emotion", "multilingual"]
             }
@@ -0,0 +1,125 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.services.event_broker import event_broker, format_sse
+from app.services.job_service import job_service, TERMINAL_EVENTS
+from app.services.monitor_service import monitor_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+async def event_stream(
+    request: Request,
+    topic: str,
+    initial: Optional[Callable[[], Dict]] = None,
+    until: Iterable[str] = ()
+) -> AsyncIterator[str]:
+    """
+    Relay a broker topic as Server-Sent Events until the client leaves or an until event arrives
+
+    initial builds the first event once the stream starts.
+    """
+    with event_broker.subscribe(topic) as queue:
+        # Snapshot taken after subscribing, so no update is lost in between
+        if initial is not None:
+            first = initial()
+            yield format_sse({"id": 0, **first})
+            if first["event"] in until:
+                return
+
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield format_sse(event)
+            if event["event"] in until:
+                return
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get a job's progress and the results produced so far"""
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return job.snapshot()
+
+
+@router.get("/events/jobs/{job_id}")
+async def stream_job(job_id: str, request: Request):
+    """
+    Stream a job as Server-Sent Events
+
+    Starts with a `snapshot` of the job, then sends `item` or `page`
+    results, `progress` updates and a final `done` or `error` event.
+    Results carry their index, so ones repeated by the snapshot can be skipped.
+    """
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    def initial() -> Dict:
+        if job.status == "running":
+            return {"event": "snapshot", "data": job.snapshot()}
+        return {"event": "done" if job.status == "done" else "error", "data": job.snapshot()}
+
+    return StreamingResponse(
+        event_stream(
+            request,
+            job.topic,
+            initial=initial,
+            until=TERMINAL_EVENTS
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
+@router.get("/events/monitors/{monitor_id}")
+async def stream_monitor(monitor_id: int, request: Request):
+    """
+    Stream a monitor's rolling aggregates as Server-Sent Events
+
+    Sends the current `window` state, then one `window` event per poll
+    and `closed` when the monitor is stopped. All listeners share the
+    same update, published once per poll.
+    """
+    monitor = monitor_service.get(monitor_id)
+    if not monitor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Monitor not found"
+        )
+
+    return StreamingResponse(
+        event_stream(
+            request,
+            monitor.topic,
+            initial=lambda: {"event": "window", "data": monitor.snapshot()},
+            until=("closed",)
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
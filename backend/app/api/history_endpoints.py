@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, AsyncSessionLocal
 from app.services.history_service import history_service
 from app.services.export_service import export_service
+from app.services.report_service import report_service
 from app.models.schemas import SentimentResult
 from pydantic import BaseModel
 
@@ -61,7 +63,7 @@ async def get_history(
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
     analysis_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get analysis history
@@ -72,7 +74,7 @@ async def get_history(
     """
     try:
         # For now, get all recent analyses since we don't have user auth yet
-        analyses = history_service.get_recent_analyses(db, limit=limit)
+        analyses = await history_service.get_recent_analyses(db, limit=limit)
 
         return analyses
     except Exception as e:
@@ -83,7 +85,7 @@ async def get_history(
 @router.get("/stats", response_model=StatsResponse)
 async def get_stats(
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get sentiment statistics
@@ -91,7 +93,7 @@ async def get_stats(
     - **days**: Number of days to include (1-365)
     """
     try:
-        stats = history_service.get_sentiment_stats(db, days=days)
+        stats = await history_service.get_sentiment_stats(db, days=days)
         return stats
     except Exception as e:
         logger.error(f"Error retrieving stats: {e}")
@@ -102,7 +104,7 @@ async def get_stats(
 async def get_trends(
     days: int = Query(30, ge=1, le=365),
     keyword: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get trend data over time
@@ -111,7 +113,7 @@ async def get_trends(
     - **keyword**: Optional keyword to filter by
     """
     try:
-        trends = history_service.get_trend_data(db, days=days, keyword=keyword)
+        trends = await history_service.get_trend_data(db, days=days, keyword=keyword)
         return trends
     except Exception as e:
         logger.error(f"Error retrieving trends: {e}")
@@ -121,7 +123,7 @@ async def get_trends(
 @router.post("/trends/update")
 async def update_trends(
     keyword: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update trend data aggregation for today
@@ -129,7 +131,7 @@ async def update_trends(
     - **keyword**: Optional keyword to aggregate for
     """
     try:
-        trend = history_service.update_trend_data(db, keyword=keyword)
+        trend = await history_service.update_trend_data(db, keyword=keyword)
 
         if not trend:
             return {"message": "No data to aggregate"}
@@ -144,23 +146,36 @@ async def update_trends(
         raise HTTPException(status_code=500, detail=f"Error updating trends: {str(e)}")
 
 
+async def stream_export_batches(days: int):
+    """Stream analyses for an export with a session owned by the response"""
+    async with AsyncSessionLocal() as db:
+        async for batch in history_service.stream_analyses(
+            db, hours=days*24, batch_size=settings.EXPORT_BATCH_SIZE
+        ):
+            yield batch
+
+
 @router.get("/export/csv")
 async def export_csv(
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    gzip: bool = Query(False, description="Compress the CSV with gzip")
 ):
-    """Export analysis history to CSV"""
+    """Export analysis history to CSV, streamed without a row cap"""
     try:
-        analyses = history_service.get_recent_analyses(db, limit=1000, hours=days*24)
-        export_data = export_service.prepare_export_data(analyses)
+        content = export_service.stream_csv(stream_export_batches(days))
+        filename = f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.csv"
+        media_type = "text/csv"
 
-        csv_content = export_service.export_to_csv(export_data)
+        if gzip:
+            content = export_service.gzip_stream(content)
+            filename += ".gz"
+            media_type = "application/gzip"
 
         return StreamingResponse(
-            iter([csv_content]),
-            media_type="text/csv",
+            content,
+            media_type=media_type,
             headers={
-                "Content-Disposition": f"attachment; filename=sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.csv"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     except Exception as e:
@@ -171,20 +186,31 @@ async def export_csv(
 @router.get("/export/json")
 async def export_json(
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+    format: str = Query("array", pattern="^(array|ndjson)$", description="JSON array or NDJSON"),
+    gzip: bool = Query(False, description="Compress the output with gzip")
 ):
-    """Export analysis history to JSON"""
+    """
+    Export analysis history to JSON, streamed without a row cap
+
+    - **format**: `array` for a single JSON array, `ndjson` for one object per line
+    """
     try:
-        analyses = history_service.get_recent_analyses(db, limit=1000, hours=days*24)
-        export_data = export_service.prepare_export_data(analyses)
+        ndjson = format == "ndjson"
+        content = export_service.stream_json(stream_export_batches(days), ndjson=ndjson)
+        extension = "ndjson" if ndjson else "json"
+        filename = f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.{extension}"
+        media_type = "application/x-ndjson" if ndjson else "application/json"
 
-        json_content = export_service.export_to_json(export_data)
+        if gzip:
+            content = export_service.gzip_stream(content)
+            filename += ".gz"
+            media_type = "application/gzip"
 
         return StreamingResponse(
-            iter([json_content]),
-            media_type="application/json",
+            content,
+            media_type=media_type,
             headers={
-                "Content-Disposition": f"attachment; filename=sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.json"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     except Exception as e:
@@ -192,25 +218,128 @@ async def export_json(
         raise HTTPException(status_code=500, detail=f"Error exporting JSON: {str(e)}")
 
 
-@router.get("/export/pdf")
-async def export_pdf(
-    days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db)
+@router.get("/export/xlsx")
+async def export_xlsx(
+    days: int = Query(7, ge=1, le=365)
 ):
-    """Export analysis history to PDF"""
+    """Export analysis history to Excel, written incrementally in write-only mode"""
     try:
-        analyses = history_service.get_recent_analyses(db, limit=100, hours=days*24)
-        export_data = export_service.prepare_export_data(analyses)
+        content = export_service.stream_excel(stream_export_batches(days))
+        filename = f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.xlsx"
+
+        return StreamingResponse(
+            content,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}"
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error exporting Excel: {e}")
+        raise HTTPException(status_code=500, detail=f"Error exporting Excel: {str(e)}")
 
-        pdf_content = export_service.export_to_pdf(export_data)
+
+@router.get("/export/parquet")
+async def export_parquet(
+    days: int = Query(7, ge=1, le=365)
+):
+    """Export analysis history to Parquet with typed columns, streamed in row groups"""
+    try:
+        content = export_service.stream_columnar(
+            stream_export_batches(days),
+            format="parquet",
+            row_group_size=settings.EXPORT_ROW_GROUP_SIZE
+        )
+        filename = f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.parquet"
 
         return StreamingResponse(
-            iter([pdf_content]),
-            media_type="application/pdf",
+            content,
+            media_type="application/vnd.apache.parquet",
             headers={
-                "Content-Disposition": f"attachment; filename=sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.pdf"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
+    except Exception as e:
+        logger.error(f"Error exporting Parquet: {e}")
+        raise HTTPException(status_code=500, detail=f"Error exporting Parquet: {str(e)}")
+
+
+@router.get("/export/arrow")
+async def export_arrow(
+    days: int = Query(7, ge=1, le=365)
+):
+    """Export analysis history as an Arrow IPC stream with typed columns"""
+    try:
+        content = export_service.stream_columnar(stream_export_batches(days), format="arrow")
+        filename = f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.arrows"
+
+        return StreamingResponse(
+            content,
+            media_type="application/vnd.apache.arrow.stream",
+            headers={
+                "Content-Disposition": f"attachment; filename={filename}"
+            }
+        )
+    except Exception as e:
+        logger.error(f"Error exporting Arrow: {e}")
+        raise HTTPException(status_code=500, detail=f"Error exporting Arrow: {str(e)}")
+
+
+def report_response(request: Request, report_id: str, status: dict):
+    """Serve a finished report, or 202 with a poll URL while it renders"""
+    if status["status"] == "ready":
+        return FileResponse(
+            status["path"],
+            media_type="application/pdf",
+            filename=f"sentiment_analysis_{datetime.now().strftime('%Y%m%d')}.pdf"
+        )
+
+    if status["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Error exporting PDF: {status['error']}")
+
+    poll_url = str(request.url_for("get_pdf_report", report_id=report_id))
+    return JSONResponse(
+        status_code=202,
+        content={"status": "pending", "report_id": report_id, "poll_url": poll_url},
+        headers={"Location": poll_url, "Retry-After": "2"}
+    )
+
+
+@router.get("/export/pdf")
+async def export_pdf(
+    request: Request,
+    days: int = Query(7, ge=1, le=365),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Export analysis history to PDF
+
+    Reports render in a background worker. Returns the PDF when it is cached,
+    otherwise 202 with a poll URL.
+    """
+    try:
+        since = datetime.utcnow() - timedelta(days=days)
+        watermark = await report_service.get_watermark(db, since)
+        report_id = report_service.report_key({"days": days, "limit": 100}, watermark)
+
+        status = report_service.get_status(report_id)
+        if status["status"] in ("missing", "failed"):
+            analyses = await history_service.get_recent_analyses(db, limit=100, hours=days*24)
+            export_data = export_service.prepare_export_data(analyses)
+            status = report_service.submit(report_id, export_data)
     except Exception as e:
         logger.error(f"Error exporting PDF: {e}")
         raise HTTPException(status_code=500, detail=f"Error exporting PDF: {str(e)}")
+
+    return report_response(request, report_id, status)
+
+
+@router.get("/export/pdf/{report_id}", name="get_pdf_report")
+async def get_pdf_report(request: Request, report_id: str):
+    """Poll a PDF report started by /export/pdf"""
+    status = report_service.get_status(report_id)
+
+    if status["status"] == "missing":
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return report_response(request, report_id, status)
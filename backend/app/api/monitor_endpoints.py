@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import BaseModel, Field
+from typing import Optional
+import logging
+
+from app.api.dependencies import RateLimitIdentity, get_rate_limit_identity, enforce_rate_limit
+from app.services.monitor_service import monitor_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class MonitorCreate(BaseModel):
+    query: str = Field(..., min_length=1, max_length=500, description="Search query to watch")
+    language: Optional[str] = Field(
+        None, description="Language code, taken from each tweet if not provided"
+    )
+    interval_seconds: Optional[int] = Field(
+        None, ge=5, le=3600, description="Seconds between polls"
+    )
+
+
+@router.post("/monitors", status_code=status.HTTP_201_CREATED)
+async def create_monitor(
+    monitor_data: MonitorCreate,
+    response: Response,
+    identity: RateLimitIdentity = Depends(get_rate_limit_identity)
+):
+    """
+    Start monitoring a Twitter query
+
+    New tweets are fetched every interval and folded into rolling
+    per-minute and per-hour aggregates.
+    """
+    await enforce_rate_limit(identity, response)
+
+    try:
+        monitor = monitor_service.create(
+            query=monitor_data.query,
+            language=monitor_data.language,
+            interval=monitor_data.interval_seconds
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    return monitor.snapshot()
+
+
+@router.get("/monitors")
+async def list_monitors():
+    """List the monitors running on this worker"""
+    return [monitor.snapshot() for monitor in monitor_service.monitors.values()]
+
+
+@router.get("/monitors/{monitor_id}")
+async def get_monitor(monitor_id: int):
+    """Get a monitor's rolling sentiment and emotion aggregates"""
+    monitor = monitor_service.get(monitor_id)
+    if not monitor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Monitor not found"
+        )
+
+    return monitor.snapshot()
+
+
+@router.delete("/monitors/{monitor_id}")
+async def delete_monitor(monitor_id: int):
+    """Stop a monitor"""
+    monitor = await monitor_service.delete(monitor_id)
+    if not monitor:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Monitor not found"
+        )
+
+    return {"message": "Monitor stopped", "id": monitor.id}
@@ -0,0 +1,40 @@
+from typing import Optional, Set
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed"""
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def model_response(model: BaseModel, response: Optional[Response] = None, exclude=None) -> Response:
+    """
+    Response of a model built by the app itself.
+
+    Returning a Response skips FastAPI's response_model pass, which would
+    dump the model, validate it again and run it through jsonable_encoder;
+    pydantic's own serializer writes the JSON in one go instead. The
+    route's response_model still documents the schema.
+    """
+    rendered = Response(model.model_dump_json(exclude=exclude), media_type="application/json")
+    if response is not None:
+        # FastAPI only copies the injected response's headers (rate limits) to responses it builds
+        rendered.headers.raw.extend(response.headers.raw)
+    return rendered
+
+
+def each(exclude: Optional[Set[str]]) -> Optional[dict]:
+    """exclude applied to every item of a list field"""
+    return {"__all__": exclude} if exclude else None
@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Iterable
+import threading
+import time
+
+
+class ExpiringLRUCache:
+    """LRU cache whose entries carry their own wall-clock expiry"""
+
+    def __init__(self, max_size: int = 10000, clock=time.time):
+        self.max_size = max_size
+        self.clock = clock
+        # Shared by request handlers and the threads running the models
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """Cached value, None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value, expires_at: float):
+        """Cache value until the expires_at timestamp"""
+        if expires_at <= self.clock():
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str):
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Size and hit counters"""
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class SingleFlight:
+    """
+    Shares one computation between concurrent callers of the same key.
+
+    The first caller of a key leads: it computes the value and resolves
+    the key's future. Callers arriving while it runs wait on that future
+    and get the same value, or the same exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self.led = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def claim(self, keys: Iterable[str]) -> Dict[str, Future]:
+        """Lead every key not in flight; futures of the keys other callers lead"""
+        waiting = {}
+        with self._lock:
+            for key in keys:
+                future = self._calls.get(key)
+                if future is None:
+                    self._calls[key] = Future()
+                    self.led += 1
+                else:
+                    waiting[key] = future
+                    self.coalesced += 1
+        return waiting
+
+    def resolve(self, values: Dict[str, object]):
+        """Hand the values of led keys to their waiters"""
+        with self._lock:
+            futures = [(self._calls.pop(key), value) for key, value in values.items()]
+        for future, value in futures:
+            future.set_result(value)
+
+    def fail(self, keys: Iterable[str], error: BaseException):
+        """Hand the error of led keys to their waiters"""
+        with self._lock:
+            futures = [self._calls.pop(key) for key in keys]
+            self.failed += len(futures)
+        for future in futures:
+            future.set_exception(error)
+
+    def stats(self) -> dict:
+        """Keys in flight, led, coalesced onto a leader and failed"""
+        return {
+            "in_flight": len(self._calls),
+            "led": self.led,
+            "coalesced": self.coalesced,
+            "failed": self.failed
+        }
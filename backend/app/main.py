@@ -1,14 +1,22 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+import asyncio
 import logging
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, create_tables, AsyncSessionLocal
 from app.api.endpoints import router
+from app.api.responses import FastJSONResponse
 from app.api.history_endpoints import router as history_router
 from app.api.auth_endpoints import router as auth_router
+from app.api.monitor_endpoints import router as monitor_router
+from app.api.event_endpoints import router as event_router
+from app.services.retention_service import retention_service
+from app.services.report_service import report_service
+from app.services.auth_service import auth_service
+from app.services.monitor_service import monitor_service
+from app.services.job_service import job_service
+from app.services.sentiment_analyzer import sentiment_analyzer
+from app.services.inference_scheduler import inference_scheduler
 
 # Configure logging
 logging.basicConfig(
@@ -18,17 +26,10 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
-
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    limiter=limiter,
     description="""
     ## Sentiment Analysis API
 
@@ -54,7 +55,8 @@ app = FastAPI(
     * Auto-detection for other languages
     """,
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -66,14 +68,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add rate limit handler
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # Include routers
 app.include_router(router, prefix=settings.API_V1_PREFIX, tags=["Analysis"])
 app.include_router(history_router, prefix=settings.API_V1_PREFIX, tags=["History"])
 app.include_router(auth_router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["Authentication"])
+app.include_router(monitor_router, prefix=settings.API_V1_PREFIX, tags=["Monitors"])
+app.include_router(event_router, prefix=settings.API_V1_PREFIX, tags=["Events"])
 
 
 @app.on_event("startup")
@@ -83,11 +83,38 @@ async def startup_event():
     logger.info(f"Debug mode: {settings.DEBUG}")
     logger.info(f"CORS origins: {settings.cors_origins_list}")
 
+    # Create database tables
+    await create_tables()
+
+    # Create upcoming monthly partitions when analyses is partitioned
+    async with AsyncSessionLocal() as db:
+        created = await retention_service.ensure_partitions(db)
+        if created:
+            logger.info(f"Created analyses partitions: {created}")
+
+    # Batch API key last_used_at writes
+    app.state.api_key_flusher = asyncio.create_task(auth_service.run_last_used_flusher())
+
+    # Load and warm up the models after the server binds; /health/ready reports progress
+    app.state.model_loader = asyncio.create_task(asyncio.to_thread(sentiment_analyzer.load_models))
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler"""
     logger.info("Shutting down application")
+    report_service.shutdown()
+    sentiment_analyzer.shutdown()
+    await monitor_service.shutdown()
+    await job_service.shutdown()
+    inference_scheduler.shutdown()
+
+    app.state.api_key_flusher.cancel()
+    try:
+        await app.state.api_key_flusher
+    except asyncio.CancelledError:
+        pass
+    await engine.dispose()
 
 
 @app.get("/")
@@ -97,5 +124,7 @@ async def root():
         "message": "Welcome to Sentiment Analysis API",
         "version": settings.APP_VERSION,
         "docs": "/docs",
-        "health": f"{settings.API_V1_PREFIX}/health"
+        "health": f"{settings.API_V1_PREFIX}/health",
+        "liveness": f"{settings.API_V1_PREFIX}/health/live",
+        "readiness": f"{settings.API_V1_PREFIX}/health/ready"
     }
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Text, ForeignKey, Index
+from sqlalchemy import (
+    Column, Integer, String, DateTime, Float, JSON, Text, ForeignKey, Index, UniqueConstraint
+)
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from app.core.config import settings
 from app.core.database import Base
 
 
@@ -39,7 +42,7 @@ class APIKey(Base):
 class Analysis(Base):
     __tablename__ = "analyses"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     text = Column(Text, nullable=False)
     text_hash = Column(String(64), index=True)  # For caching
@@ -66,14 +69,20 @@ class Analysis(Base):
     twitter_query = Column(String(500), nullable=True)
     twitter_data = Column(JSON, nullable=True)
 
-    # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Timestamps (the partition key must be part of the primary key when partitioned)
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        index=True,
+        primary_key=settings.ANALYSES_PARTITIONED
+    )
     processing_time = Column(Float)  # seconds
 
     # Indexes for performance
     __table_args__ = (
         Index('ix_user_created', 'user_id', 'created_at'),
         Index('ix_type_created', 'analysis_type', 'created_at'),
+        {"postgresql_partition_by": "RANGE (created_at)"} if settings.ANALYSES_PARTITIONED else {},
     )
 
     # Relationships
@@ -105,3 +114,31 @@ class TrendData(Base):
     __table_args__ = (
         Index('ix_date_keyword', 'date', 'keyword'),
     )
+
+
+class MonitorTrend(Base):
+    """Hourly aggregates of a monitor, kept apart from the daily TrendData rows"""
+    __tablename__ = "monitor_trends"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Unique per monitor instance, so monitors of the same query keep their own rows
+    monitor_key = Column(String(32), nullable=False)
+    query = Column(String(500), index=True, nullable=False)
+    hour = Column(DateTime, index=True, nullable=False)
+
+    total_analyses = Column(Integer, default=0)
+    positive_count = Column(Integer, default=0)
+    negative_count = Column(Integer, default=0)
+    neutral_count = Column(Integer, default=0)
+
+    avg_positive_score = Column(Float)
+    avg_negative_score = Column(Float)
+    avg_confidence = Column(Float)
+
+    emotion_distribution = Column(JSON)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('monitor_key', 'hour', name='uq_monitor_trend_hour'),
+    )
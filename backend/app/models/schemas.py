@@ -25,16 +25,28 @@ class ModelType(str, Enum):
     TRANSFORMERS = "transformers"
 
 
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    BACKGROUND = "background"
+
+
 class TextInput(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000, description="Text to analyze")
     language: Optional[str] = Field(None, description="Language code (en, pt, es). Auto-detected if not provided")
     model: Optional[ModelType] = Field(None, description="Model to use for analysis")
+    approximate: bool = Field(
+        False, description="Accept the cached result of a near-duplicate text"
+    )
 
 
 class BatchTextInput(BaseModel):
     texts: List[str] = Field(..., min_items=1, max_items=100, description="List of texts to analyze")
     language: Optional[str] = Field(None, description="Language code (en, pt, es). Auto-detected if not provided")
     model: Optional[ModelType] = Field(None, description="Model to use for analysis")
+    approximate: bool = Field(
+        False, description="Accept the cached result of a near-duplicate text"
+    )
 
 
 class SentimentScore(BaseModel):
@@ -43,6 +55,17 @@ class SentimentScore(BaseModel):
     neutral: float = Field(..., ge=0, le=1)
 
 
+class AspectSentiment(BaseModel):
+    text: str
+    type: str = Field(..., description="Entity label, or NOUN_CHUNK")
+    start: int = Field(..., description="Offset in the normalized text")
+    end: int
+    sentence: str
+    label: SentimentLabel
+    scores: SentimentScore
+    confidence: float = Field(..., ge=0, le=1)
+
+
 class SentimentResult(BaseModel):
     text: str
     label: SentimentLabel
@@ -50,6 +73,10 @@ class SentimentResult(BaseModel):
     confidence: float = Field(..., ge=0, le=1)
     language: str
     model_used: str
+    aspects: Optional[List[AspectSentiment]] = Field(
+        None, description="Sentiment of each entity and noun chunk (spaCy model)"
+    )
+    approximate: bool = Field(False, description="Result reused from a near-duplicate text")
 
 
 class EmotionScore(BaseModel):
@@ -68,6 +95,7 @@ class EmotionResult(BaseModel):
     confidence: float = Field(..., ge=0, le=1)
     language: str
     model_used: str
+    approximate: bool = Field(False, description="Result reused from a near-duplicate text")
 
 
 class CombinedAnalysisResult(BaseModel):
@@ -83,7 +111,7 @@ class BatchSentimentResult(BaseModel):
 
 class TwitterSearchInput(BaseModel):
     query: str = Field(..., min_length=1, max_length=500, description="Search query")
-    max_results: int = Field(10, ge=1, le=100, description="Maximum number of tweets to analyze")
+    max_results: int = Field(10, ge=1, le=5000, description="Maximum number of tweets to analyze")
     language: Optional[str] = Field(None, description="Language filter")
 
 
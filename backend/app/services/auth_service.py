@@ -1,17 +1,186 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Dict
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.cache import ExpiringLRUCache
+from app.core.database import AsyncSessionLocal
 from app.models.database import User, APIKey
+import asyncio
+import hashlib
+import logging
 import secrets
+import time
+
+logger = logging.getLogger(__name__)
 
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
+class AuthPoolBusyError(Exception):
+    """Raised when the auth worker pool queue is full"""
+
+
+class AuthWorkerPool:
+    """
+    Size-limited executor for bcrypt hashing and verification.
+
+    bcrypt releases the GIL, so a few threads keep it off the event loop.
+    At most max_workers + max_queue calls are admitted; the rest are
+    rejected so a login storm cannot build an unbounded backlog.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="auth")
+        self.in_flight = 0
+        self.metrics = {
+            "completed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "max_in_flight": 0,
+            "total_wait_seconds": 0.0,
+            "total_run_seconds": 0.0,
+        }
+
+    async def run(self, func, *args):
+        """Run func(*args) on the pool, raising AuthPoolBusyError when full"""
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.metrics["rejected"] += 1
+            raise AuthPoolBusyError("Authentication is busy, please retry")
+
+        self.in_flight += 1
+        self.metrics["max_in_flight"] = max(self.metrics["max_in_flight"], self.in_flight)
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            return func(*args), started, time.perf_counter()
+
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self.executor, timed
+            )
+        except Exception:
+            self.metrics["failed"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        self.metrics["completed"] += 1
+        self.metrics["total_wait_seconds"] += started - submitted
+        self.metrics["total_run_seconds"] += finished - started
+
+        return result
+
+    def stats(self) -> dict:
+        """Current queue depth and timing metrics"""
+        completed = self.metrics["completed"] or 1
+        return {
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.max_workers),
+            **self.metrics,
+            "avg_wait_ms": self.metrics["total_wait_seconds"] / completed * 1000,
+            "avg_run_ms": self.metrics["total_run_seconds"] / completed * 1000,
+        }
+
+
+auth_pool = AuthWorkerPool(
+    max_workers=settings.AUTH_WORKERS,
+    max_queue=settings.AUTH_QUEUE_SIZE
+)
+
+
+class APIKeyCache:
+    """
+    TTL cache of verified API keys with batched last_used_at writes.
+
+    Bounded to max_size keys, evicting the least recently used.
+
+    Revocations invalidate the local entry immediately; other workers see
+    them once their entry expires, so the TTL bounds cross-worker staleness.
+    """
+
+    def __init__(self, ttl: int = 30, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._keys: "OrderedDict[str, tuple]" = OrderedDict()
+        self._last_used: Dict[int, datetime] = {}
+
+    def get(self, key: str) -> Optional[APIKey]:
+        """Cached API key, None when missing or expired"""
+        entry = self._keys.get(key)
+        if entry is None:
+            return None
+
+        expires_at, api_key = entry
+        if expires_at < time.monotonic():
+            del self._keys[key]
+            return None
+
+        self._keys.move_to_end(key)
+        return api_key
+
+    def put(self, key: str, api_key: APIKey):
+        """Cache a verified API key"""
+        self._keys[key] = (time.monotonic() + self.ttl, api_key)
+        self._keys.move_to_end(key)
+
+        while len(self._keys) > self.max_size:
+            self._keys.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None, key_id: Optional[int] = None):
+        """Drop a key by value or id"""
+        if key is not None:
+            self._keys.pop(key, None)
+
+        if key_id is not None:
+            for cached_key, (_, api_key) in list(self._keys.items()):
+                if api_key.id == key_id:
+                    del self._keys[cached_key]
+
+    def clear(self):
+        """Drop every cached key"""
+        self._keys.clear()
+
+    def touch(self, key_id: int):
+        """Record a use, written to the database by the next flush"""
+        self._last_used[key_id] = datetime.utcnow()
+
+    def drain_last_used(self) -> Dict[int, datetime]:
+        """Take the pending last_used_at updates"""
+        pending, self._last_used = self._last_used, {}
+        return pending
+
+    def requeue_last_used(self, pending: Dict[int, datetime]):
+        """Put back updates a flush failed to write, keeping uses recorded since"""
+        for key_id, used_at in pending.items():
+            if key_id not in self._last_used or self._last_used[key_id] < used_at:
+                self._last_used[key_id] = used_at
+
+
+api_key_cache = APIKeyCache(
+    ttl=settings.API_KEY_CACHE_TTL,
+    max_size=settings.API_KEY_CACHE_SIZE
+)
+
+
+# Decoded JWT claims by token digest, kept until the token's exp
+token_cache = ExpiringLRUCache(max_size=settings.TOKEN_CACHE_SIZE)
+
+# Detached users by username; other workers see deactivations within USER_CACHE_TTL
+user_cache = ExpiringLRUCache(max_size=settings.USER_CACHE_SIZE)
+
+
 class AuthService:
     """Service for authentication and authorization"""
 
@@ -42,30 +211,75 @@ class AuthService:
 
     @staticmethod
     def verify_token(token: str) -> Optional[dict]:
-        """Verify JWT token"""
+        """Verify JWT token, served from the claims cache until it expires"""
+        digest = hashlib.sha256(token.encode()).hexdigest()
+
+        payload = token_cache.get(digest)
+        if payload is not None:
+            return payload
+
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            return payload
         except JWTError:
             return None
 
+        if "exp" in payload:
+            token_cache.put(digest, payload, payload["exp"])
+
+        return payload
+
+    @staticmethod
+    async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+        """Get user by username"""
+        result = await db.execute(select(User).where(User.username == username))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+        """Get user by email"""
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
+
+    @staticmethod
+    async def get_cached_user(db: AsyncSession, username: str) -> Optional[User]:
+        """Get user by username, served from the user cache while it is fresh"""
+        user = user_cache.get(username)
+        if user is not None:
+            return user
+
+        user = await AuthService.get_user_by_username(db, username)
+        if user:
+            # Detach so the cached user outlives this session
+            db.expunge(user)
+            user_cache.put(username, user, time.time() + settings.USER_CACHE_TTL)
+
+        return user
+
+    @staticmethod
+    async def deactivate_user(db: AsyncSession, user: User):
+        """Deactivate a user and drop them from the user cache"""
+        await db.execute(update(User).where(User.id == user.id).values(is_active=0))
+        await db.commit()
+
+        user_cache.invalidate(user.username)
+
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
         """Authenticate user"""
-        user = db.query(User).filter(User.username == username).first()
+        user = await AuthService.get_user_by_username(db, username)
 
         if not user:
             return None
 
-        if not AuthService.verify_password(password, user.hashed_password):
+        if not await auth_pool.run(AuthService.verify_password, password, user.hashed_password):
             return None
 
         return user
 
     @staticmethod
-    def create_user(db: Session, username: str, email: str, password: str) -> User:
+    async def create_user(db: AsyncSession, username: str, email: str, password: str) -> User:
         """Create new user"""
-        hashed_password = AuthService.get_password_hash(password)
+        hashed_password = await auth_pool.run(AuthService.get_password_hash, password)
 
         user = User(
             username=username,
@@ -74,13 +288,18 @@ class AuthService:
         )
 
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
         return user
 
     @staticmethod
-    def create_api_key(db: Session, user_id: int, name: str = None, rate_limit: int = 100) -> APIKey:
+    async def create_api_key(
+        db: AsyncSession,
+        user_id: int,
+        name: str = None,
+        rate_limit: int = 100
+    ) -> APIKey:
         """Create new API key"""
         key = f"sk_{secrets.token_urlsafe(32)}"
 
@@ -92,26 +311,93 @@ class AuthService:
         )
 
         db.add(api_key)
-        db.commit()
-        db.refresh(api_key)
+        await db.commit()
+        await db.refresh(api_key)
 
         return api_key
 
     @staticmethod
-    def verify_api_key(db: Session, api_key: str) -> Optional[APIKey]:
-        """Verify API key"""
-        key = db.query(APIKey).filter(
-            APIKey.key == api_key,
-            APIKey.is_active == 1
-        ).first()
+    async def verify_api_key(db: AsyncSession, api_key: str) -> Optional[APIKey]:
+        """Verify API key, served from the cache while it is fresh"""
+        key = api_key_cache.get(api_key)
+
+        if key is None:
+            result = await db.execute(
+                select(APIKey).where(
+                    APIKey.key == api_key,
+                    APIKey.is_active == 1
+                )
+            )
+            key = result.scalars().first()
+
+            if not key:
+                return None
+
+            # Detach so the cached key outlives this session
+            db.expunge(key)
+            api_key_cache.put(api_key, key)
+
+        # Update last used, written in bulk by the flusher
+        api_key_cache.touch(key.id)
+
+        return key
+
+    @staticmethod
+    async def revoke_api_key(db: AsyncSession, user_id: int, key_id: int) -> Optional[APIKey]:
+        """Deactivate a user's API key"""
+        result = await db.execute(
+            select(APIKey).where(
+                APIKey.id == key_id,
+                APIKey.user_id == user_id
+            )
+        )
+        key = result.scalars().first()
 
         if key:
-            # Update last used
-            key.last_used_at = datetime.utcnow()
-            db.commit()
+            key.is_active = 0
+            await db.commit()
+            api_key_cache.invalidate(key=key.key, key_id=key.id)
 
         return key
 
+    @staticmethod
+    async def flush_last_used(db: AsyncSession) -> int:
+        """Write pending last_used_at updates in one bulk UPDATE"""
+        pending = api_key_cache.drain_last_used()
+        if not pending:
+            return 0
+
+        try:
+            await db.execute(
+                update(APIKey),
+                [{"id": key_id, "last_used_at": used_at} for key_id, used_at in pending.items()]
+            )
+            await db.commit()
+        except BaseException:
+            # Retried by the next flush
+            api_key_cache.requeue_last_used(pending)
+            raise
+
+        return len(pending)
+
+    @staticmethod
+    async def run_last_used_flusher(interval: Optional[int] = None):
+        """Flush last_used_at updates every few seconds until cancelled"""
+        interval = interval or settings.API_KEY_FLUSH_INTERVAL
+
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    async with AsyncSessionLocal() as db:
+                        await AuthService.flush_last_used(db)
+                except Exception as e:
+                    logger.error(f"Failed to flush API key usage: {e}")
+        finally:
+            # Final flush on shutdown
+            async with AsyncSessionLocal() as db:
+                await AuthService.flush_last_used(db)
+
 
 # Global instance
 auth_service = AuthService()
@@ -0,0 +1,172 @@
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.inference_scheduler import percentile
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fewest request latencies behind an adjustment
+MIN_SAMPLES = 20
+
+# Decisions kept for the debug endpoint
+DECISION_LOG = 50
+
+# p95 below target * (1 - HEADROOM) leaves room to batch more
+HEADROOM = 0.2
+
+BATCH_STEP = 4
+WAIT_STEP = 0.002
+
+
+class BatchTuner:
+    """
+    Control loop over the transformer batch size and batching wait window.
+
+    Batches report their size, latency, the latencies of their requests
+    and the queue depth when they were flushed. Every interval, the p95
+    request latency is compared with the target: above it, the batch size
+    and wait window are halved, unless the batches themselves run within
+    the target and calls queue behind them. That latency is queueing,
+    which smaller batches would only make worse under overload, so the
+    batch size then grows while batches leave headroom and holds
+    otherwise. Well below the target, batches grow by BATCH_STEP while
+    they fill up or calls queue behind them, and the wait window grows by
+    WAIT_STEP while batches are partly filled, or shrinks when requests
+    arrive one at a time and waiting gains nothing. Both stay within the
+    configured bounds.
+    """
+
+    def __init__(
+        self,
+        target_p95: Optional[float] = None,
+        min_batch: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        max_wait: Optional[float] = None,
+        interval: Optional[float] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.target_p95 = target_p95 or settings.BATCH_TUNER_TARGET_P95_MS / 1000
+        self.min_batch = min_batch or settings.BATCH_TUNER_MIN_BATCH
+        self.max_batch = max_batch or settings.BATCH_TUNER_MAX_BATCH
+        self.max_wait_bound = (
+            settings.BATCH_TUNER_MAX_WAIT_MS / 1000 if max_wait is None else max_wait
+        )
+        self.interval = settings.BATCH_TUNER_INTERVAL if interval is None else interval
+        self.enabled = settings.BATCH_TUNER_ENABLED if enabled is None else enabled
+
+        self.batch_size = min(max(settings.MODEL_BATCH_SIZE, self.min_batch), self.max_batch)
+        self.max_wait = min(settings.MODEL_BATCH_WAIT_MS / 1000, self.max_wait_bound)
+
+        # Observations since the last adjustment
+        self.latencies: List[float] = []
+        self.batches: List[Tuple[int, float]] = []
+        self.queue_depths: List[int] = []
+        self.last_adjusted = time.monotonic()
+
+        self.decisions: Deque[Dict] = deque(maxlen=DECISION_LOG)
+        self.adjustments = 0
+
+    def observe(
+        self,
+        size: int,
+        seconds: float,
+        latencies: List[float],
+        queue_depth: int
+    ) -> Optional[Dict]:
+        """Record a finished batch, adjusting once the interval has passed"""
+        self.batches.append((size, seconds))
+        self.latencies.extend(latencies)
+        self.queue_depths.append(queue_depth)
+
+        due = time.monotonic() - self.last_adjusted >= self.interval
+        if due and len(self.latencies) >= MIN_SAMPLES:
+            return self.adjust()
+        return None
+
+    def adjust(self) -> Dict:
+        """Move the batch size and wait window toward the target p95"""
+        p95 = percentile(self.latencies, 95)
+        sizes = [size for size, _ in self.batches]
+        mean_size = sum(sizes) / len(sizes)
+        fill = mean_size / self.batch_size
+        queue_depth = sum(self.queue_depths) / len(self.queue_depths)
+
+        batch_p95 = percentile([seconds for _, seconds in self.batches], 95)
+        queueing = queue_depth >= 1 and batch_p95 <= self.target_p95
+
+        batch_size, max_wait = self.batch_size, self.max_wait
+        if p95 > self.target_p95 and queueing:
+            # The batches themselves are fast enough, smaller ones would only drain the queue slower
+            if batch_p95 <= self.target_p95 * (1 - HEADROOM):
+                action, reason = "increase_batch", "p95 above target from queueing"
+                batch_size += BATCH_STEP
+            else:
+                action, reason = "hold", "p95 above target from queueing"
+        elif p95 > self.target_p95:
+            action, reason = "decrease", "p95 above target"
+            batch_size = batch_size // 2
+            max_wait = max_wait / 2
+        elif p95 > self.target_p95 * (1 - HEADROOM):
+            action, reason = "hold", "p95 near target"
+        elif fill >= 0.9 or queue_depth >= 1:
+            action, reason = "increase_batch", "batches full or calls queued"
+            batch_size += BATCH_STEP
+        elif mean_size > 1:
+            action, reason = "increase_wait", "batches partly filled"
+            max_wait += WAIT_STEP
+        else:
+            action, reason = "decrease_wait", "requests arrive one at a time"
+            max_wait = max_wait / 2
+
+        decision = {
+            "at": datetime.utcnow().isoformat(),
+            "action": action if self.enabled else "observe",
+            "reason": reason,
+            "p95_ms": p95 * 1000,
+            "batch_p95_ms": batch_p95 * 1000,
+            "mean_batch": mean_size,
+            "queue_depth": queue_depth,
+            "samples": len(self.latencies)
+        }
+
+        if self.enabled:
+            self.batch_size = min(max(batch_size, self.min_batch), self.max_batch)
+            # Sub-millisecond windows only add a timer hop
+            self.max_wait = min(max_wait, self.max_wait_bound) if max_wait >= 0.0005 else 0.0
+            if action != "hold":
+                self.adjustments += 1
+                logger.info(
+                    f"Batch tuner {action} ({reason}): batch size {self.batch_size}, "
+                    f"wait {self.max_wait * 1000:.1f}ms, p95 {p95 * 1000:.0f}ms"
+                )
+        decision.update(batch_size=self.batch_size, max_wait_ms=self.max_wait * 1000)
+        self.decisions.append(decision)
+
+        self.latencies, self.batches, self.queue_depths = [], [], []
+        self.last_adjusted = time.monotonic()
+        return decision
+
+    def stats(self) -> Dict:
+        """Current settings, bounds and recent decisions"""
+        return {
+            "enabled": self.enabled,
+            "batch_size": self.batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "target_p95_ms": self.target_p95 * 1000,
+            "bounds": {
+                "min_batch": self.min_batch,
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait_bound * 1000
+            },
+            "interval_seconds": self.interval,
+            "adjustments": self.adjustments,
+            "pending_samples": len(self.latencies),
+            "decisions": list(reversed(self.decisions))
+        }
+
+
+# Global instance
+batch_tuner = BatchTuner()
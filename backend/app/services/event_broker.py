@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Set
+from app.core.config import settings
+import asyncio
+import itertools
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def format_sse(event: Dict) -> str:
+    """Encode an event as a Server-Sent Events message"""
+    data = json.dumps(event["data"], default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
+
+
+class EventBroker:
+    """
+    In-process fan-out of events to subscribers by topic.
+
+    Producers publish each update once, whatever the number of listeners.
+    Every subscriber has a bounded queue; a slow one loses its oldest
+    events instead of holding memory or blocking the producer.
+    """
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.EVENT_QUEUE_SIZE
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._ids = itertools.count(1)
+        self.metrics = {"published": 0, "delivered": 0, "dropped": 0}
+
+    def publish(self, topic: str, event: str, data: Any) -> Dict:
+        """Send an event to every subscriber of topic"""
+        message = {"id": next(self._ids), "event": event, "data": data}
+        self.metrics["published"] += 1
+
+        for queue in self._subscribers.get(topic, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.metrics["dropped"] += 1
+            queue.put_nowait(message)
+            self.metrics["delivered"] += 1
+
+        return message
+
+    @contextmanager
+    def subscribe(self, topic: str) -> Iterator[asyncio.Queue]:
+        """Queue receiving the events published to topic while the context is open"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(topic, set()).add(queue)
+
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[topic]
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._subscribers.get(topic, ()))
+
+    def stats(self) -> dict:
+        """Topic, subscriber and delivery counters"""
+        return {
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            **self.metrics,
+        }
+
+
+# Global instance
+event_broker = EventBroker()
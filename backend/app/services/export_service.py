@@ -1,40 +1,233 @@
 import csv
+import io
 import json
+import zlib
 from io import StringIO, BytesIO
-from typing import List, Dict
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib import colors
+from typing import List, Dict, AsyncIterator
 from datetime import datetime
-import pandas as pd
+import asyncio
+import os
+import tempfile
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+# Excel's worksheet row limit, header included
+EXCEL_MAX_ROWS = 1048576
+
+# Label-like columns stored as dictionary (categorical) columns in columnar exports
+CATEGORICAL_FIELDS = ['analysis_type', 'sentiment_label', 'emotion_label', 'language', 'model_used']
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a stream"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Writers record offsets, so report the total written, not the buffered size
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+# Columns written by the tabular exports
+EXPORT_FIELDS = [
+    'id', 'text', 'analysis_type',
+    'sentiment_label', 'sentiment_confidence',
+    'sentiment_positive', 'sentiment_negative', 'sentiment_neutral',
+    'emotion_label', 'emotion_confidence',
+    'language', 'model_used', 'created_at', 'processing_time'
+]
 
 
 class ExportService:
     """Service for exporting analysis results"""
 
     @staticmethod
-    def export_to_csv(data: List[Dict]) -> str:
-        """Export data to CSV format"""
-        if not data:
-            return ""
-
-        output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=data[0].keys())
+    async def stream_csv(batches: AsyncIterator[List]) -> AsyncIterator[bytes]:
+        """Stream analyses batches as CSV, one chunk per batch"""
+        buffer = StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
         writer.writeheader()
-        writer.writerows(data)
+        yield buffer.getvalue().encode()
+
+        async for batch in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(ExportService.analysis_to_dict(analysis) for analysis in batch)
+            yield buffer.getvalue().encode()
+
+    @staticmethod
+    async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Compress a byte stream into a gzip stream on the fly"""
+        compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+
+        async for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+
+        yield compressor.flush()
+
+    @staticmethod
+    def encode_json(row: Dict) -> bytes:
+        """Encode a single row, with orjson when it is installed"""
+        if orjson is not None:
+            return orjson.dumps(row, default=str)
+        return json.dumps(row, default=str, separators=(',', ':')).encode()
+
+    @staticmethod
+    async def stream_json(
+        batches: AsyncIterator[List],
+        ndjson: bool = False
+    ) -> AsyncIterator[bytes]:
+        """Stream analyses batches as a JSON array or as NDJSON, encoding row by row"""
+        encode = ExportService.encode_json
+        first = True
+
+        if not ndjson:
+            yield b"["
+
+        async for batch in batches:
+            if not batch:
+                continue
+
+            rows = [encode(ExportService.analysis_to_dict(analysis)) for analysis in batch]
+
+            if ndjson:
+                yield b"\n".join(rows) + b"\n"
+            else:
+                chunk = b",".join(rows)
+                yield chunk if first else b"," + chunk
+
+            first = False
 
-        return output.getvalue()
+        if not ndjson:
+            yield b"]"
 
     @staticmethod
-    def export_to_json(data: List[Dict]) -> str:
-        """Export data to JSON format"""
-        return json.dumps(data, indent=2, default=str)
+    def arrow_schema():
+        """Typed Arrow schema for columnar exports"""
+        import pyarrow as pa
+
+        category = pa.dictionary(pa.int32(), pa.string())
+
+        return pa.schema([
+            ('id', pa.int64()),
+            ('text', pa.string()),
+            ('analysis_type', category),
+            ('sentiment_label', category),
+            ('sentiment_confidence', pa.float64()),
+            ('sentiment_positive', pa.float64()),
+            ('sentiment_negative', pa.float64()),
+            ('sentiment_neutral', pa.float64()),
+            ('emotion_label', category),
+            ('emotion_confidence', pa.float64()),
+            ('language', category),
+            ('model_used', category),
+            ('created_at', pa.timestamp('us')),
+            ('processing_time', pa.float64())
+        ])
+
+    @staticmethod
+    def to_record_batch(analyses: List, schema):
+        """Convert analysis records to an Arrow record batch"""
+        import pyarrow as pa
+
+        columns = []
+        for field in schema:
+            values = [getattr(analysis, field.name) for analysis in analyses]
+
+            if field.name in CATEGORICAL_FIELDS:
+                columns.append(pa.array(values, type=pa.string()).dictionary_encode())
+            else:
+                columns.append(pa.array(values, type=field.type))
+
+        return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+    @staticmethod
+    async def stream_columnar(
+        batches: AsyncIterator[List],
+        format: str = "parquet",
+        row_group_size: int = 50000
+    ) -> AsyncIterator[bytes]:
+        """Stream analyses batches as Parquet, in row groups of row_group_size, or as Arrow IPC"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = ExportService.arrow_schema()
+        sink = ChunkSink()
+
+        if format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            # The IPC stream format allows each batch to carry its own dictionaries
+            writer = pa.ipc.new_stream(
+                sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")
+            )
+
+        pending = []
+        pending_rows = 0
+
+        def flush():
+            if format == "parquet":
+                writer.write_table(pa.Table.from_batches(pending, schema=schema))
+            else:
+                for record_batch in pending:
+                    writer.write_batch(record_batch)
+
+        try:
+            async for batch in batches:
+                if not batch:
+                    continue
+
+                pending.append(ExportService.to_record_batch(batch, schema))
+                pending_rows += len(batch)
+
+                if format != "parquet" or pending_rows >= row_group_size:
+                    flush()
+                    pending, pending_rows = [], 0
+
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+            if pending:
+                flush()
+        finally:
+            writer.close()
+
+        yield sink.drain()
 
     @staticmethod
     def export_to_pdf(data: List[Dict], title: str = "Sentiment Analysis Report") -> bytes:
         """Export data to PDF format"""
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import inch
+        from reportlab.platypus import (
+            SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+        )
+
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
 
@@ -54,6 +247,18 @@ class ExportService:
         heading_style = styles['Heading2']
         normal_style = styles['Normal']
 
+        # Shared by every per-item table
+        item_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ])
+
         # Title
         elements.append(Paragraph(title, title_style))
         elements.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style))
@@ -122,16 +327,7 @@ class ExportService:
 
                 if item_data:
                     item_table = Table(item_data, colWidths=[1.5*inch, 5*inch])
-                    item_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-                        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 10),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
+                    item_table.setStyle(item_table_style)
                     elements.append(item_table)
 
                 elements.append(Spacer(1, 0.2*inch))
@@ -142,44 +338,88 @@ class ExportService:
         return buffer.getvalue()
 
     @staticmethod
-    def export_to_excel(data: List[Dict]) -> bytes:
-        """Export data to Excel format"""
-        if not data:
-            return b""
+    def render_pdf_to_file(
+        data: List[Dict],
+        path: str,
+        title: str = "Sentiment Analysis Report"
+    ) -> str:
+        """Render a PDF report to path atomically, used by background report workers"""
+        pdf_content = ExportService.export_to_pdf(data, title=title)
 
-        df = pd.DataFrame(data)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pdf_content)
+        os.replace(tmp_path, path)
 
-        buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Analysis Results')
+        return path
 
-        return buffer.getvalue()
+    @staticmethod
+    async def stream_excel(
+        batches: AsyncIterator[List],
+        max_rows_per_sheet: int = EXCEL_MAX_ROWS,
+        chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[bytes]:
+        """Write analyses batches to a write-only workbook, then stream the file"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = None
+        sheet_rows = 0
+
+        async for batch in batches:
+            for analysis in batch:
+                if sheet is None or sheet_rows >= max_rows_per_sheet:
+                    # Split across sheets at Excel's row limit
+                    title = "Analysis Results"
+                    if sheet is not None:
+                        title += f" {len(workbook.worksheets) + 1}"
+                    sheet = workbook.create_sheet(title)
+                    sheet.append(EXPORT_FIELDS)
+                    sheet_rows = 1
+
+                row = ExportService.analysis_to_dict(analysis)
+                row['created_at'] = analysis.created_at
+                sheet.append([row[field] for field in EXPORT_FIELDS])
+                sheet_rows += 1
+
+        if sheet is None:
+            workbook.create_sheet("Analysis Results").append(EXPORT_FIELDS)
+
+        # Rows are already spooled to disk, only the zip container is written here
+        with tempfile.TemporaryFile() as output:
+            await asyncio.to_thread(workbook.save, output)
+            output.seek(0)
+
+            while True:
+                chunk = output.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    @staticmethod
+    def analysis_to_dict(analysis) -> Dict:
+        """Convert an analysis record to an export row"""
+        return {
+            'id': analysis.id,
+            'text': analysis.text,
+            'analysis_type': analysis.analysis_type,
+            'sentiment_label': analysis.sentiment_label,
+            'sentiment_confidence': analysis.sentiment_confidence,
+            'sentiment_positive': analysis.sentiment_positive,
+            'sentiment_negative': analysis.sentiment_negative,
+            'sentiment_neutral': analysis.sentiment_neutral,
+            'emotion_label': analysis.emotion_label,
+            'emotion_confidence': analysis.emotion_confidence,
+            'language': analysis.language,
+            'model_used': analysis.model_used,
+            'created_at': analysis.created_at.isoformat() if analysis.created_at else None,
+            'processing_time': analysis.processing_time
+        }
 
     @staticmethod
     def prepare_export_data(analyses: List) -> List[Dict]:
         """Prepare analysis data for export"""
-        export_data = []
-
-        for analysis in analyses:
-            data = {
-                'id': analysis.id,
-                'text': analysis.text,
-                'analysis_type': analysis.analysis_type,
-                'sentiment_label': analysis.sentiment_label,
-                'sentiment_confidence': analysis.sentiment_confidence,
-                'sentiment_positive': analysis.sentiment_positive,
-                'sentiment_negative': analysis.sentiment_negative,
-                'sentiment_neutral': analysis.sentiment_neutral,
-                'emotion_label': analysis.emotion_label,
-                'emotion_confidence': analysis.emotion_confidence,
-                'language': analysis.language,
-                'model_used': analysis.model_used,
-                'created_at': analysis.created_at.isoformat() if analysis.created_at else None,
-                'processing_time': analysis.processing_time
-            }
-            export_data.append(data)
-
-        return export_data
+        return [ExportService.analysis_to_dict(analysis) for analysis in analyses]
 
 
 # Global instance
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
+from typing import Optional, List, AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, desc
 from app.models.database import Analysis, TrendData, User
 import hashlib
 import json
@@ -11,8 +11,8 @@ class HistoryService:
     """Service for managing analysis history and trends"""
 
     @staticmethod
-    def create_analysis_record(
-        db: Session,
+    async def create_analysis_record(
+        db: AsyncSession,
         text: str,
         analysis_type: str,
         sentiment_result: dict = None,
@@ -57,14 +57,14 @@ class HistoryService:
             analysis.emotion_scores = emotion_result.get('scores')
 
         db.add(analysis)
-        db.commit()
-        db.refresh(analysis)
+        await db.commit()
+        await db.refresh(analysis)
 
         return analysis
 
     @staticmethod
-    def get_user_history(
-        db: Session,
+    async def get_user_history(
+        db: AsyncSession,
         user_id: int,
         limit: int = 50,
         offset: int = 0,
@@ -72,16 +72,19 @@ class HistoryService:
     ) -> List[Analysis]:
         """Get user's analysis history"""
 
-        query = db.query(Analysis).filter(Analysis.user_id == user_id)
+        query = select(Analysis).where(Analysis.user_id == user_id)
 
         if analysis_type:
-            query = query.filter(Analysis.analysis_type == analysis_type)
+            query = query.where(Analysis.analysis_type == analysis_type)
 
-        return query.order_by(desc(Analysis.created_at)).offset(offset).limit(limit).all()
+        query = query.order_by(desc(Analysis.created_at)).offset(offset).limit(limit)
+
+        result = await db.execute(query)
+        return list(result.scalars().all())
 
     @staticmethod
-    def get_recent_analyses(
-        db: Session,
+    async def get_recent_analyses(
+        db: AsyncSession,
         limit: int = 100,
         hours: int = 24
     ) -> List[Analysis]:
@@ -89,13 +92,38 @@ class HistoryService:
 
         since = datetime.utcnow() - timedelta(hours=hours)
 
-        return db.query(Analysis).filter(
-            Analysis.created_at >= since
-        ).order_by(desc(Analysis.created_at)).limit(limit).all()
+        result = await db.execute(
+            select(Analysis).where(
+                Analysis.created_at >= since
+            ).order_by(desc(Analysis.created_at)).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def stream_analyses(
+        db: AsyncSession,
+        hours: int = 24,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Analysis]]:
+        """Stream recent analyses in batches through a server-side cursor"""
+
+        since = datetime.utcnow() - timedelta(hours=hours)
+
+        result = await db.stream(
+            select(Analysis).where(
+                Analysis.created_at >= since
+            ).order_by(desc(Analysis.created_at)).execution_options(yield_per=batch_size)
+        )
+
+        async for batch in result.scalars().partitions():
+            yield batch
+            # Keep the identity map from growing with the export
+            for analysis in batch:
+                db.expunge(analysis)
 
     @staticmethod
-    def get_sentiment_stats(
-        db: Session,
+    async def get_sentiment_stats(
+        db: AsyncSession,
         user_id: Optional[int] = None,
         days: int = 7
     ) -> dict:
@@ -103,15 +131,15 @@ class HistoryService:
 
         since = datetime.utcnow() - timedelta(days=days)
 
-        query = db.query(Analysis).filter(
+        query = select(Analysis).where(
             Analysis.created_at >= since,
             Analysis.sentiment_label.isnot(None)
         )
 
         if user_id:
-            query = query.filter(Analysis.user_id == user_id)
+            query = query.where(Analysis.user_id == user_id)
 
-        analyses = query.all()
+        analyses = (await db.execute(query)).scalars().all()
 
         if not analyses:
             return {
@@ -137,8 +165,8 @@ class HistoryService:
         }
 
     @staticmethod
-    def update_trend_data(
-        db: Session,
+    async def update_trend_data(
+        db: AsyncSession,
         keyword: Optional[str] = None,
         date: Optional[datetime] = None
     ):
@@ -150,7 +178,7 @@ class HistoryService:
         # Get analyses for the date
         next_date = date + timedelta(days=1)
 
-        query = db.query(Analysis).filter(
+        query = select(Analysis).where(
             and_(
                 Analysis.created_at >= date,
                 Analysis.created_at < next_date
@@ -159,9 +187,9 @@ class HistoryService:
 
         if keyword:
             # Filter by keyword in text (simple approach)
-            query = query.filter(Analysis.text.contains(keyword))
+            query = query.where(Analysis.text.contains(keyword))
 
-        analyses = query.all()
+        analyses = (await db.execute(query)).scalars().all()
 
         if not analyses:
             return None
@@ -183,12 +211,14 @@ class HistoryService:
                 emotions[a.emotion_label] = emotions.get(a.emotion_label, 0) + 1
 
         # Create or update trend record
-        trend = db.query(TrendData).filter(
-            and_(
-                TrendData.date == date,
-                TrendData.keyword == keyword
+        trend = (await db.execute(
+            select(TrendData).where(
+                and_(
+                    TrendData.date == date,
+                    TrendData.keyword == keyword
+                )
             )
-        ).first()
+        )).scalars().first()
 
         if trend:
             trend.total_analyses = total
@@ -214,14 +244,14 @@ class HistoryService:
             )
             db.add(trend)
 
-        db.commit()
-        db.refresh(trend)
+        await db.commit()
+        await db.refresh(trend)
 
         return trend
 
     @staticmethod
-    def get_trend_data(
-        db: Session,
+    async def get_trend_data(
+        db: AsyncSession,
         days: int = 30,
         keyword: Optional[str] = None
     ) -> List[TrendData]:
@@ -229,12 +259,13 @@ class HistoryService:
 
         since = datetime.utcnow() - timedelta(days=days)
 
-        query = db.query(TrendData).filter(TrendData.date >= since)
+        query = select(TrendData).where(TrendData.date >= since)
 
         if keyword:
-            query = query.filter(TrendData.keyword == keyword)
+            query = query.where(TrendData.keyword == keyword)
 
-        return query.order_by(TrendData.date).all()
+        result = await db.execute(query.order_by(TrendData.date))
+        return list(result.scalars().all())
 
 
 # Global instance
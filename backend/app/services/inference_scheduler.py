@@ -0,0 +1,284 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Deque, Dict, Optional
+from app.core.config import settings
+from app.models.schemas import Priority
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Recent latencies kept per class for the percentiles
+LATENCY_WINDOW = 1000
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a call waited past its deadline and was dropped before running"""
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client of a call went away before it ran"""
+
+
+def percentile(values, q: float) -> Optional[float]:
+    """q-th percentile (0-100) of values by nearest rank, None when empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+async def gather_or_cancel(*aws):
+    """
+    Results of aws, in order, like asyncio.gather.
+
+    The first error is raised and cancels the calls still waiting or
+    running, so a dropped chunk does not leave its siblings holding workers.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+class _Call:
+    __slots__ = ("priority", "deadline", "start_tag", "finish_tag", "submitted", "granted")
+
+    def __init__(
+        self,
+        priority: Priority,
+        deadline: float,
+        start_tag: float,
+        finish_tag: float,
+        granted: asyncio.Future
+    ):
+        self.priority = priority
+        self.deadline = deadline
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.submitted = time.monotonic()
+        self.granted = granted
+
+
+class InferenceScheduler:
+    """
+    Weighted-fair scheduling of model calls across priority classes.
+
+    At most max_workers calls run at once, on the scheduler's own threads.
+    Waiting calls queue per priority class, in arrival order, and are
+    stamped on arrival with a virtual finish time, cost / weight past the
+    class's previous call (start-time fair queuing). When a worker frees
+    up, the waiting call with the lowest finish time runs. A class gets
+    its weight's share of the model time when all classes are busy, and
+    an idle class banks no credit. A call is dropped without running once
+    its deadline has passed or its client has disconnected.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        weights: Optional[Dict[Priority, int]] = None,
+        deadlines: Optional[Dict[Priority, float]] = None
+    ):
+        self.max_workers = max_workers or settings.INFERENCE_WORKERS
+        self.weights = weights or {
+            Priority.INTERACTIVE: settings.INFERENCE_WEIGHT_INTERACTIVE,
+            Priority.BATCH: settings.INFERENCE_WEIGHT_BATCH,
+            Priority.BACKGROUND: settings.INFERENCE_WEIGHT_BACKGROUND
+        }
+        self.deadlines = deadlines or {
+            Priority.INTERACTIVE: settings.INFERENCE_DEADLINE_INTERACTIVE,
+            Priority.BATCH: settings.INFERENCE_DEADLINE_BATCH,
+            Priority.BACKGROUND: settings.INFERENCE_DEADLINE_BACKGROUND
+        }
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference"
+        )
+
+        self.queues: Dict[Priority, Deque[_Call]] = {priority: deque() for priority in Priority}
+        self.finish_tags: Dict[Priority, float] = dict.fromkeys(Priority, 0.0)
+        self.virtual_time = 0.0
+        self.running = 0
+
+        self.metrics = {
+            priority: {
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "expired": 0,
+                "disconnected": 0,
+                "cancelled": 0,
+                "running": 0
+            }
+            for priority in Priority
+        }
+        self.waits: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=LATENCY_WINDOW) for priority in Priority
+        }
+        self.latencies: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=LATENCY_WINDOW) for priority in Priority
+        }
+
+    async def run(
+        self,
+        priority: Priority,
+        func: Callable,
+        *args,
+        cost: int = 1,
+        deadline: Optional[float] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ):
+        """
+        Run func(*args) on a worker once the scheduler picks it.
+
+        cost is the call's share of model time, usually its number of
+        texts. deadline is a time.monotonic() timestamp, the class
+        deadline from now by default. Raises DeadlineExceededError or
+        ClientDisconnectedError when the call is dropped.
+        """
+        loop = asyncio.get_running_loop()
+        metrics = self.metrics[priority]
+        start_tag = max(self.finish_tags[priority], self.virtual_time)
+        self.finish_tags[priority] = start_tag + max(cost, 1) / self.weights[priority]
+        call = _Call(
+            priority,
+            deadline if deadline is not None else time.monotonic() + self.deadlines[priority],
+            start_tag,
+            self.finish_tags[priority],
+            loop.create_future()
+        )
+
+        metrics["submitted"] += 1
+        self.queues[priority].append(call)
+        self._dispatch()
+
+        try:
+            await call.granted
+        except asyncio.CancelledError:
+            # Only a granted worker is released, an expired call never took one
+            granted = call.granted
+            if granted.done() and not granted.cancelled() and granted.exception() is None:
+                self._release(priority)
+            else:
+                self._forget(call)
+            metrics["cancelled"] += 1
+            raise
+
+        self.waits[priority].append(time.monotonic() - call.submitted)
+
+        try:
+            if is_disconnected is not None and await is_disconnected():
+                metrics["disconnected"] += 1
+                raise ClientDisconnectedError("Client disconnected before the analysis ran")
+            future = self.executor.submit(func, *args)
+        except BaseException:
+            self._release(priority)
+            raise
+
+        # The worker is held until the thread finishes, even when the caller stops waiting
+        future.add_done_callback(lambda _: self._release_threadsafe(loop, priority))
+
+        try:
+            result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            metrics["cancelled"] += 1
+            raise
+        except Exception:
+            metrics["failed"] += 1
+            raise
+
+        metrics["completed"] += 1
+        self.latencies[priority].append(time.monotonic() - call.submitted)
+        return result
+
+    def _next(self) -> Optional[_Call]:
+        """Pop the waiting call with the lowest virtual finish tag"""
+        best = None
+        for queue in self.queues.values():
+            # Callers cancelled while queued leave their call behind
+            while queue and queue[0].granted.done():
+                queue.popleft()
+            if queue and (best is None or queue[0].finish_tag < best[0].finish_tag):
+                best = queue
+
+        if best is None:
+            return None
+
+        call = best.popleft()
+        # Virtual time follows the calls being served
+        self.virtual_time = max(self.virtual_time, call.start_tag)
+        return call
+
+    def _dispatch(self):
+        """Grant free workers to the next calls, dropping the expired ones"""
+        while self.running < self.max_workers:
+            call = self._next()
+            if call is None:
+                return
+
+            if time.monotonic() >= call.deadline:
+                self.metrics[call.priority]["expired"] += 1
+                call.granted.set_exception(DeadlineExceededError(
+                    f"Analysis waited {time.monotonic() - call.submitted:.1f}s "
+                    "and passed its deadline"
+                ))
+                continue
+
+            self.running += 1
+            self.metrics[call.priority]["running"] += 1
+            call.granted.set_result(None)
+
+    def _release(self, priority: Priority):
+        self.running -= 1
+        self.metrics[priority]["running"] -= 1
+        self._dispatch()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, priority: Priority):
+        try:
+            loop.call_soon_threadsafe(self._release, priority)
+        except RuntimeError:
+            # The loop is closed, nothing is left to dispatch
+            pass
+
+    def _forget(self, call: _Call):
+        try:
+            self.queues[call.priority].remove(call)
+        except ValueError:
+            pass
+
+        # Uncharge the class for a call that never ran, unless later calls were stamped after it
+        if self.finish_tags[call.priority] == call.finish_tag:
+            self.finish_tags[call.priority] = call.start_tag
+
+    def queued(self, priority: Priority) -> int:
+        """Calls of a class waiting for a worker"""
+        return sum(not call.granted.done() for call in self.queues[priority])
+
+    def stats(self) -> Dict:
+        """Queue depth, counters and latency percentiles of each class"""
+        def ms(values, q):
+            value = percentile(values, q)
+            return None if value is None else value * 1000
+
+        classes = {}
+        for priority in Priority:
+            classes[priority.value] = {
+                "weight": self.weights[priority],
+                "deadline_seconds": self.deadlines[priority],
+                "queued": self.queued(priority),
+                **self.metrics[priority],
+                **{f"wait_p{q}_ms": ms(self.waits[priority], q) for q in (50, 95, 99)},
+                **{f"latency_p{q}_ms": ms(self.latencies[priority], q) for q in (50, 95, 99)}
+            }
+        return {"workers": self.max_workers, "running": self.running, "classes": classes}
+
+    def shutdown(self):
+        """Stop the worker threads once the running calls finish"""
+        self.executor.shutdown(wait=False)
+
+
+# Global instance
+inference_scheduler = InferenceScheduler()
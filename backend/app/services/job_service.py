@@ -0,0 +1,199 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.models.schemas import Priority
+from app.services.event_broker import EventBroker, event_broker
+from app.services.inference_scheduler import inference_scheduler
+import asyncio
+import logging
+import secrets
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = ("done", "error")
+
+
+class Job:
+    """A background analysis whose progress is published to its topic"""
+
+    def __init__(self, kind: str, total: int):
+        self.id = secrets.token_urlsafe(12)
+        self.kind = kind
+        self.total = total
+        self.status = "running"
+        self.completed = 0
+        self.results: List[Dict] = []
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def topic(self) -> str:
+        return f"job:{self.id}"
+
+    def progress(self) -> Dict:
+        return {"status": self.status, "completed": self.completed, "total": self.total}
+
+    def snapshot(self) -> Dict:
+        """Current state, including the results produced so far"""
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            **self.progress(),
+            "created_at": self.created_at.isoformat(),
+            "results": self.results,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobService:
+    """Runs analysis jobs in the background and publishes their results as they come"""
+
+    def __init__(
+        self,
+        broker: Optional[EventBroker] = None,
+        max_jobs: Optional[int] = None,
+        analyze_batch: Optional[Callable] = None
+    ):
+        self.broker = broker or event_broker
+        self.max_jobs = max_jobs or settings.JOB_MAX
+        self.analyze_batch = analyze_batch
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def publish(self, job: Job, event: str, data: Any):
+        self.broker.publish(job.topic, event, data)
+
+    def start(self, kind: str, total: int, runner: Callable[[Job], Awaitable[Dict]]) -> Job:
+        """Run runner(job) in the background, publishing done or error when it ends"""
+        job = Job(kind, total)
+        self.jobs[job.id] = job
+        self._prune()
+
+        job.task = asyncio.create_task(self._run(job, runner))
+        return job
+
+    async def _run(self, job: Job, runner: Callable[[Job], Awaitable[Dict]]):
+        try:
+            job.result = await runner(job)
+            job.status = "done"
+            self.publish(job, "done", {**job.progress(), "result": job.result})
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Cancelled"
+            self.publish(job, "error", {**job.progress(), "error": job.error})
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            self.publish(job, "error", {**job.progress(), "error": job.error})
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_jobs:
+                break
+            if self.jobs[job_id].status != "running":
+                del self.jobs[job_id]
+
+    def start_batch(
+        self,
+        texts: List[str],
+        language: Optional[str] = None,
+        model=None,
+        approximate: bool = False
+    ) -> Job:
+        """Analyze texts in model-sized chunks, publishing each result as it is ready"""
+        analyze = self.analyze_batch
+        if analyze is None:
+            # Imported here so tests can run jobs without the analyzer
+            from app.services.sentiment_analyzer import sentiment_analyzer
+            analyze = sentiment_analyzer.analyze_sentiment_batch
+
+        async def run(job: Job) -> Dict:
+            summary = {"positive": 0, "negative": 0, "neutral": 0}
+            total_confidence = 0.0
+
+            for start in range(0, len(texts), settings.MODEL_BATCH_SIZE):
+                chunk = texts[start:start + settings.MODEL_BATCH_SIZE]
+                # Background work, interactive requests go first
+                results = await inference_scheduler.run(
+                    Priority.BACKGROUND,
+                    analyze,
+                    chunk,
+                    [language] * len(chunk),
+                    model,
+                    approximate,
+                    cost=len(chunk)
+                )
+
+                for offset, result in enumerate(results):
+                    item = result.model_dump(mode="json")
+                    job.results.append(item)
+                    summary[item["label"]] += 1
+                    total_confidence += item["confidence"]
+                    self.publish(job, "item", {"index": start + offset, "result": item})
+
+                job.completed += len(chunk)
+                self.publish(job, "progress", job.progress())
+
+            return {
+                "summary": summary,
+                "average_confidence": total_confidence / len(texts) if texts else 0.0
+            }
+
+        return self.start("batch", len(texts), run)
+
+    def start_twitter(
+        self,
+        query: str,
+        max_results: int,
+        language: Optional[str] = None,
+        on_finish: Optional[Callable[[int], Awaitable[None]]] = None
+    ) -> Job:
+        """
+        Search and analyze tweets, publishing each analyzed page.
+
+        on_finish gets the number of tweets analyzed.
+        """
+        from app.services.twitter_service import twitter_service
+
+        if not twitter_service.fetcher:
+            raise ValueError("Twitter client not initialized. Please configure API credentials.")
+
+        async def run(job: Job) -> Dict:
+            def on_page(tweets: List[Dict]):
+                job.results.extend(tweets)
+                job.completed += len(tweets)
+                self.publish(job, "page", {"tweets": tweets})
+                self.publish(job, "progress", job.progress())
+
+            result = await twitter_service.analyze_tweets(
+                query, max_results, language, on_page=on_page, priority=Priority.BACKGROUND
+            )
+            job.total = result.total_tweets
+            if on_finish:
+                await on_finish(result.total_tweets)
+            return result.model_dump(mode="json", exclude={"tweets"})
+
+        return self.start("twitter", max_results, run)
+
+    async def shutdown(self):
+        """Cancel running jobs"""
+        for job in self.jobs.values():
+            if job.task and not job.task.done():
+                job.task.cancel()
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    pass
+
+
+# Global instance
+job_service = JobService()
@@ -0,0 +1,151 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from app.models.schemas import Priority
+from app.services.batch_tuner import BatchTuner, batch_tuner
+from app.services.inference_scheduler import (
+    InferenceScheduler, ClientDisconnectedError, inference_scheduler
+)
+import asyncio
+import time
+
+
+class _Item:
+    __slots__ = ("payload", "result", "submitted", "is_disconnected")
+
+    def __init__(
+        self,
+        payload: Any,
+        result: asyncio.Future,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]]
+    ):
+        self.payload = payload
+        self.result = result
+        self.submitted = time.monotonic()
+        self.is_disconnected = is_disconnected
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text model calls into batched ones.
+
+    The first call of a group waits up to the tuner's max_wait for others
+    to join; the group is flushed early once it reaches the tuner's batch
+    size. Each batch runs as one interactive call on the inference
+    scheduler, and reports its latencies back to the tuner.
+    """
+
+    def __init__(
+        self,
+        tuner: Optional[BatchTuner] = None,
+        scheduler: Optional[InferenceScheduler] = None
+    ):
+        self.tuner = tuner or batch_tuner
+        self.scheduler = scheduler or inference_scheduler
+
+        self.pending: Dict[Hashable, List[_Item]] = {}
+        self.funcs: Dict[Hashable, Callable[[List[Any]], List[Any]]] = {}
+        self.timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self.tasks: Set[asyncio.Task] = set()
+
+        self.metrics = {"calls": 0, "batches": 0, "batched": 0, "disconnected": 0}
+
+    async def submit(
+        self,
+        group: Hashable,
+        func: Callable[[List[Any]], List[Any]],
+        payload: Any,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ):
+        """
+        Result of func for payload, computed in a batch with the group's other calls.
+
+        func maps a list of payloads to their results, in order; calls
+        sharing a group must be interchangeable in one func call.
+        """
+        loop = asyncio.get_running_loop()
+        item = _Item(payload, loop.create_future(), is_disconnected)
+
+        items = self.pending.setdefault(group, [])
+        if not items:
+            self.funcs[group] = func
+            self.timers[group] = loop.call_later(self.tuner.max_wait, self._flush, group)
+        items.append(item)
+        self.metrics["calls"] += 1
+
+        if len(items) >= self.tuner.batch_size:
+            self._flush(group)
+
+        return await item.result
+
+    def queue_depth(self) -> int:
+        """Calls waiting in a batch or for a worker"""
+        return sum(map(len, self.pending.values())) + self.scheduler.queued(Priority.INTERACTIVE)
+
+    def _flush(self, group: Hashable):
+        items = self.pending.pop(group, None)
+        if not items:
+            return
+        self.timers.pop(group).cancel()
+
+        task = asyncio.create_task(self._run(self.funcs.pop(group), items, self.queue_depth()))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _run(
+        self,
+        func: Callable[[List[Any]], List[Any]],
+        items: List[_Item],
+        queue_depth: int
+    ):
+        live = []
+        for item in items:
+            # The caller stopped waiting
+            if item.result.done():
+                continue
+            if item.is_disconnected is not None and await item.is_disconnected():
+                self.metrics["disconnected"] += 1
+                item.result.set_exception(
+                    ClientDisconnectedError("Client disconnected before the analysis ran")
+                )
+                continue
+            live.append(item)
+
+        if not live:
+            return
+
+        self.metrics["batches"] += 1
+        self.metrics["batched"] += len(live)
+        started = time.monotonic()
+        try:
+            results = await self.scheduler.run(
+                Priority.INTERACTIVE, func, [item.payload for item in live], cost=len(live)
+            )
+        except asyncio.CancelledError:
+            for item in live:
+                item.result.cancel()
+            raise
+        except Exception as e:
+            for item in live:
+                if not item.result.done():
+                    item.result.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        for item, result in zip(live, results):
+            if not item.result.done():
+                item.result.set_result(result)
+
+        latencies = [finished - item.submitted for item in live]
+        self.tuner.observe(len(live), finished - started, latencies, queue_depth)
+
+    def stats(self) -> Dict:
+        """Call and batch counters"""
+        batches = self.metrics["batches"]
+        return {
+            **self.metrics,
+            "mean_batch": self.metrics["batched"] / batches if batches else 0.0,
+            "pending": sum(map(len, self.pending.values()))
+        }
+
+
+# Global instance
+micro_batcher = MicroBatcher()
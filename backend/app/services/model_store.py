@@ -0,0 +1,198 @@
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from app.core.config import settings
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "current"
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelStore:
+    """
+    Versioned local snapshots of the Transformers models.
+
+    Each model has a directory of versions, named after the hub revision
+    they were exported from, and a `current` file naming the active one:
+
+        <root>/<org>--<name>/<revision>/model.safetensors
+        <root>/<org>--<name>/<revision>/config.json, tokenizer files
+        <root>/<org>--<name>/<revision>/manifest.json
+        <root>/<org>--<name>/current
+
+    Weights are stored as safetensors and loaded memory-mapped, so the
+    processes of a node share them through the page cache and startup
+    never touches the network.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.MODEL_STORE_DIR
+
+    def model_dir(self, model_id: str) -> str:
+        return os.path.join(self.root, model_id.replace("/", "--"))
+
+    def versions(self, model_id: str) -> List[str]:
+        """Exported versions of a model, oldest first"""
+        model_dir = self.model_dir(model_id)
+        if not os.path.isdir(model_dir):
+            return []
+
+        paths = [
+            os.path.join(model_dir, name) for name in os.listdir(model_dir)
+            if os.path.isfile(os.path.join(model_dir, name, MANIFEST_FILE))
+        ]
+        paths.sort(key=lambda path: self.manifest(path)["exported_at"])
+        return [os.path.basename(path) for path in paths]
+
+    @staticmethod
+    def manifest(path: str) -> Dict:
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def current(self, model_id: str) -> Optional[str]:
+        """Path of the active snapshot of a model, None when there is none"""
+        try:
+            with open(os.path.join(self.model_dir(model_id), CURRENT_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+
+        path = os.path.join(self.model_dir(model_id), version)
+        return path if os.path.isfile(os.path.join(path, MANIFEST_FILE)) else None
+
+    def activate(self, model_id: str, version: str):
+        """Point current at version, atomically"""
+        pointer = os.path.join(self.model_dir(model_id), CURRENT_FILE)
+        tmp_path = f"{pointer}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, pointer)
+
+    def save(self, model_id: str, task: str, version: str, write: Callable[[str], None]) -> str:
+        """
+        Store a snapshot written by write(directory) and make it current.
+
+        The files are written to a temporary directory, listed with their
+        digests in the manifest and renamed into place, so a snapshot is
+        either complete or absent.
+        """
+        model_dir = self.model_dir(model_id)
+        target = os.path.join(model_dir, version)
+        tmp_dir = f"{target}.{os.getpid()}.tmp"
+
+        os.makedirs(model_dir, exist_ok=True)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        try:
+            write(tmp_dir)
+
+            manifest = {
+                "model_id": model_id,
+                "task": task,
+                "revision": version,
+                "exported_at": datetime.utcnow().isoformat(),
+                "files": {
+                    name: {
+                        "size": os.path.getsize(os.path.join(tmp_dir, name)),
+                        "sha256": file_digest(os.path.join(tmp_dir, name))
+                    }
+                    for name in sorted(os.listdir(tmp_dir))
+                }
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(tmp_dir, target)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self.activate(model_id, version)
+        logger.info(f"Stored {model_id} snapshot {version}")
+        return target
+
+    def export(self, model_id: str, task: str, revision: Optional[str] = None) -> str:
+        """Download a model from the hub and store it as a safetensors snapshot"""
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        model = AutoModelForSequenceClassification.from_pretrained(model_id, revision=revision)
+        tokenizer = AutoTokenizer.from_pretrained(model_id, revision=revision)
+
+        version = (
+            revision
+            or getattr(model.config, "_commit_hash", None)
+            or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        )
+
+        def write(directory: str):
+            model.save_pretrained(directory, safe_serialization=True)
+            tokenizer.save_pretrained(directory)
+
+        return self.save(model_id, task, version, write)
+
+    def verify(self, path: str) -> List[str]:
+        """Files of a snapshot that are missing or differ from its manifest"""
+        problems = []
+        for name, expected in self.manifest(path)["files"].items():
+            file_path = os.path.join(path, name)
+            if not os.path.isfile(file_path):
+                problems.append(f"{name}: missing")
+            elif (
+                os.path.getsize(file_path) != expected["size"]
+                or file_digest(file_path) != expected["sha256"]
+            ):
+                problems.append(f"{name}: checksum mismatch")
+        return problems
+
+    def prune(self, model_id: str, keep: int = 2) -> List[str]:
+        """Delete all but the newest keep versions, never the current one"""
+        current = self.current(model_id)
+        versions = self.versions(model_id)
+
+        removed = []
+        for version in versions[:max(len(versions) - keep, 0)]:
+            path = os.path.join(self.model_dir(model_id), version)
+            if path == current:
+                continue
+            shutil.rmtree(path)
+            removed.append(version)
+        return removed
+
+    @staticmethod
+    def load_pipeline(path: str, task: str, **kwargs):
+        """
+        Build a pipeline from a snapshot without network access.
+
+        low_cpu_mem_usage keeps the memory-mapped safetensors tensors as the
+        model weights instead of copying them into freshly initialized ones.
+        """
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+        model = AutoModelForSequenceClassification.from_pretrained(
+            path,
+            local_files_only=True,
+            use_safetensors=True,
+            low_cpu_mem_usage=True
+        )
+        tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+        return pipeline(task, model=model, tokenizer=tokenizer, **kwargs)
+
+
+# Global instance
+model_store = ModelStore()
@@ -0,0 +1,434 @@
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import select, and_
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.database import MonitorTrend
+from app.models.schemas import Priority
+from app.services.event_broker import EventBroker, event_broker
+from app.services.inference_scheduler import inference_scheduler
+import asyncio
+import itertools
+import logging
+import numpy as np
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_LABELS = ["positive", "negative", "neutral"]
+EMOTION_LABELS = ["joy", "sadness", "anger", "fear", "surprise", "love"]
+
+# Layout of an aggregate vector: tweet count, label counts, score sums, emotion counts
+FIELDS = (
+    ["total"]
+    + SENTIMENT_LABELS
+    + [f"sum_{label}" for label in SENTIMENT_LABELS]
+    + ["sum_confidence"]
+    + EMOTION_LABELS
+)
+FIELD_INDEX = {field: idx for idx, field in enumerate(FIELDS)}
+
+# (name, bucket seconds, buckets) of the rolling windows kept per monitor
+WINDOWS = [("minute", 1, 60), ("hour", 60, 60)]
+
+
+def aggregate_tweets(tweets: List[Dict]) -> np.ndarray:
+    """Sum analyzed tweets into one aggregate vector"""
+    vectors = np.zeros((len(tweets), len(FIELDS)))
+    vectors[:, FIELD_INDEX["total"]] = 1
+
+    for row, tweet in enumerate(tweets):
+        sentiment = tweet['sentiment']
+        vectors[row, FIELD_INDEX[sentiment['label']]] = 1
+        for label in SENTIMENT_LABELS:
+            vectors[row, FIELD_INDEX[f"sum_{label}"]] = sentiment['scores'][label]
+        vectors[row, FIELD_INDEX["sum_confidence"]] = sentiment['confidence']
+        if tweet['emotion']['label'] in FIELD_INDEX:
+            vectors[row, FIELD_INDEX[tweet['emotion']['label']]] = 1
+
+    return vectors.sum(axis=0)
+
+
+def trend_vector(trend: MonitorTrend) -> np.ndarray:
+    """Aggregate vector of a persisted hour, without the neutral score sum it does not keep"""
+    vector = np.zeros(len(FIELDS))
+    total = trend.total_analyses or 0
+    vector[FIELD_INDEX["total"]] = total
+    vector[FIELD_INDEX["positive"]] = trend.positive_count or 0
+    vector[FIELD_INDEX["negative"]] = trend.negative_count or 0
+    vector[FIELD_INDEX["neutral"]] = trend.neutral_count or 0
+    vector[FIELD_INDEX["sum_positive"]] = (trend.avg_positive_score or 0) * total
+    vector[FIELD_INDEX["sum_negative"]] = (trend.avg_negative_score or 0) * total
+    vector[FIELD_INDEX["sum_confidence"]] = (trend.avg_confidence or 0) * total
+    for label, count in (trend.emotion_distribution or {}).items():
+        if label in FIELD_INDEX:
+            vector[FIELD_INDEX[label]] = count
+    return vector
+
+
+def tweet_time(tweet: Dict, default: datetime) -> datetime:
+    """When a tweet was posted, in naive UTC, default when unknown or later"""
+    try:
+        created = datetime.fromisoformat(str(tweet.get('created_at')))
+    except ValueError:
+        return default
+    if created.tzinfo is not None:
+        created = created.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(created, default)
+
+
+def group_tweets(
+    tweets: List[Dict],
+    default: datetime,
+    hourly: bool = False
+) -> Dict[datetime, np.ndarray]:
+    """Aggregate vectors of tweets by the time, or the hour, they were posted"""
+    groups: Dict[datetime, List[Dict]] = {}
+    for tweet in tweets:
+        created = tweet_time(tweet, default)
+        if hourly:
+            created = created.replace(minute=0, second=0, microsecond=0)
+        groups.setdefault(created, []).append(tweet)
+    return {created: aggregate_tweets(group) for created, group in groups.items()}
+
+
+def describe(vector: np.ndarray) -> Dict:
+    """Distributions and averages of an aggregate vector"""
+    total = int(vector[FIELD_INDEX["total"]])
+    divisor = total or 1
+
+    return {
+        "total": total,
+        "sentiment_distribution": {
+            label: int(vector[FIELD_INDEX[label]]) for label in SENTIMENT_LABELS
+        },
+        "emotion_distribution": {
+            label: int(vector[FIELD_INDEX[label]]) for label in EMOTION_LABELS
+        },
+        "average_sentiment_scores": {
+            label: float(vector[FIELD_INDEX[f"sum_{label}"]]) / divisor
+            for label in SENTIMENT_LABELS
+        },
+        "average_confidence": float(vector[FIELD_INDEX["sum_confidence"]]) / divisor,
+    }
+
+
+class RollingWindow:
+    """
+    Ring of time buckets with a running total.
+
+    Adding and reading only touch the running total and the buckets that
+    expired since the last call, so reads do not scan the window.
+    """
+
+    def __init__(self, bucket_seconds: int, buckets: int, clock=time.time):
+        self.bucket_seconds = bucket_seconds
+        self.size = buckets
+        self.clock = clock
+        self.buckets = np.zeros((buckets, len(FIELDS)))
+        self.totals = np.zeros(len(FIELDS))
+        self.current = int(clock() // bucket_seconds)
+
+    @property
+    def seconds(self) -> int:
+        return self.bucket_seconds * self.size
+
+    def _advance(self, now: float):
+        """Expire buckets that fell out of the window"""
+        index = int(now // self.bucket_seconds)
+        if index <= self.current:
+            return
+
+        for expired in range(self.current + 1, min(index, self.current + self.size) + 1):
+            slot = expired % self.size
+            self.totals -= self.buckets[slot]
+            self.buckets[slot] = 0
+
+        self.current = index
+
+    def add(self, vector: np.ndarray, now: Optional[float] = None, at: Optional[float] = None):
+        """Add an aggregate vector to the bucket of at, the current one by default"""
+        self._advance(self.clock() if now is None else now)
+        index = self.current if at is None else min(int(at // self.bucket_seconds), self.current)
+        # Older than the window
+        if index <= self.current - self.size:
+            return
+        self.buckets[index % self.size] += vector
+        self.totals += vector
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """Aggregates over the window ending now"""
+        self._advance(self.clock() if now is None else now)
+        return {"seconds": self.seconds, **describe(self.totals)}
+
+
+class Monitor:
+    """A registered query polled for new tweets"""
+
+    def __init__(
+        self,
+        monitor_id: int,
+        query: str,
+        language: Optional[str],
+        interval: int,
+        clock=time.time
+    ):
+        self.id = monitor_id
+        # Ids restart with each worker, the key tells this monitor's persisted rows apart
+        self.key = secrets.token_hex(16)
+        self.query = query
+        self.language = language
+        self.interval = interval
+        self.clock = clock
+        # Every tweet up to since_id is recorded, the first poll sets it
+        self.since_id: Optional[int] = None
+        # While a backlog is drained: tweets from until_id up to newest_id are recorded too
+        self.until_id: Optional[int] = None
+        self.newest_id: Optional[int] = None
+        self.created_at = datetime.utcnow()
+        self.last_polled_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.polls = 0
+        self.totals = np.zeros(len(FIELDS))
+        self.windows = {
+            name: RollingWindow(seconds, size, clock) for name, seconds, size in WINDOWS
+        }
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def topic(self) -> str:
+        return f"monitor:{self.id}"
+
+    def record(self, tweets: List[Dict], now: Optional[datetime] = None):
+        """Fold a batch of analyzed tweets into the windows, at the time each was posted"""
+        now = now or datetime.utcnow()
+        timestamp = self.clock()
+
+        for created, vector in group_tweets(tweets, now).items():
+            at = timestamp - (now - created).total_seconds()
+            for window in self.windows.values():
+                window.add(vector, timestamp, at)
+            self.totals += vector
+
+    def advance(self, tweets: List[Dict], page_size: int):
+        """Move the cursors past recorded tweets, page_size being the most one poll fetches"""
+        ids = [int(tweet['id']) for tweet in tweets]
+        if self.since_id is None:
+            # A new monitor starts from the newest tweets, not the whole search history
+            if ids:
+                self.since_id = max(ids)
+            return
+
+        if self.until_id is None and ids:
+            self.newest_id = max(ids)
+
+        if len(ids) >= page_size:
+            # More new tweets may be waiting below the oldest one fetched
+            self.until_id = min(ids)
+        else:
+            if self.newest_id is not None:
+                self.since_id = self.newest_id
+            self.until_id = self.newest_id = None
+
+    def snapshot(self) -> Dict:
+        """Current state and rolling aggregates"""
+        now = self.clock()
+        return {
+            "id": self.id,
+            "query": self.query,
+            "language": self.language,
+            "interval_seconds": self.interval,
+            "since_id": str(self.since_id) if self.since_id else None,
+            "backlog": self.until_id is not None,
+            "created_at": self.created_at.isoformat(),
+            "last_polled_at": self.last_polled_at.isoformat() if self.last_polled_at else None,
+            "last_error": self.last_error,
+            "polls": self.polls,
+            "total_tweets": int(self.totals[FIELD_INDEX["total"]]),
+            "windows": {name: window.snapshot(now) for name, window in self.windows.items()},
+        }
+
+
+class MonitorService:
+    """
+    Background pollers for monitored queries.
+
+    Each poll asks only for tweets newer than the monitor's since_id and
+    analyzes them in one batch. The first poll only takes the newest
+    MONITOR_MAX_RESULTS; after it, when more than MONITOR_MAX_RESULTS are
+    new, the following polls page down through the older ones before
+    since_id moves past them. Tweets count at the time they were posted.
+    Monitors live in the worker that created them; their hourly
+    aggregates are added to MonitorTrend.
+    """
+
+    def __init__(
+        self,
+        source: Optional[Callable[..., Awaitable[List[Dict]]]] = None,
+        analyze: Optional[Callable[[List[Dict], Optional[str]], List[Dict]]] = None,
+        session_factory=AsyncSessionLocal,
+        clock=time.time,
+        broker: Optional[EventBroker] = None
+    ):
+        self.source = source
+        self.analyze = analyze
+        self.session_factory = session_factory
+        self.clock = clock
+        self.broker = broker or event_broker
+        self.monitors: Dict[int, Monitor] = {}
+        self._ids = itertools.count(1)
+
+    def _resolve(self):
+        """Default to the Twitter search and batched tweet analysis"""
+        if self.source is None or self.analyze is None:
+            # Imported here so tests can run monitors without the Twitter client
+            from app.services.twitter_service import twitter_service
+
+            if not twitter_service.fetcher:
+                raise ValueError(
+                    "Twitter client not initialized. Please configure API credentials."
+                )
+
+            self.source = self.source or twitter_service.fetcher.search
+            self.analyze = self.analyze or twitter_service._analyze_page
+
+    def create(
+        self,
+        query: str,
+        language: Optional[str] = None,
+        interval: Optional[int] = None
+    ) -> Monitor:
+        """Register a query and start polling it"""
+        if len(self.monitors) >= settings.MONITOR_MAX:
+            raise ValueError(f"At most {settings.MONITOR_MAX} monitors can run at once")
+
+        self._resolve()
+
+        monitor = Monitor(
+            next(self._ids),
+            query,
+            language,
+            interval or settings.MONITOR_POLL_INTERVAL,
+            self.clock
+        )
+        self.monitors[monitor.id] = monitor
+        monitor.task = asyncio.create_task(self._run(monitor))
+
+        logger.info(f"Started monitor {monitor.id} for {query!r}")
+        return monitor
+
+    def get(self, monitor_id: int) -> Optional[Monitor]:
+        return self.monitors.get(monitor_id)
+
+    async def delete(self, monitor_id: int) -> Optional[Monitor]:
+        """Stop and forget a monitor"""
+        monitor = self.monitors.pop(monitor_id, None)
+        if monitor and monitor.task:
+            monitor.task.cancel()
+            try:
+                await monitor.task
+            except asyncio.CancelledError:
+                pass
+        if monitor:
+            self.broker.publish(monitor.topic, "closed", {"id": monitor.id})
+        return monitor
+
+    async def poll(self, monitor: Monitor) -> int:
+        """
+        Fetch, analyze and record the next tweets of a monitor.
+
+        The cursors only move once the tweets are persisted, so a poll
+        that fails is retried with the same tweets.
+        """
+        tweets = await self.source(
+            monitor.query, settings.MONITOR_MAX_RESULTS, monitor.since_id, monitor.until_id
+        )
+
+        monitor.polls += 1
+        monitor.last_polled_at = datetime.utcnow()
+
+        if tweets:
+            # Background work, interactive requests go first
+            analyzed = await inference_scheduler.run(
+                Priority.BACKGROUND, self.analyze, tweets, monitor.language, cost=len(tweets)
+            )
+
+            await self.persist(monitor, group_tweets(analyzed, monitor.last_polled_at, hourly=True))
+            monitor.record(analyzed, monitor.last_polled_at)
+
+        monitor.advance(tweets, settings.MONITOR_MAX_RESULTS)
+
+        # Published even without new tweets, windows shrink as time passes
+        self.broker.publish(monitor.topic, "window", monitor.snapshot())
+
+        return len(tweets)
+
+    async def persist(self, monitor: Monitor, hours: Dict[datetime, np.ndarray]):
+        """Add a poll's hourly aggregates to a monitor's MonitorTrend rows"""
+        async with self.session_factory() as db:
+            for hour, vector in hours.items():
+                trend = (await db.execute(
+                    select(MonitorTrend).where(
+                        and_(
+                            MonitorTrend.monitor_key == monitor.key,
+                            MonitorTrend.hour == hour
+                        )
+                    )
+                )).scalars().first()
+
+                if trend:
+                    vector = vector + trend_vector(trend)
+
+                stats = describe(vector)
+                values = {
+                    "total_analyses": stats["total"],
+                    "positive_count": stats["sentiment_distribution"]["positive"],
+                    "negative_count": stats["sentiment_distribution"]["negative"],
+                    "neutral_count": stats["sentiment_distribution"]["neutral"],
+                    "avg_positive_score": stats["average_sentiment_scores"]["positive"],
+                    "avg_negative_score": stats["average_sentiment_scores"]["negative"],
+                    "avg_confidence": stats["average_confidence"],
+                    "emotion_distribution": {
+                        label: count
+                        for label, count in stats["emotion_distribution"].items() if count
+                    }
+                }
+
+                if trend:
+                    for key, value in values.items():
+                        setattr(trend, key, value)
+                else:
+                    db.add(MonitorTrend(
+                        monitor_key=monitor.key, query=monitor.query, hour=hour, **values
+                    ))
+
+            await db.commit()
+
+    async def _run(self, monitor: Monitor):
+        """Poll a monitor every interval until it is deleted"""
+        while True:
+            try:
+                await self.poll(monitor)
+                monitor.last_error = None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                monitor.last_error = str(e)
+                logger.error(f"Monitor {monitor.id} poll failed: {e}")
+            else:
+                # A backlog is drained without waiting for the next interval
+                if monitor.until_id is not None:
+                    await asyncio.sleep(0)
+                    continue
+
+            await asyncio.sleep(monitor.interval)
+
+    async def shutdown(self):
+        """Stop every monitor"""
+        for monitor_id in list(self.monitors):
+            await self.delete(monitor_id)
+
+
+# Global instance
+monitor_service = MonitorService()
@@ -0,0 +1,162 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+import re
+import threading
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]+")
+
+FINGERPRINT_BITS = 64
+
+# Character shingles survive typos and small edits better than words on short posts
+SHINGLE_SIZE = 3
+
+# Negations flip a label while moving a fingerprint by a bit or two, en/pt/es
+NEGATIONS = frozenset({
+    "not", "no", "never", "nor", "none", "nothing", "nobody", "neither", "without", "cannot",
+    "não", "nao", "nunca", "nem", "nada", "ninguém", "ninguem", "sem", "jamais",
+    "ni", "nadie", "sin", "jamás", "tampoco"
+})
+WORD_PATTERN = re.compile(r"\w+(?:'\w+)?")
+
+
+def features(text: str) -> List[str]:
+    """Overlapping character shingles of the lowercased tokens, joined by single spaces"""
+    joined = " ".join(TOKEN_PATTERN.findall(text.lower()))
+    return [joined[i:i + SHINGLE_SIZE] for i in range(max(len(joined) - SHINGLE_SIZE + 1, 1))]
+
+
+def negation_signature(text: str) -> str:
+    """
+    Sorted negation words of a text, joined by spaces.
+
+    Only texts with the same signature may share a result, so "is not
+    amazing" never reuses the result of "is amazing".
+    """
+    found = set()
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word in NEGATIONS:
+            found.add(word)
+        elif word.endswith("n't"):
+            found.add("n't")
+    return " ".join(sorted(found))
+
+
+def fingerprint(text: str, min_tokens: Optional[int] = None) -> Optional[int]:
+    """
+    64-bit SimHash of a text, None when it has fewer than min_tokens tokens.
+
+    Each bit is the majority vote of that bit over the feature hashes, so
+    texts sharing most features get fingerprints a few bits apart.
+    """
+    min_tokens = settings.NEAR_DUPLICATE_MIN_TOKENS if min_tokens is None else min_tokens
+    if len(TOKEN_PATTERN.findall(text)) < max(min_tokens, 1):
+        return None
+
+    text_features = features(text)
+    hashes = np.array(
+        [
+            int.from_bytes(blake2b(feature.encode(), digest_size=8).digest(), "little")
+            for feature in text_features
+        ],
+        dtype="<u8"
+    )
+    bits = np.unpackbits(hashes.view(np.uint8), bitorder="little").reshape(-1, FINGERPRINT_BITS)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(text_features)
+    return int.from_bytes(np.packbits(votes > 0, bitorder="little").tobytes(), "little")
+
+
+class NearDuplicateIndex:
+    """
+    Bounded index of recent fingerprints, for reusing the results of near-duplicate texts.
+
+    Fingerprints are split into max_distance + 1 bands; two fingerprints at
+    most max_distance bits apart agree on at least one whole band, so only
+    the entries sharing a band bucket are compared. Entries are evicted in
+    least recently used order past max_size.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, max_distance: Optional[int] = None):
+        self.max_size = settings.NEAR_DUPLICATE_INDEX_SIZE if max_size is None else max_size
+        self.max_distance = (
+            settings.NEAR_DUPLICATE_MAX_DISTANCE if max_distance is None else max_distance
+        )
+
+        bands = self.max_distance + 1
+        width = FINGERPRINT_BITS // bands
+        self.bands = [
+            (start, (1 << (width if band < bands - 1 else FINGERPRINT_BITS - start)) - 1)
+            for band, start in enumerate(range(0, width * bands, width))
+        ]
+
+        # Shared by request handlers and the threads running the models
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], Set[str]] = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def _bucket_keys(self, namespace: str, value: int) -> List[Tuple[str, int, int]]:
+        return [(namespace, start, (value >> start) & mask) for start, mask in self.bands]
+
+    def add(self, namespace: str, key: str, value: int):
+        """Index the fingerprint of the result stored under key"""
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (namespace, value)
+            for bucket in self._bucket_keys(namespace, value):
+                self._buckets.setdefault(bucket, set()).add(key)
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def find(self, namespace: str, value: int) -> Optional[str]:
+        """Key of the closest indexed fingerprint within max_distance bits, or None"""
+        with self._lock:
+            self.lookups += 1
+
+            candidates = set()
+            for bucket in self._bucket_keys(namespace, value):
+                candidates.update(self._buckets.get(bucket, ()))
+
+            best, best_distance = None, self.max_distance + 1
+            for key in candidates:
+                distance = (self._entries[key][1] ^ value).bit_count()
+                if distance < best_distance:
+                    best, best_distance = key, distance
+
+            if best is not None:
+                self._entries.move_to_end(best)
+                self.hits += 1
+            return best
+
+    def discard(self, key: str):
+        """Drop the entry of a result that is gone"""
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        for bucket in self._bucket_keys(*entry):
+            keys = self._buckets[bucket]
+            keys.discard(key)
+            if not keys:
+                del self._buckets[bucket]
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        """Size and hit counters"""
+        return {"size": len(self._entries), "lookups": self.lookups, "hits": self.hits}
@@ -0,0 +1,168 @@
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds per rate limit window, APIKey.rate_limit is requests per hour
+WINDOW_SECONDS = 3600
+
+# Atomic token bucket: refill from elapsed time, then take cost tokens if available
+# (a negative cost refunds)
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+
+return {allowed, tostring(tokens)}
+"""
+
+
+class RateLimitResult:
+    """Outcome of a rate limit check"""
+
+    def __init__(self, allowed: bool, limit: int, tokens: float, cost: int):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = max(0, int(math.floor(tokens)))
+
+        self.reset = 0
+        self.retry_after = 0
+
+        rate = limit / WINDOW_SECONDS
+        if rate > 0:
+            # Seconds until the bucket is full again
+            self.reset = int(math.ceil((limit - tokens) / rate))
+            # Seconds until this request's cost would fit
+            if not allowed:
+                self.retry_after = int(math.ceil(max(0, cost - tokens) / rate))
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+class TokenBucketLimiter:
+    """In-process token buckets, refilled continuously at limit per hour"""
+
+    def __init__(self, max_buckets: int = 100000, clock=time.monotonic):
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def acquire(self, key: str, limit: int, cost: int = 1) -> RateLimitResult:
+        """Take cost tokens from key's bucket if available"""
+        if limit <= 0:
+            return RateLimitResult(False, 0, 0, cost)
+
+        now = self.clock()
+        rate = limit / WINDOW_SECONDS
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [float(limit), now]
+            self._buckets[key] = bucket
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        tokens = min(float(limit), bucket[0] + (now - bucket[1]) * rate)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens = min(float(limit), tokens - cost)
+
+        bucket[0], bucket[1] = tokens, now
+
+        return RateLimitResult(allowed, limit, tokens, cost)
+
+    async def refund(self, key: str, limit: int, tokens: int) -> RateLimitResult:
+        """Give back tokens charged for work that was not done"""
+        return await self.acquire(key, limit, -tokens)
+
+
+class RedisTokenBucketLimiter:
+    """Token buckets shared by all workers, updated atomically by a Lua script"""
+
+    def __init__(self, client=None, prefix: str = "ratelimit:"):
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.Redis(
+                host=settings.REDIS_HOST,
+                port=settings.REDIS_PORT,
+                db=settings.REDIS_DB
+            )
+
+        self.client = client
+        self.prefix = prefix
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        # Used when Redis is unreachable, so limits degrade to per worker
+        self.fallback = TokenBucketLimiter()
+
+    async def acquire(self, key: str, limit: int, cost: int = 1) -> RateLimitResult:
+        """Take cost tokens from the shared bucket if available"""
+        if limit <= 0:
+            return RateLimitResult(False, 0, 0, cost)
+
+        try:
+            allowed, tokens = await self.script(
+                keys=[f"{self.prefix}{key}"],
+                args=[limit, limit / WINDOW_SECONDS, cost]
+            )
+        except Exception as e:
+            logger.error(f"Redis rate limiter unavailable, using in-process buckets: {e}")
+            return await self.fallback.acquire(key, limit, cost)
+
+        return RateLimitResult(bool(int(allowed)), limit, float(tokens), cost)
+
+    async def refund(self, key: str, limit: int, tokens: int) -> RateLimitResult:
+        """Give back tokens charged for work that was not done"""
+        return await self.acquire(key, limit, -tokens)
+
+
+def create_rate_limiter(backend: Optional[str] = None):
+    """Build the limiter configured by RATE_LIMIT_BACKEND"""
+    backend = backend or settings.RATE_LIMIT_BACKEND
+
+    if backend == "redis":
+        return RedisTokenBucketLimiter()
+
+    return TokenBucketLimiter()
+
+
+# Global instance
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,197 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Optional, List, Dict
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.database import Analysis
+from app.services.export_service import ExportService
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+REPORT_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ReportService:
+    """
+    Renders PDF reports in a process pool and caches them by content.
+
+    Report state lives next to the artifacts in the cache directory, so
+    every server worker sharing it sees the same status: a .pending
+    marker while a render runs, a .failed file with the error when it
+    failed, and the .pdf once it is ready. Markers older than
+    REPORT_PENDING_TIMEOUT (the rendering process died) or
+    REPORT_FAILURE_TTL expire, and the report can be submitted again.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.REPORT_CACHE_DIR
+        self.max_workers = max_workers or settings.REPORT_WORKERS
+        self.pool = None
+        # Renders started by this process, until they finish
+        self.jobs: Dict[str, asyncio.Future] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self.pool is None:
+            # Spawned workers only import the export service, not the models
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.pool
+
+    @staticmethod
+    async def get_watermark(db: AsyncSession, since: datetime) -> str:
+        """Watermark that changes whenever the analyses in the range change"""
+        count, max_id = (await db.execute(
+            select(func.count(Analysis.id), func.max(Analysis.id)).where(
+                Analysis.created_at >= since
+            )
+        )).one()
+
+        return f"{count}:{max_id}"
+
+    @staticmethod
+    def report_key(params: Dict, watermark: str) -> str:
+        """Content address of a report for its query parameters and data watermark"""
+        payload = json.dumps({"params": params, "watermark": watermark}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def artifact_path(self, key: str) -> str:
+        """Path of the cached PDF for a report key"""
+        return os.path.join(self.cache_dir, f"{key}.pdf")
+
+    def marker_path(self, key: str, state: str) -> str:
+        """Path of the pending or failed marker of a report key"""
+        return os.path.join(self.cache_dir, f"{key}.{state}")
+
+    @staticmethod
+    def _age(path: str) -> Optional[float]:
+        """Seconds since path was written, None when it does not exist"""
+        try:
+            return time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get_status(self, key: str) -> Dict:
+        """Status of a report: ready, pending, failed or missing"""
+        if not REPORT_KEY_RE.match(key):
+            return {"status": "missing"}
+
+        path = self.artifact_path(key)
+        if os.path.exists(path):
+            return {"status": "ready", "path": path}
+
+        failed = self.marker_path(key, "failed")
+        age = self._age(failed)
+        if age is not None:
+            if age < settings.REPORT_FAILURE_TTL:
+                try:
+                    with open(failed, encoding="utf-8") as f:
+                        error = f.read()
+                except OSError:
+                    error = ""
+                return {"status": "failed", "error": error or "Report was not written"}
+            self._remove(failed)
+
+        pending = self.marker_path(key, "pending")
+        age = self._age(pending)
+        if age is not None:
+            if age < settings.REPORT_PENDING_TIMEOUT:
+                return {"status": "pending"}
+            self._remove(pending)
+
+        return {"status": "missing"}
+
+    def submit(self, key: str, data: List[Dict], title: str = "Sentiment Analysis Report") -> Dict:
+        """Start rendering a report in the background unless it is cached or already running"""
+        status = self.get_status(key)
+        if status["status"] in ("ready", "pending"):
+            return status
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._prune()
+        self._remove(self.marker_path(key, "failed"))
+
+        try:
+            # Exclusive, so only one server worker renders a report
+            flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY
+            os.close(os.open(self.marker_path(key, "pending"), flags))
+        except FileExistsError:
+            return {"status": "pending"}
+
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(
+            self._get_pool(),
+            ExportService.render_pdf_to_file,
+            data,
+            self.artifact_path(key),
+            title
+        )
+        job.add_done_callback(lambda done: self._finish(key, done))
+        self.jobs[key] = job
+        logger.info(f"Rendering report {key[:12]} with {len(data)} analyses")
+
+        return {"status": "pending"}
+
+    def _finish(self, key: str, job: asyncio.Future):
+        """Record a finished render where every server worker can see it"""
+        self.jobs.pop(key, None)
+
+        error = None if job.cancelled() else job.exception()
+        if job.cancelled() or error is not None or not os.path.exists(self.artifact_path(key)):
+            if job.cancelled():
+                message = "Report rendering was cancelled"
+            else:
+                message = str(error or "Report was not written")
+            logger.error(f"Report {key[:12]} failed: {message}")
+            try:
+                with open(self.marker_path(key, "failed"), "w", encoding="utf-8") as f:
+                    f.write(message)
+            except OSError:
+                pass
+
+        self._remove(self.marker_path(key, "pending"))
+
+    def _prune(self):
+        """Keep at most REPORT_CACHE_MAX_FILES cached reports"""
+        reports = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".pdf")
+        ]
+        if len(reports) < settings.REPORT_CACHE_MAX_FILES:
+            return
+
+        reports.sort(key=os.path.getmtime)
+        for path in reports[:len(reports) - settings.REPORT_CACHE_MAX_FILES + 1]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+# Global instance
+report_service = ReportService()
@@ -0,0 +1,313 @@
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict
+from sqlalchemy import select, delete, func, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.database import Analysis, TrendData
+import gzip
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "analyses_y"
+PARTITION_NAME_RE = re.compile(r"^analyses_y(\d{4})m(\d{2})$")
+
+# What the daily rollup reads, without the text and Twitter payloads
+ROLLUP_COLUMNS = (
+    Analysis.created_at,
+    Analysis.sentiment_label,
+    Analysis.sentiment_positive,
+    Analysis.sentiment_negative,
+    Analysis.sentiment_confidence,
+    Analysis.emotion_label
+)
+
+
+class RetentionService:
+    """Service for partitioning, rolling up and purging old analyses"""
+
+    @staticmethod
+    def month_start(date: datetime) -> datetime:
+        """First instant of the month containing date"""
+        return date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def next_month(date: datetime) -> datetime:
+        """First instant of the month after date"""
+        start = RetentionService.month_start(date)
+        if start.month == 12:
+            return start.replace(year=start.year + 1, month=1)
+        return start.replace(month=start.month + 1)
+
+    @staticmethod
+    def partition_name(date: datetime) -> str:
+        """Name of the monthly partition containing date"""
+        return f"{PARTITION_PREFIX}{date.year:04d}m{date.month:02d}"
+
+    @staticmethod
+    def partition_bounds(name: str) -> Optional[tuple]:
+        """(start, end) of a monthly partition, None for other tables"""
+        match = PARTITION_NAME_RE.match(name)
+        if not match:
+            return None
+
+        start = datetime(int(match.group(1)), int(match.group(2)), 1)
+        return start, RetentionService.next_month(start)
+
+    @staticmethod
+    def get_cutoff(retention_days: int, now: Optional[datetime] = None) -> datetime:
+        """Retention cutoff, aligned to midnight so days are compacted whole"""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(days=retention_days)
+        return cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def is_partitioned(db: AsyncSession) -> bool:
+        """Whether analyses is a partitioned table on this database"""
+        return settings.ANALYSES_PARTITIONED and db.bind.dialect.name == "postgresql"
+
+    @staticmethod
+    async def list_partitions(db: AsyncSession) -> List[str]:
+        """List the partitions attached to analyses"""
+        result = await db.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = 'analyses'"
+        ))
+        return sorted(row[0] for row in result)
+
+    @staticmethod
+    async def check_partitioned(db: AsyncSession):
+        """
+        Refuse to run partitioned against an existing unpartitioned analyses table.
+
+        create_all skips tables that already exist, so turning on
+        ANALYSES_PARTITIONED needs the table migrated by hand (see README).
+        """
+        relkind = (await db.execute(text(
+            "SELECT relkind FROM pg_class WHERE relname = 'analyses' AND relkind IN ('r', 'p')"
+        ))).scalar()
+
+        if relkind == "r":
+            raise RuntimeError(
+                "ANALYSES_PARTITIONED is set but analyses is an unpartitioned table; "
+                "migrate it as described in the README before enabling partitioning"
+            )
+
+    @staticmethod
+    async def ensure_partitions(
+        db: AsyncSession,
+        months_ahead: Optional[int] = None,
+        now: Optional[datetime] = None
+    ) -> List[str]:
+        """Create monthly partitions up to months_ahead plus a default partition"""
+        if not RetentionService.is_partitioned(db):
+            return []
+
+        await RetentionService.check_partitioned(db)
+
+        if months_ahead is None:
+            months_ahead = settings.PARTITION_MONTHS_AHEAD
+
+        existing = set(await RetentionService.list_partitions(db))
+        created = []
+
+        start = RetentionService.month_start(now or datetime.utcnow())
+        for _ in range(months_ahead + 1):
+            end = RetentionService.next_month(start)
+            name = RetentionService.partition_name(start)
+
+            if name not in existing:
+                await db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF analyses "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+                ))
+                created.append(name)
+
+            start = end
+
+        # Rows outside every monthly range land here instead of failing
+        if "analyses_default" not in existing:
+            await db.execute(text(
+                "CREATE TABLE IF NOT EXISTS analyses_default PARTITION OF analyses DEFAULT"
+            ))
+            created.append("analyses_default")
+
+        await db.commit()
+
+        return created
+
+    @staticmethod
+    def _row_to_dict(analysis: Analysis) -> Dict:
+        """Serialize every column of an analysis for archiving"""
+        return {
+            column.name: getattr(analysis, column.key)
+            for column in Analysis.__table__.columns
+        }
+
+    @staticmethod
+    async def rollup_and_archive(
+        db: AsyncSession,
+        cutoff: datetime,
+        archive_path: Optional[str] = None,
+        batch_size: Optional[int] = None
+    ) -> Dict:
+        """Aggregate analyses older than cutoff per day, optionally archiving them"""
+        batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+        days = {}
+        rows = 0
+
+        archive = gzip.open(archive_path, "wt", encoding="utf-8") if archive_path else None
+
+        try:
+            # Full rows only when they are archived
+            query = select(Analysis) if archive else select(*ROLLUP_COLUMNS)
+            result = await db.stream(
+                query
+                .where(Analysis.created_at < cutoff)
+                .order_by(Analysis.created_at)
+                .execution_options(yield_per=batch_size)
+            )
+
+            async for partition in (result.scalars() if archive else result).partitions(batch_size):
+                for analysis in partition:
+                    rows += 1
+                    day = analysis.created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+                    stats = days.setdefault(day, {
+                        "total": 0, "positive": 0, "negative": 0, "neutral": 0,
+                        "sum_positive": 0.0, "sum_negative": 0.0, "sum_confidence": 0.0,
+                        "emotions": {}
+                    })
+                    stats["total"] += 1
+                    if analysis.sentiment_label in ("positive", "negative", "neutral"):
+                        stats[analysis.sentiment_label] += 1
+                    stats["sum_positive"] += analysis.sentiment_positive or 0
+                    stats["sum_negative"] += analysis.sentiment_negative or 0
+                    stats["sum_confidence"] += analysis.sentiment_confidence or 0
+                    if analysis.emotion_label:
+                        emotions = stats["emotions"]
+                        label = analysis.emotion_label
+                        emotions[label] = emotions.get(label, 0) + 1
+
+                    if archive:
+                        row = RetentionService._row_to_dict(analysis)
+                        archive.write(json.dumps(row, default=str))
+                        archive.write("\n")
+
+                        # Rows are not needed once aggregated
+                        db.expunge(analysis)
+        finally:
+            if archive:
+                archive.close()
+
+        for day, stats in days.items():
+            total = stats["total"]
+            values = {
+                "total_analyses": total,
+                "positive_count": stats["positive"],
+                "negative_count": stats["negative"],
+                "neutral_count": stats["neutral"],
+                "avg_positive_score": stats["sum_positive"] / total,
+                "avg_negative_score": stats["sum_negative"] / total,
+                "avg_confidence": stats["sum_confidence"] / total,
+                "emotion_distribution": stats["emotions"]
+            }
+
+            trend = (await db.execute(
+                select(TrendData).where(
+                    and_(
+                        TrendData.date == day,
+                        TrendData.keyword.is_(None)
+                    )
+                )
+            )).scalars().first()
+
+            if trend:
+                for key, value in values.items():
+                    setattr(trend, key, value)
+            else:
+                db.add(TrendData(date=day, keyword=None, **values))
+
+        await db.commit()
+
+        return {"rows": rows, "days": len(days)}
+
+    @staticmethod
+    async def purge(db: AsyncSession, cutoff: datetime) -> Dict:
+        """Drop partitions entirely older than cutoff, then delete remaining old rows"""
+        dropped = []
+
+        if RetentionService.is_partitioned(db):
+            for name in await RetentionService.list_partitions(db):
+                bounds = RetentionService.partition_bounds(name)
+                if bounds and bounds[1] <= cutoff:
+                    await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                    dropped.append(name)
+
+        result = await db.execute(delete(Analysis).where(Analysis.created_at < cutoff))
+        await db.commit()
+
+        return {"partitions_dropped": dropped, "rows_deleted": result.rowcount}
+
+    @staticmethod
+    async def run(
+        db: AsyncSession,
+        retention_days: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        dry_run: bool = False,
+        now: Optional[datetime] = None
+    ) -> Dict:
+        """Roll up analyses past the retention window into TrendData, then purge them"""
+        if retention_days is None:
+            retention_days = settings.RETENTION_DAYS
+        if archive_dir is None:
+            archive_dir = settings.RETENTION_ARCHIVE_DIR
+
+        if retention_days <= 0:
+            return {"message": "Retention disabled"}
+
+        cutoff = RetentionService.get_cutoff(retention_days, now)
+
+        if dry_run:
+            rows = (await db.execute(
+                select(func.count(Analysis.id)).where(Analysis.created_at < cutoff)
+            )).scalar()
+            return {"cutoff": cutoff, "rows": rows, "dry_run": True}
+
+        archive_path = None
+        if archive_dir:
+            os.makedirs(archive_dir, exist_ok=True)
+            archive_path = os.path.join(
+                archive_dir,
+                f"analyses_before_{cutoff:%Y%m%d}_{datetime.utcnow():%Y%m%d%H%M%S}.jsonl.gz"
+            )
+
+        rollup = await RetentionService.rollup_and_archive(db, cutoff, archive_path)
+
+        if rollup["rows"] == 0 and archive_path:
+            os.remove(archive_path)
+            archive_path = None
+
+        purge = await RetentionService.purge(db, cutoff)
+
+        logger.info(
+            f"Retention compacted {rollup['rows']} analyses into {rollup['days']} days "
+            f"before {cutoff:%Y-%m-%d}"
+        )
+
+        return {
+            "cutoff": cutoff,
+            "rows": rollup["rows"],
+            "days_rolled_up": rollup["days"],
+            "archive": archive_path,
+            **purge
+        }
+
+
+# Global instance
+retention_service = RetentionService()
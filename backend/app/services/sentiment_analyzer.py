@@ -1,74 +1,184 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-import spacy
-from transformers import pipeline
 from langdetect import detect, LangDetectException
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Tuple
+import hashlib
 import logging
+import time
+from app.core.cache import ExpiringLRUCache, SingleFlight
+from app.core.config import settings
+from app.services.model_store import model_store
+from app.services.near_duplicate_index import NearDuplicateIndex, fingerprint, negation_signature
+from app.services.text_normalizer import text_normalizer
 from app.models.schemas import (
     SentimentLabel, SentimentScore, SentimentResult,
     EmotionLabel, EmotionScore, EmotionResult,
-    ModelType
+    AspectSentiment, ModelType
 )
 
 logger = logging.getLogger(__name__)
 
+SPACY_MODELS = {
+    "en": "en_core_web_sm",
+    "pt": "pt_core_news_sm",
+    "es": "es_core_news_sm"
+}
+
+# Aspect extraction needs entities, POS tags and the parse (noun chunks and sentences), not lemmas
+SPACY_EXCLUDE = ["lemmatizer"]
+
+MODEL_NAMES = {
+    ModelType.NLTK: "NLTK (VADER)",
+    ModelType.SPACY: "spaCy + Transformers (BERT)",
+    ModelType.TRANSFORMERS: "Transformers (BERT)"
+}
+
+# Transformers models by role: (pipeline task, hub model id)
+TRANSFORMERS_MODELS = {
+    "sentiment": ("sentiment-analysis", "distilbert-base-uncased-finetuned-sst-2-english"),
+    "emotion": ("text-classification", "j-hartmann/emotion-english-distilroberta-base"),
+    "multilingual": ("sentiment-analysis", "nlptown/bert-base-multilingual-uncased-sentiment")
+}
+
+# Loaded models each analysis mode runs on
+REQUIRED_MODELS = {
+    ModelType.NLTK: ("nltk",),
+    ModelType.SPACY: ("spacy", "transformers"),
+    ModelType.TRANSFORMERS: ("transformers",)
+}
+
+WARM_UP_TEXT = "Warming up the model."
+
+
+class ModelNotReadyError(Exception):
+    """Raised when an analysis needs a model that is not loaded"""
+
 
 class SentimentAnalyzer:
+    """
+    Sentiment and emotion analysis over NLTK, spaCy and Transformers.
+
+    Creating the analyzer is cheap; the heavy libraries are imported and
+    the models loaded by load_models, which the app runs in the background
+    after startup.
+    """
+
     def __init__(self):
         self.models_loaded = {
             "nltk": False,
             "spacy": False,
             "transformers": False
         }
-        self._init_models()
+        # Loading progress of each model: pending, loading, warming_up, ready or failed
+        self.model_status = {name: {"status": "pending"} for name in self.models_loaded}
+        self.spacy_models = {}
+        # Predictions by cache_key, shared by all requests of the worker
+        self.result_cache = ExpiringLRUCache(max_size=settings.RESULT_CACHE_SIZE)
+        # Fingerprints of the cached results, for requests accepting approximate ones
+        self.near_duplicates = NearDuplicateIndex()
+        # Predictions running in some thread, by cache_key
+        self.in_flight = SingleFlight()
 
-    def _init_models(self):
-        """Initialize all NLP models"""
-        try:
-            # NLTK
-            self.sia = SentimentIntensityAnalyzer()
-            self.models_loaded["nltk"] = True
-            logger.info("NLTK model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load NLTK model: {e}")
+    def load_models(self):
+        """Load and warm up every model, the default one first. Blocking, run it in a thread"""
+        # langdetect reads its language profiles on first use
+        self.detect_language(WARM_UP_TEXT)
 
-        try:
-            # spaCy models for different languages
-            self.spacy_models = {
-                "en": spacy.load("en_core_web_sm"),
-                "pt": spacy.load("pt_core_news_sm"),
-                "es": spacy.load("es_core_news_sm")
-            }
-            self.models_loaded["spacy"] = True
-            logger.info("spaCy models loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load spaCy models: {e}")
-            self.spacy_models = {}
+        loaders = {
+            "nltk": self._load_nltk,
+            "spacy": self._load_spacy,
+            "transformers": self._load_transformers
+        }
+        order = sorted(loaders, key=lambda name: name != settings.DEFAULT_MODEL)
 
-        try:
-            # Transformers pipelines
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model="distilbert-base-uncased-finetuned-sst-2-english"
-            )
+        for name in order:
+            status = self.model_status[name]
+            started = time.perf_counter()
+            try:
+                status["status"] = "loading"
+                warm_up = loaders[name]()
 
-            self.emotion_pipeline = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                top_k=None
-            )
+                status["status"] = "warming_up"
+                warm_up()
+
+                self.models_loaded[name] = True
+                status["status"] = "ready"
+                logger.info(f"{name} model loaded successfully")
+            except Exception as e:
+                status["status"] = "failed"
+                status["error"] = str(e)
+                logger.error(f"Failed to load {name} model: {e}")
+            status["seconds"] = round(time.perf_counter() - started, 2)
+
+    def is_ready(self) -> bool:
+        """Whether the default model can serve requests"""
+        return self.models_loaded.get(settings.DEFAULT_MODEL, False)
+
+    def _require(self, model: ModelType):
+        """Raise ModelNotReadyError unless the models behind model are loaded"""
+        for name in REQUIRED_MODELS[model]:
+            if not self.models_loaded[name]:
+                raise ModelNotReadyError(f"The {name} model is {self.model_status[name]['status']}")
 
-            # Multilingual sentiment
-            self.multilingual_pipeline = pipeline(
-                "sentiment-analysis",
-                model="nlptown/bert-base-multilingual-uncased-sentiment"
+    def _load_nltk(self) -> Callable:
+        from nltk.sentiment import SentimentIntensityAnalyzer
+        from app.services.vader_engine import VaderEngine
+
+        self.sia = SentimentIntensityAnalyzer()
+        self.vader = VaderEngine(self.sia.lexicon)
+        return lambda: self.vader.polarity_scores(WARM_UP_TEXT)
+
+    def _load_spacy(self) -> Callable:
+        import spacy
+
+        # spaCy models for different languages
+        spacy_models = {
+            language: spacy.load(name, exclude=SPACY_EXCLUDE)
+            for language, name in SPACY_MODELS.items()
+        }
+        self.spacy_models = spacy_models
+
+        def warm_up():
+            for nlp in spacy_models.values():
+                list(nlp.pipe([WARM_UP_TEXT]))
+        return warm_up
+
+    def _load_transformers(self) -> Callable:
+        # Transformers pipelines
+        self.sentiment_pipeline = self._pipeline("sentiment")
+        self.emotion_pipeline = self._pipeline("emotion", top_k=None)
+
+        # Multilingual sentiment
+        self.multilingual_pipeline = self._pipeline("multilingual")
+
+        def warm_up():
+            pipelines = (
+                self.sentiment_pipeline,
+                self.emotion_pipeline,
+                self.multilingual_pipeline,
             )
+            for pipe in pipelines:
+                pipe(WARM_UP_TEXT)
+        return warm_up
+
+    @staticmethod
+    def _pipeline(name: str, **kwargs):
+        """Pipeline of a configured model, from its local snapshot when one was exported"""
+        task, model_id = TRANSFORMERS_MODELS[name]
+
+        snapshot = model_store.current(model_id)
+        if snapshot:
+            logger.info(f"Loading {model_id} from {snapshot}")
+            return model_store.load_pipeline(snapshot, task, **kwargs)
+
+        if settings.MODEL_STORE_OFFLINE:
+            raise FileNotFoundError(f"No snapshot of {model_id} in {model_store.root}")
 
-            self.models_loaded["transformers"] = True
-            logger.info("Transformers models loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load Transformers models: {e}")
+        from transformers import pipeline
+
+        logger.warning(
+            f"No snapshot of {model_id} in {model_store.root}, "
+            "loading it from the Hugging Face hub"
+        )
+        return pipeline(task, model=model_id, **kwargs)
 
     def detect_language(self, text: str) -> str:
         """Detect language of the text"""
@@ -78,10 +188,9 @@ class SentimentAnalyzer:
         except LangDetectException:
             return "en"  # Default to English
 
-    def analyze_sentiment_nltk(self, text: str, language: str) -> Dict:
-        """Analyze sentiment using NLTK (VADER)"""
-        scores = self.sia.polarity_scores(text)
-
+    @staticmethod
+    def _vader_result(scores: Dict[str, float]) -> Dict:
+        """Convert VADER scores to label, scores and confidence"""
         # Determine label
         if scores['compound'] >= 0.05:
             label = SentimentLabel.POSITIVE
@@ -100,11 +209,15 @@ class SentimentAnalyzer:
             "confidence": abs(scores['compound'])
         }
 
-    def analyze_sentiment_transformers(self, text: str, language: str) -> Dict:
-        """Analyze sentiment using Transformers"""
-        # Use multilingual model for non-English texts
+    def analyze_sentiment_nltk_batch(self, texts: List[str]) -> List[Dict]:
+        """Analyze sentiment of many texts using the batch VADER engine"""
+        return [self._vader_result(scores) for scores in self.vader.polarity_scores_batch(texts)]
+
+    @staticmethod
+    def _transformers_result(result: Dict, language: str) -> Dict:
+        """Convert a Transformers prediction to label, scores and confidence"""
+        # Multilingual model predicts a 5-star rating for non-English texts
         if language != "en":
-            result = self.multilingual_pipeline(text)[0]
             # Convert 5-star rating to sentiment
             stars = int(result['label'].split()[0])
             if stars >= 4:
@@ -122,7 +235,6 @@ class SentimentAnalyzer:
 
             neutral_score = 1.0 - pos_score - neg_score
         else:
-            result = self.sentiment_pipeline(text)[0]
             label_map = {
                 "POSITIVE": SentimentLabel.POSITIVE,
                 "NEGATIVE": SentimentLabel.NEGATIVE
@@ -148,54 +260,296 @@ class SentimentAnalyzer:
             "confidence": max(pos_score, neg_score, neutral_score)
         }
 
-    def analyze_sentiment(
+    def analyze_sentiment_transformers_batch(
         self,
+        texts: List[str],
+        languages: List[str]
+    ) -> List[Dict]:
+        """Analyze sentiment using Transformers, one batched call per model"""
+        results = [None] * len(texts)
+
+        english = [idx for idx, language in enumerate(languages) if language == "en"]
+        other = [idx for idx, language in enumerate(languages) if language != "en"]
+
+        pipes = ((self.sentiment_pipeline, english), (self.multilingual_pipeline, other))
+        for pipe, indices in pipes:
+            if not indices:
+                continue
+
+            predictions = pipe(
+                [texts[idx] for idx in indices], batch_size=settings.MODEL_BATCH_SIZE
+            )
+            for idx, prediction in zip(indices, predictions):
+                results[idx] = self._transformers_result(prediction, languages[idx])
+
+        return results
+
+    @staticmethod
+    def _aspects(doc) -> List[Dict]:
+        """Entities, plus the noun chunks that are not part of one, with their sentence"""
+        spans = [(ent, ent.label_) for ent in doc.ents]
+        covered = {token.i for ent in doc.ents for token in ent}
+        spans += [
+            (chunk, "NOUN_CHUNK") for chunk in doc.noun_chunks
+            if chunk.root.pos_ != "PRON" and not any(token.i in covered for token in chunk)
+        ]
+
+        return [
+            {
+                "text": span.text,
+                "type": span_type,
+                "start": span.start_char,
+                "end": span.end_char,
+                "sentence": span.sent.text
+            }
+            for span, span_type in sorted(spans, key=lambda item: item[0].start_char)
+        ]
+
+    def extract_aspects_batch(self, texts: List[str], languages: List[str]) -> List[List[Dict]]:
+        """Aspects of many texts, one nlp.pipe stream per language"""
+        aspects = [[] for _ in texts]
+
+        for language, nlp in self.spacy_models.items():
+            indices = [idx for idx, other in enumerate(languages) if other == language]
+            if not indices:
+                continue
+
+            docs = nlp.pipe(
+                (texts[idx] for idx in indices),
+                batch_size=settings.SPACY_BATCH_SIZE,
+                n_process=settings.SPACY_PROCESSES
+            )
+            for idx, doc in zip(indices, docs):
+                aspects[idx] = self._aspects(doc)
+
+        return aspects
+
+    def analyze_sentiment_spacy_batch(self, texts: List[str], languages: List[str]) -> List[Dict]:
+        """
+        Document and aspect-level sentiment of many texts.
+
+        spaCy extracts entities and noun chunks; each aspect takes the
+        sentiment of its sentence. The texts and their distinct aspect
+        sentences are scored by the Transformers models in one batched pass.
+        """
+        aspects = self.extract_aspects_batch(texts, languages)
+
+        inputs = {}
+        for text, language, text_aspects in zip(texts, languages, aspects):
+            inputs.setdefault((text, language))
+            for aspect in text_aspects:
+                inputs.setdefault((aspect["sentence"], language))
+
+        keys = list(inputs)
+        predictions = dict(zip(keys, self.analyze_sentiment_transformers_batch(
+            [text for text, _ in keys],
+            [language for _, language in keys]
+        )))
+
+        results = []
+        for text, language, text_aspects in zip(texts, languages, aspects):
+            result = dict(predictions[(text, language)])
+            result["aspects"] = [
+                AspectSentiment(**aspect, **predictions[(aspect["sentence"], language)])
+                for aspect in text_aspects
+            ]
+            results.append(result)
+
+        return results
+
+    @staticmethod
+    def _sentiment_result(
         text: str,
-        language: Optional[str] = None,
-        model: Optional[ModelType] = None
+        result: Dict,
+        language: str,
+        model_used: str,
+        approximate: bool = False
     ) -> SentimentResult:
-        """Main sentiment analysis method"""
-        # Detect language if not provided
-        if language is None:
-            language = self.detect_language(text)
-
-        # Select model
-        model_type = model or ModelType.TRANSFORMERS
-
-        # Analyze based on selected model
-        if model_type == ModelType.NLTK:
-            result = self.analyze_sentiment_nltk(text, language)
-            model_used = "NLTK (VADER)"
-        elif model_type == ModelType.TRANSFORMERS:
-            result = self.analyze_sentiment_transformers(text, language)
-            model_used = "Transformers (BERT)"
-        else:
-            # Default to transformers
-            result = self.analyze_sentiment_transformers(text, language)
-            model_used = "Transformers (BERT)"
-
+        """Build the API result for a sentiment prediction"""
         return SentimentResult(
             text=text[:100] + "..." if len(text) > 100 else text,
             label=result["label"],
             scores=result["scores"],
             confidence=result["confidence"],
             language=language,
-            model_used=model_used
+            model_used=model_used,
+            aspects=result.get("aspects"),
+            approximate=approximate
         )
 
-    def analyze_emotions(
+    @staticmethod
+    def cache_key(text: str, language: str, model: str) -> str:
+        """Result cache key of a normalized text"""
+        return hashlib.sha256(f"{model}\0{language}\0{text}".encode()).hexdigest()
+
+    def _prepare(
+        self,
+        texts: List[str],
+        languages: Optional[List[Optional[str]]]
+    ) -> Tuple[List[str], List[str]]:
+        """Normalized texts, and their languages detected on the normalized text when missing"""
+        normalized = [text_normalizer.normalize(text) for text in texts]
+        languages = languages or [None] * len(texts)
+        languages = [
+            language or self.detect_language(text)
+            for text, language in zip(normalized, languages)
+        ]
+        return normalized, languages
+
+    @staticmethod
+    def _near_namespace(model: str, text: str, language: str) -> str:
+        """Near-duplicates only share results within a model, language and set of negations"""
+        return f"{model}\0{language}\0{negation_signature(text)}"
+
+    def _cached(
+        self,
+        model: str,
+        texts: List[str],
+        languages: List[str],
+        predict: Callable[[List[str], List[str]], List],
+        approximate: bool = False
+    ) -> Tuple[List, List[bool]]:
+        """
+        predict(texts, languages), called once per distinct text not in the result cache.
+
+        A text another thread is already predicting is waited on instead of
+        predicted again. With approximate, a text missing from the cache
+        takes the cached result of its nearest near-duplicate instead, if
+        one is close enough. Returns the predictions and whether each one
+        is approximate.
+        """
+        keys = [self.cache_key(text, language, model) for text, language in zip(texts, languages)]
+        caching = settings.ENABLE_CACHING
+
+        results = {}
+        if caching:
+            for key in set(keys):
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    results[key] = cached
+
+        missing: Dict[str, int] = {}
+        for idx, key in enumerate(keys):
+            if key not in results:
+                missing.setdefault(key, idx)
+
+        fingerprints = {}
+        if caching and missing:
+            fingerprints = {key: fingerprint(texts[idx]) for key, idx in missing.items()}
+
+        approximated = set()
+        if approximate and fingerprints:
+            for key, idx in list(missing.items()):
+                if fingerprints[key] is None:
+                    continue
+
+                namespace = self._near_namespace(model, texts[idx], languages[idx])
+                match = self.near_duplicates.find(namespace, fingerprints[key])
+                cached = self.result_cache.get(match) if match is not None else None
+                if cached is None:
+                    if match is not None:
+                        self.near_duplicates.discard(match)
+                    continue
+
+                # Not cached under its own key, later exact lookups still run the model
+                results[key] = cached
+                approximated.add(key)
+                del missing[key]
+
+        waiting = self.in_flight.claim(missing)
+        for key in waiting:
+            del missing[key]
+
+        if missing:
+            # Waiters must never be left hanging, whatever goes wrong
+            try:
+                indices = list(missing.values())
+                predictions = predict(
+                    [texts[idx] for idx in indices], [languages[idx] for idx in indices]
+                )
+
+                expires_at = time.time() + settings.CACHE_TTL
+                for (key, idx), prediction in zip(missing.items(), predictions):
+                    results[key] = prediction
+                    if caching:
+                        self.result_cache.put(key, prediction, expires_at)
+                        if fingerprints[key] is not None:
+                            self.near_duplicates.add(
+                                self._near_namespace(model, texts[idx], languages[idx]),
+                                key,
+                                fingerprints[key]
+                            )
+
+                predicted = {key: results[key] for key in missing}
+            except BaseException as e:
+                self.in_flight.fail(missing, e)
+                raise
+
+            self.in_flight.resolve(predicted)
+
+        # Only waited on after resolving our own keys, so two batches leading
+        # each other's texts cannot deadlock
+        for key, future in waiting.items():
+            results[key] = future.result()
+
+        return [results[key] for key in keys], [key in approximated for key in keys]
+
+    def analyze_sentiment(
         self,
         text: str,
-        language: Optional[str] = None
-    ) -> EmotionResult:
-        """Analyze emotions in text"""
-        if language is None:
-            language = self.detect_language(text)
+        language: Optional[str] = None,
+        model: Optional[ModelType] = None,
+        approximate: bool = False
+    ) -> SentimentResult:
+        """Main sentiment analysis method"""
+        return self.analyze_sentiment_batch([text], [language], model, approximate)[0]
+
+    def analyze_sentiment_batch(
+        self,
+        texts: List[str],
+        languages: Optional[List[Optional[str]]] = None,
+        model: Optional[ModelType] = None,
+        approximate: bool = False
+    ) -> List[SentimentResult]:
+        """
+        Analyze many texts with one batched model call.
 
-        # Use emotion pipeline
-        results = self.emotion_pipeline(text)[0]
+        The models, language detection and result cache see the normalized
+        texts; the results show the original ones. With approximate, the
+        cached results of near-duplicate texts may be reused.
+        """
+        model = ModelType(model or ModelType.TRANSFORMERS)
+        self._require(model)
+        normalized, languages = self._prepare(texts, languages)
+
+        if model == ModelType.NLTK:
+            def predict(batch, _):
+                return self.analyze_sentiment_nltk_batch(batch)
+        elif model == ModelType.SPACY:
+            predict = self.analyze_sentiment_spacy_batch
+        else:
+            predict = self.analyze_sentiment_transformers_batch
 
-        # Map emotions
+        # spaCy aspects carry offsets into their own text, so they are never reused approximately
+        approximate = approximate and model != ModelType.SPACY
+        results, approximated = self._cached(
+            model.value, normalized, languages, predict, approximate
+        )
+
+        return [
+            self._sentiment_result(text, result, language, MODEL_NAMES[model], is_approximate)
+            for text, result, language, is_approximate
+            in zip(texts, results, languages, approximated)
+        ]
+
+    @staticmethod
+    def _emotion_result(
+        text: str,
+        results: List[Dict],
+        language: str,
+        approximate: bool = False
+    ) -> EmotionResult:
+        """Map RoBERTa emotion scores to the API emotions"""
         emotion_map = {
             "joy": 0.0,
             "sadness": 0.0,
@@ -227,21 +581,57 @@ class SentimentAnalyzer:
             scores=EmotionScore(**emotion_map),
             confidence=primary[1],
             language=language,
-            model_used="Transformers (RoBERTa)"
+            model_used="Transformers (RoBERTa)",
+            approximate=approximate
+        )
+
+    def analyze_emotions(
+        self,
+        text: str,
+        language: Optional[str] = None,
+        approximate: bool = False
+    ) -> EmotionResult:
+        """Analyze emotions in text"""
+        return self.analyze_emotions_batch([text], [language], approximate)[0]
+
+    def analyze_emotions_batch(
+        self,
+        texts: List[str],
+        languages: Optional[List[Optional[str]]] = None,
+        approximate: bool = False
+    ) -> List[EmotionResult]:
+        """Analyze emotions of many texts with one batched model call"""
+        self._require(ModelType.TRANSFORMERS)
+        normalized, languages = self._prepare(texts, languages)
+
+        predictions, approximated = self._cached(
+            "emotion",
+            normalized,
+            languages,
+            lambda batch, _: self.emotion_pipeline(batch, batch_size=settings.MODEL_BATCH_SIZE),
+            approximate
         )
 
+        return [
+            self._emotion_result(text, prediction, language, is_approximate)
+            for text, prediction, language, is_approximate
+            in zip(texts, predictions, languages, approximated)
+        ]
+
     def analyze_batch(
         self,
         texts: List[str],
         language: Optional[str] = None,
-        model: Optional[ModelType] = None
+        model: Optional[ModelType] = None,
+        approximate: bool = False
     ) -> List[SentimentResult]:
         """Analyze multiple texts"""
-        results = []
-        for text in texts:
-            result = self.analyze_sentiment(text, language, model)
-            results.append(result)
-        return results
+        return self.analyze_sentiment_batch(texts, [language] * len(texts), model, approximate)
+
+    def shutdown(self):
+        """Stop the VADER worker processes"""
+        if self.models_loaded["nltk"]:
+            self.vader.shutdown()
 
 
 # Global instance
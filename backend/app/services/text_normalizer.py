@@ -0,0 +1,65 @@
+from functools import lru_cache
+from typing import Dict, Optional
+from app.core.config import settings
+import re
+
+# One alternation, so each text is scanned once; the first matching branch wins
+SOCIAL_PATTERN = re.compile(
+    r"(?P<url>(?:https?://|www\.)\S+\s*)"
+    r"|(?P<mention>(?<!\w)@\w+)"
+    r"|(?<!\w)#(?P<hashtag>\w+)"
+    r"|(?P<entity>&(?:amp|lt|gt|quot|#39);)"
+    r"|(?P<repeat>(?P<char>[^\s\d])(?P=char){3,})"
+    r"|(?P<space>\s+)",
+    re.IGNORECASE
+)
+
+HTML_ENTITIES = {"&amp;": "&", "&lt;": "<", "&gt;": ">", "&quot;": '"', "&#39;": "'"}
+
+# Longest run of one repeated character kept, so "soooooo" still reads as emphasis
+MAX_REPEAT = 3
+
+
+def _replace(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == "url":
+        return ""
+    if kind == "mention":
+        return "@user"
+    if kind == "hashtag":
+        return match.group("hashtag")
+    if kind == "entity":
+        return HTML_ENTITIES[match.group("entity").lower()]
+    if kind == "space":
+        return " "
+    return match.group("char") * MAX_REPEAT
+
+
+class TextNormalizer:
+    """
+    Normalization of social media text before analysis.
+
+    Drops URLs, replaces mentions with @user, strips the # of hashtags,
+    unescapes HTML entities, caps runs of a repeated character (letters,
+    punctuation or emoji, not digits) and collapses whitespace. Results
+    are memoized, so retweets and repeated texts are normalized once.
+    """
+
+    def __init__(self, cache_size: Optional[int] = None):
+        cache = lru_cache(maxsize=cache_size or settings.NORMALIZER_CACHE_SIZE)
+        self.normalize = cache(self._normalize)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalized text, or the original when nothing would be left"""
+        normalized = SOCIAL_PATTERN.sub(_replace, text).strip()
+        return normalized or text
+
+    def stats(self) -> Dict:
+        """Memo size and hit counters"""
+        info = self.normalize.cache_info()
+        return {"size": info.currsize, "hits": info.hits, "misses": info.misses}
+
+
+# Global instance
+text_normalizer = TextNormalizer()
@@ -0,0 +1,202 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+import asyncio
+import logging
+import time
+import tweepy
+
+logger = logging.getLogger(__name__)
+
+# search_recent_tweets accepts 10 to 100 results per page
+MIN_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# Wait used when a 429 carries no x-rate-limit-reset header
+DEFAULT_RATE_LIMIT_WAIT = 60
+
+TWEET_FIELDS = ['created_at', 'public_metrics', 'lang']
+EXPANSIONS = ['author_id']
+USER_FIELDS = ['username', 'name']
+
+_DONE = object()
+
+
+def format_tweets(response) -> List[Dict]:
+    """Format a search response page into tweet dicts"""
+    if not response.data:
+        return []
+
+    includes = response.includes or {}
+    users = {user.id: user for user in includes.get('users', [])}
+    results = []
+
+    for tweet in response.data:
+        author = users.get(tweet.author_id)
+        metrics = tweet.public_metrics or {}
+        results.append({
+            'id': tweet.id,
+            'text': tweet.text,
+            'created_at': str(tweet.created_at),
+            'lang': tweet.lang,
+            'author': {
+                'username': author.username if author else 'unknown',
+                'name': author.name if author else 'unknown'
+            },
+            'metrics': {
+                'likes': metrics.get('like_count', 0),
+                'retweets': metrics.get('retweet_count', 0),
+                'replies': metrics.get('reply_count', 0)
+            }
+        })
+
+    return results
+
+
+class TweetFetcher:
+    """
+    Paginated recent-tweet search shared by every query on this worker.
+
+    Pages of one query are sequential because each needs the previous
+    next_token, so concurrency comes from overlapping analysis with the
+    next download and from running several queries at once. A 429 pauses
+    all requests until the window resets instead of retrying blindly.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None
+    ):
+        self.client = client
+        self.max_retries = settings.TWITTER_MAX_RETRIES if max_retries is None else max_retries
+        self.semaphore = asyncio.Semaphore(max_concurrency or settings.TWITTER_CONCURRENCY)
+        self.resume_at = 0.0
+        self.metrics = {"requests": 0, "rate_limited": 0, "tweets": 0}
+
+    async def _search(self, **params):
+        """One search request, waiting out the rate limit window on 429"""
+        for attempt in range(self.max_retries + 1):
+            delay = self.resume_at - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            async with self.semaphore:
+                try:
+                    self.metrics["requests"] += 1
+                    return await asyncio.to_thread(self.client.search_recent_tweets, **params)
+                except tweepy.TooManyRequests as e:
+                    self.metrics["rate_limited"] += 1
+                    if attempt == self.max_retries:
+                        raise
+
+                    headers = e.response.headers if e.response is not None else {}
+                    reset = headers.get("x-rate-limit-reset")
+                    resume_at = float(reset) if reset else time.time() + DEFAULT_RATE_LIMIT_WAIT
+                    self.resume_at = max(self.resume_at, resume_at)
+                    wait = self.resume_at - time.time()
+                    logger.warning(f"Twitter rate limit hit, resuming in {wait:.0f}s")
+
+    async def iter_pages(
+        self,
+        query: str,
+        max_results: int,
+        since_id: Optional[int] = None,
+        until_id: Optional[int] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield pages of formatted tweets between since_id and until_id.
+
+        Follows next_token until max_results tweets were yielded.
+        """
+        next_token = None
+        collected = 0
+
+        while collected < max_results:
+            params = {
+                "query": query,
+                "max_results": max(MIN_PAGE_SIZE, min(MAX_PAGE_SIZE, max_results - collected)),
+                "tweet_fields": TWEET_FIELDS,
+                "expansions": EXPANSIONS,
+                "user_fields": USER_FIELDS,
+            }
+            if since_id:
+                params["since_id"] = since_id
+            if until_id:
+                params["until_id"] = until_id
+            if next_token:
+                params["next_token"] = next_token
+
+            response = await self._search(**params)
+
+            tweets = format_tweets(response)[:max_results - collected]
+            if tweets:
+                collected += len(tweets)
+                self.metrics["tweets"] += len(tweets)
+                yield tweets
+
+            next_token = (response.meta or {}).get("next_token")
+            if not next_token:
+                break
+
+    async def search(
+        self,
+        query: str,
+        max_results: int,
+        since_id: Optional[int] = None,
+        until_id: Optional[int] = None
+    ) -> List[Dict]:
+        """Up to max_results of the newest tweets between since_id and until_id, across pages"""
+        tweets = []
+        async for page in self.iter_pages(query, max_results, since_id, until_id):
+            tweets.extend(page)
+        return tweets
+
+    async def pipeline(
+        self,
+        query: str,
+        max_results: int,
+        analyze: Callable[[List[Dict]], List[Dict]],
+        prefetch: Optional[int] = None,
+        runner: Optional[Callable[..., Awaitable[List[Dict]]]] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield analyze(page) for each page while later pages keep downloading.
+
+        Each page is analyzed by awaiting runner(analyze, page), a thread of
+        its own by default.
+        """
+        runner = runner or asyncio.to_thread
+        queue: asyncio.Queue = asyncio.Queue(maxsize=prefetch or settings.TWITTER_PREFETCH_PAGES)
+
+        async def produce():
+            try:
+                async for page in self.iter_pages(query, max_results):
+                    await queue.put(page)
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(_DONE)
+
+        producer = asyncio.create_task(produce())
+
+        try:
+            while True:
+                page = await queue.get()
+                if page is _DONE:
+                    break
+                if isinstance(page, Exception):
+                    raise page
+
+                # Models are synchronous, keep them off the event loop
+                yield await runner(analyze, page)
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        """Request and rate limit counters"""
+        return {**self.metrics, "rate_limited_until": max(0.0, self.resume_at - time.time())}
@@ -1,17 +1,35 @@
 import tweepy
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 import logging
+import numpy as np
 from app.core.config import settings
 from app.services.sentiment_analyzer import sentiment_analyzer
-from app.models.schemas import TwitterAnalysisResult, SentimentScore
+from app.services.inference_scheduler import inference_scheduler
+from app.services.tweet_fetcher import TweetFetcher
+from app.models.schemas import TwitterAnalysisResult, SentimentScore, Priority
 
 logger = logging.getLogger(__name__)
 
+SENTIMENT_LABELS = ["positive", "negative", "neutral"]
+EMOTION_LABELS = ["joy", "sadness", "anger", "fear", "surprise", "love"]
+
+# Twitter lang values that carry no language (undetermined, media only, hashtags only...)
+UNDETERMINED_LANGS = {"und", "zxx", "qam", "qct", "qht", "qme", "qst"}
+
+
+def tweet_language(tweet: Dict) -> Optional[str]:
+    """Language Twitter detected for a tweet, None when undetermined"""
+    lang = tweet.get('lang')
+    if not lang or lang in UNDETERMINED_LANGS:
+        return None
+    return lang
+
 
 class TwitterService:
     def __init__(self):
         self.client = None
         self.api = None
+        self.fetcher = None
         self._init_client()
 
     def _init_client(self):
@@ -24,160 +42,142 @@ class TwitterService:
                     consumer_secret=settings.TWITTER_API_SECRET,
                     access_token=settings.TWITTER_ACCESS_TOKEN,
                     access_token_secret=settings.TWITTER_ACCESS_SECRET,
-                    wait_on_rate_limit=True
+                    # The fetcher waits out 429s without holding a thread
+                    wait_on_rate_limit=False
                 )
+                self.fetcher = TweetFetcher(self.client)
                 logger.info("Twitter client initialized successfully")
             else:
                 logger.warning("Twitter credentials not configured")
         except Exception as e:
             logger.error(f"Failed to initialize Twitter client: {e}")
 
-    def search_tweets(
+    async def search_tweets(
         self,
         query: str,
         max_results: int = 10,
         language: Optional[str] = None
     ) -> List[Dict]:
-        """Search tweets by query"""
-        if not self.client:
+        """Search tweets by query, following pagination up to max_results"""
+        if not self.fetcher:
             raise ValueError("Twitter client not initialized. Please configure API credentials.")
 
         try:
-            # Search recent tweets
-            tweets = self.client.search_recent_tweets(
-                query=query,
-                max_results=min(max_results, 100),
-                tweet_fields=['created_at', 'public_metrics', 'lang'],
-                expansions=['author_id'],
-                user_fields=['username', 'name']
-            )
+            return await self.fetcher.search(query, max_results)
+        except Exception as e:
+            logger.error(f"Error searching tweets: {e}")
+            raise
 
-            if not tweets.data:
-                return []
-
-            # Format tweets
-            users = {user.id: user for user in tweets.includes.get('users', [])}
-            results = []
-
-            for tweet in tweets.data:
-                author = users.get(tweet.author_id)
-                results.append({
-                    'id': tweet.id,
-                    'text': tweet.text,
-                    'created_at': str(tweet.created_at),
-                    'lang': tweet.lang,
-                    'author': {
-                        'username': author.username if author else 'unknown',
-                        'name': author.name if author else 'unknown'
+    def _analyze_page(
+        self,
+        tweets: List[Dict],
+        language: Optional[str] = None,
+        seen: Optional[Dict[str, Tuple]] = None
+    ) -> List[Dict]:
+        """Analyze a page of tweets with one batched pass per model over unseen texts"""
+        seen = {} if seen is None else seen
+
+        # Retweets and copies share their text, analyze each text once
+        pending = {}
+        for tweet in tweets:
+            if tweet['text'] not in seen and tweet['text'] not in pending:
+                pending[tweet['text']] = language or tweet_language(tweet)
+
+        if pending:
+            texts = list(pending)
+            languages = list(pending.values())
+
+            sentiments = sentiment_analyzer.analyze_sentiment_batch(texts, languages)
+            emotions = sentiment_analyzer.analyze_emotions_batch(texts, languages)
+
+            for text, sentiment_result, emotion_result in zip(texts, sentiments, emotions):
+                seen[text] = (
+                    {
+                        'label': sentiment_result.label.value,
+                        'confidence': sentiment_result.confidence,
+                        'scores': {
+                            'positive': sentiment_result.scores.positive,
+                            'negative': sentiment_result.scores.negative,
+                            'neutral': sentiment_result.scores.neutral
+                        }
                     },
-                    'metrics': {
-                        'likes': tweet.public_metrics.get('like_count', 0),
-                        'retweets': tweet.public_metrics.get('retweet_count', 0),
-                        'replies': tweet.public_metrics.get('reply_count', 0)
+                    {
+                        'label': emotion_result.primary_emotion.value,
+                        'confidence': emotion_result.confidence
                     }
-                })
+                )
 
-            return results
+        analyzed_tweets = []
+        for tweet in tweets:
+            sentiment, emotion = seen[tweet['text']]
+            analyzed_tweets.append({**tweet, 'sentiment': sentiment, 'emotion': emotion})
 
-        except Exception as e:
-            logger.error(f"Error searching tweets: {e}")
-            raise
+        return analyzed_tweets
+
+    @staticmethod
+    def _aggregate(tweets: List[Dict]) -> Tuple[Dict[str, int], Dict[str, int], SentimentScore]:
+        """Sentiment and emotion distributions plus average scores"""
+        if not tweets:
+            return (
+                dict.fromkeys(SENTIMENT_LABELS, 0),
+                dict.fromkeys(EMOTION_LABELS, 0),
+                SentimentScore(positive=0.0, negative=0.0, neutral=0.0)
+            )
+
+        sentiment_labels = np.array([tweet['sentiment']['label'] for tweet in tweets])
+        emotion_labels = np.array([tweet['emotion']['label'] for tweet in tweets])
+        scores = np.array(
+            [[tweet['sentiment']['scores'][key] for key in SENTIMENT_LABELS] for tweet in tweets],
+            dtype=float
+        )
+
+        # One column per label, counted in a single comparison
+        sentiment_totals = (sentiment_labels[:, None] == SENTIMENT_LABELS).sum(axis=0)
+        emotion_totals = (emotion_labels[:, None] == EMOTION_LABELS).sum(axis=0)
+        averages = scores.mean(axis=0)
 
-    def analyze_tweets(
+        sentiment_counts = dict(zip(SENTIMENT_LABELS, map(int, sentiment_totals)))
+        emotion_counts = dict(zip(EMOTION_LABELS, map(int, emotion_totals)))
+
+        return sentiment_counts, emotion_counts, SentimentScore(
+            positive=float(averages[0]),
+            negative=float(averages[1]),
+            neutral=float(averages[2])
+        )
+
+    async def analyze_tweets(
         self,
         query: str,
         max_results: int = 10,
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        on_page: Optional[Callable[[List[Dict]], None]] = None,
+        priority: Priority = Priority.BATCH
     ) -> TwitterAnalysisResult:
-        """Search and analyze sentiment of tweets"""
-        # Search tweets
-        tweets = self.search_tweets(query, max_results, language)
-
-        if not tweets:
-            return TwitterAnalysisResult(
-                query=query,
-                total_tweets=0,
-                sentiment_distribution={
-                    "positive": 0,
-                    "negative": 0,
-                    "neutral": 0
-                },
-                emotion_distribution={
-                    "joy": 0,
-                    "sadness": 0,
-                    "anger": 0,
-                    "fear": 0,
-                    "surprise": 0,
-                    "love": 0
-                },
-                average_sentiment_scores=SentimentScore(
-                    positive=0.0,
-                    negative=0.0,
-                    neutral=0.0
-                ),
-                tweets=[]
-            )
-
-        # Analyze sentiments
-        sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
-        emotion_counts = {
-            "joy": 0, "sadness": 0, "anger": 0,
-            "fear": 0, "surprise": 0, "love": 0
-        }
-        total_scores = {"positive": 0.0, "negative": 0.0, "neutral": 0.0}
+        """Search and analyze sentiment of tweets, each page as it arrives at the given priority"""
+        if not self.fetcher:
+            raise ValueError("Twitter client not initialized. Please configure API credentials.")
 
+        # Shared across pages so repeated texts are analyzed once per query
+        seen = {}
         analyzed_tweets = []
-        for tweet in tweets:
-            # Sentiment analysis
-            sentiment_result = sentiment_analyzer.analyze_sentiment(
-                tweet['text'],
-                language=language
+        async for page in self.fetcher.pipeline(
+            query,
+            max_results,
+            lambda tweets: self._analyze_page(tweets, language, seen),
+            runner=lambda analyze, page: inference_scheduler.run(
+                priority, analyze, page, cost=len(page)
             )
+        ):
+            analyzed_tweets.extend(page)
+            if on_page:
+                on_page(page)
 
-            # Emotion analysis
-            emotion_result = sentiment_analyzer.analyze_emotions(
-                tweet['text'],
-                language=language
-            )
-
-            # Update counts
-            sentiment_counts[sentiment_result.label] += 1
-            emotion_counts[emotion_result.primary_emotion] += 1
-
-            # Update scores
-            total_scores["positive"] += sentiment_result.scores.positive
-            total_scores["negative"] += sentiment_result.scores.negative
-            total_scores["neutral"] += sentiment_result.scores.neutral
-
-            # Add analysis to tweet
-            analyzed_tweets.append({
-                **tweet,
-                'sentiment': {
-                    'label': sentiment_result.label,
-                    'confidence': sentiment_result.confidence,
-                    'scores': {
-                        'positive': sentiment_result.scores.positive,
-                        'negative': sentiment_result.scores.negative,
-                        'neutral': sentiment_result.scores.neutral
-                    }
-                },
-                'emotion': {
-                    'label': emotion_result.primary_emotion,
-                    'confidence': emotion_result.confidence
-                }
-            })
-
-        # Calculate averages
-        num_tweets = len(tweets)
-        avg_scores = SentimentScore(
-            positive=total_scores["positive"] / num_tweets,
-            negative=total_scores["negative"] / num_tweets,
-            neutral=total_scores["neutral"] / num_tweets
-        )
+        sentiment_counts, emotion_counts, avg_scores = self._aggregate(analyzed_tweets)
 
-        return TwitterAnalysisResult(
+        # Trusted: validating thousands of tweet dicts we just built only copies them
+        return TwitterAnalysisResult.model_construct(
             query=query,
-            total_tweets=num_tweets,
+            total_tweets=len(analyzed_tweets),
             sentiment_distribution=sentiment_counts,
             emotion_distribution=emotion_counts,
             average_sentiment_scores=avg_scores,
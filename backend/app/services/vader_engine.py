@@ -0,0 +1,317 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from nltk.sentiment.vader import VaderConstants
+from app.core.config import settings
+import logging
+import math
+import multiprocessing
+import re
+import string
+import sys
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.escape(string.punctuation)
+
+# A token made of a punctuation run plus a word of two or more characters, or the reverse
+LEADING_PUNCTUATION = re.compile(rf"([{_PUNCTUATION}]+)([^{_PUNCTUATION}]{{2,}})")
+TRAILING_PUNCTUATION = re.compile(rf"([^{_PUNCTUATION}]{{2,}})([{_PUNCTUATION}]+)")
+
+INTENSIFIERS_AFTER_NEVER = ("so", "this")
+
+
+class VaderEngine:
+    """
+    VADER scoring over a lexicon compiled once.
+
+    Gives the same scores as NLTK's SentimentIntensityAnalyzer, rule for
+    rule, including its quirks: a repeated word is scored as its first
+    occurrence, and idioms are matched case-sensitively. The speedups come
+    from work NLTK repeats per text: the punctuation map is replaced by two
+    precompiled patterns, each token is lowercased and classified once,
+    repeated words are scored once, and repeated texts in a batch too.
+    Large batches are split across a process pool.
+    """
+
+    def __init__(self, lexicon: Dict[str, float], workers: Optional[int] = None):
+        self.lexicon = {sys.intern(word): measure for word, measure in lexicon.items()}
+        self.boosters = {
+            sys.intern(word): scalar for word, scalar in VaderConstants.BOOSTER_DICT.items()
+        }
+        self.negations = frozenset(sys.intern(word) for word in VaderConstants.NEGATE)
+        self.idioms = dict(VaderConstants.SPECIAL_CASE_IDIOMS)
+        self.punctuation = frozenset(VaderConstants.PUNC_LIST)
+        self.workers = settings.VADER_WORKERS if workers is None else workers
+        self.pool: Optional[ProcessPoolExecutor] = None
+
+    def tokenize(self, text: str) -> List[str]:
+        """Split text into words and emoticons, dropping one leading or trailing punctuation run"""
+        tokens = []
+        for token in text.split():
+            if len(token) < 2:
+                continue
+
+            match = LEADING_PUNCTUATION.fullmatch(token)
+            if match and match.group(1) in self.punctuation:
+                token = match.group(2)
+            else:
+                match = TRAILING_PUNCTUATION.fullmatch(token)
+                if match and match.group(2) in self.punctuation:
+                    token = match.group(1)
+
+            tokens.append(token)
+        return tokens
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        """neg, neu, pos and compound scores of one text"""
+        if not isinstance(text, str):
+            text = str(text.encode("utf-8"))
+
+        words = self.tokenize(text)
+        lowers = [word.lower() for word in words]
+        uppers = [word.isupper() for word in words]
+
+        allcaps = sum(uppers)
+        is_cap_diff = 0 < len(words) - allcaps < len(words)
+
+        first_index: Dict[str, int] = {}
+        for idx, word in enumerate(words):
+            first_index.setdefault(word, idx)
+
+        # NLTK scores every occurrence of a word at its first index
+        valences: Dict[str, float] = {}
+        sentiments = []
+        for word in words:
+            if word not in valences:
+                valences[word] = self._valence(
+                    words, lowers, uppers, first_index[word], is_cap_diff
+                )
+            sentiments.append(valences[word])
+
+        if "but" in lowers:
+            but_index = lowers.index("but")
+            for idx, sentiment in enumerate(sentiments):
+                if idx < but_index:
+                    sentiments[idx] = sentiment * 0.5
+                elif idx > but_index:
+                    sentiments[idx] = sentiment * 1.5
+
+        return self._score(sentiments, text)
+
+    def _negated(self, lower: str) -> bool:
+        return lower in self.negations or "n't" in lower
+
+    def _valence(
+        self,
+        words: List[str],
+        lowers: List[str],
+        uppers: List[bool],
+        i: int,
+        is_cap_diff: bool
+    ):
+        """Valence of the word at index i, adjusted by the words before it"""
+        lower = lowers[i]
+        kind_of = i < len(words) - 1 and lower == "kind" and lowers[i + 1] == "of"
+        if kind_of or lower in self.boosters:
+            return 0
+
+        valence = 0
+        if lower not in self.lexicon:
+            return valence
+
+        valence = self.lexicon[lower]
+        if uppers[i] and is_cap_diff:
+            if valence > 0:
+                valence += VaderConstants.C_INCR
+            else:
+                valence -= VaderConstants.C_INCR
+
+        for start_i in range(0, 3):
+            previous = i - (start_i + 1)
+            if i > start_i and lowers[previous] not in self.lexicon:
+                scalar = self._scalar(lowers[previous], uppers[previous], valence, is_cap_diff)
+                if start_i == 1 and scalar != 0:
+                    scalar = scalar * 0.95
+                if start_i == 2 and scalar != 0:
+                    scalar = scalar * 0.9
+                valence = valence + scalar
+                valence = self._never_check(valence, words, lowers, start_i, i)
+                if start_i == 2:
+                    valence = self._idioms_check(valence, words, i)
+
+        return self._least_check(valence, lowers, i)
+
+    def _scalar(self, lower: str, upper: bool, valence: float, is_cap_diff: bool) -> float:
+        """Boost or dampening from a preceding booster word"""
+        scalar = 0.0
+        if lower in self.boosters:
+            scalar = self.boosters[lower]
+            if valence < 0:
+                scalar *= -1
+            if upper and is_cap_diff:
+                if valence > 0:
+                    scalar += VaderConstants.C_INCR
+                else:
+                    scalar -= VaderConstants.C_INCR
+        return scalar
+
+    def _never_check(
+        self,
+        valence: float,
+        words: List[str],
+        lowers: List[str],
+        start_i: int,
+        i: int
+    ) -> float:
+        if start_i == 0:
+            if self._negated(lowers[i - 1]):
+                valence = valence * VaderConstants.N_SCALAR
+        if start_i == 1:
+            if words[i - 2] == "never" and words[i - 1] in INTENSIFIERS_AFTER_NEVER:
+                valence = valence * 1.5
+            elif self._negated(lowers[i - 2]):
+                valence = valence * VaderConstants.N_SCALAR
+        if start_i == 2:
+            if (
+                words[i - 3] == "never" and words[i - 2] in INTENSIFIERS_AFTER_NEVER
+                or words[i - 1] in INTENSIFIERS_AFTER_NEVER
+            ):
+                valence = valence * 1.25
+            elif self._negated(lowers[i - 3]):
+                valence = valence * VaderConstants.N_SCALAR
+        return valence
+
+    def _idioms_check(self, valence: float, words: List[str], i: int) -> float:
+        onezero = f"{words[i - 1]} {words[i]}"
+        twoonezero = f"{words[i - 2]} {words[i - 1]} {words[i]}"
+        twoone = f"{words[i - 2]} {words[i - 1]}"
+        threetwoone = f"{words[i - 3]} {words[i - 2]} {words[i - 1]}"
+        threetwo = f"{words[i - 3]} {words[i - 2]}"
+
+        for sequence in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if sequence in self.idioms:
+                valence = self.idioms[sequence]
+                break
+
+        if len(words) - 1 > i:
+            zeroone = f"{words[i]} {words[i + 1]}"
+            if zeroone in self.idioms:
+                valence = self.idioms[zeroone]
+        if len(words) - 1 > i + 1:
+            zeroonetwo = f"{words[i]} {words[i + 1]} {words[i + 2]}"
+            if zeroonetwo in self.idioms:
+                valence = self.idioms[zeroonetwo]
+
+        if threetwo in self.boosters or twoone in self.boosters:
+            valence = valence + VaderConstants.B_DECR
+        return valence
+
+    def _least_check(self, valence: float, lowers: List[str], i: int) -> float:
+        if i > 1 and lowers[i - 1] not in self.lexicon and lowers[i - 1] == "least":
+            if lowers[i - 2] != "at" and lowers[i - 2] != "very":
+                valence = valence * VaderConstants.N_SCALAR
+        elif i > 0 and lowers[i - 1] not in self.lexicon and lowers[i - 1] == "least":
+            valence = valence * VaderConstants.N_SCALAR
+        return valence
+
+    @staticmethod
+    def _score(sentiments: List[float], text: str) -> Dict[str, float]:
+        """Normalize the word valences into VADER's four scores"""
+        if not sentiments:
+            return {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}
+
+        sum_s = float(sum(sentiments))
+
+        # Emphasis from up to 4 exclamation points and 2 or more question marks
+        question_marks = text.count("?")
+        if question_marks > 1:
+            question_amplifier = question_marks * 0.18 if question_marks <= 3 else 0.96
+        else:
+            question_amplifier = 0
+        amplifier = min(text.count("!"), 4) * 0.292 + question_amplifier
+
+        if sum_s > 0:
+            sum_s += amplifier
+        elif sum_s < 0:
+            sum_s -= amplifier
+
+        compound = sum_s / math.sqrt((sum_s * sum_s) + 15)
+
+        pos_sum = 0.0
+        neg_sum = 0.0
+        neu_count = 0
+        for sentiment in sentiments:
+            if sentiment > 0:
+                pos_sum += float(sentiment) + 1
+            if sentiment < 0:
+                neg_sum += float(sentiment) - 1
+            if sentiment == 0:
+                neu_count += 1
+
+        if pos_sum > math.fabs(neg_sum):
+            pos_sum += amplifier
+        elif pos_sum < math.fabs(neg_sum):
+            neg_sum -= amplifier
+
+        total = pos_sum + math.fabs(neg_sum) + neu_count
+        return {
+            "neg": round(math.fabs(neg_sum / total), 3),
+            "neu": round(math.fabs(neu_count / total), 3),
+            "pos": round(math.fabs(pos_sum / total), 3),
+            "compound": round(compound, 4),
+        }
+
+    def polarity_scores_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Scores of many texts, in order.
+
+        Repeated texts are scored once. Batches of at least
+        VADER_PARALLEL_MIN distinct texts are split into chunks of
+        VADER_CHUNK_SIZE across the worker processes.
+        """
+        unique = list(dict.fromkeys(texts))
+
+        if self.workers > 0 and len(unique) >= settings.VADER_PARALLEL_MIN:
+            chunk_size = settings.VADER_CHUNK_SIZE
+            chunks = [
+                unique[start:start + chunk_size] for start in range(0, len(unique), chunk_size)
+            ]
+            scored = self._get_pool().map(_score_chunk, chunks)
+            scores = [score for chunk in scored for score in chunk]
+        else:
+            scores = [self.polarity_scores(text) for text in unique]
+
+        by_text = dict(zip(unique, scores))
+        return [dict(by_text[text]) for text in texts]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use"""
+        if self.pool is None:
+            # Spawned workers compile the lexicon once and never import the models
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.lexicon,)
+            )
+            logger.info(f"Started {self.workers} VADER worker processes")
+        return self.pool
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+# Engine of a pool worker process, built by _init_worker
+_worker_engine: Optional[VaderEngine] = None
+
+
+def _init_worker(lexicon: Dict[str, float]):
+    global _worker_engine
+    _worker_engine = VaderEngine(lexicon, workers=0)
+
+
+def _score_chunk(texts: List[str]) -> List[Dict[str, float]]:
+    return [_worker_engine.polarity_scores(text) for text in texts]
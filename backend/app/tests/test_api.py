@@ -1,10 +1,18 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.sentiment_analyzer import SentimentAnalyzer, sentiment_analyzer
 
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def loaded_models():
+    """Load the models, which the app does in the background after startup"""
+    if not sentiment_analyzer.is_ready():
+        sentiment_analyzer.load_models()
+
+
 class TestHealthEndpoint:
     """Test health check endpoint"""
 
@@ -18,6 +26,36 @@ class TestHealthEndpoint:
         assert "version" in data
         assert "models_loaded" in data
 
+    def test_liveness(self):
+        """Test liveness does not depend on the models"""
+        response = client.get("/api/v1/health/live")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    def test_readiness(self):
+        """Test readiness reports each model once loaded"""
+        response = client.get("/api/v1/health/ready")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["models"][data["default_model"]]["status"] == "ready"
+
+    def test_not_ready_while_loading(self, monkeypatch):
+        """Test readiness and analysis return 503 before the models load"""
+        import app.api.endpoints as endpoints
+        monkeypatch.setattr(endpoints, "sentiment_analyzer", SentimentAnalyzer())
+
+        response = client.get("/api/v1/health/ready")
+        assert response.status_code == 503
+        assert response.json()["models"]["transformers"]["status"] == "pending"
+
+        response = client.post(
+            "/api/v1/sentiment", json={"text": "I love it", "model": "transformers"}
+        )
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+
 
 class TestSentimentEndpoint:
     """Test sentiment analysis endpoint"""
@@ -152,6 +190,18 @@ class TestCombinedAnalysisEndpoint:
         assert data["sentiment"]["label"] == "positive"
         assert data["emotion"]["primary_emotion"] in ["joy", "love", "surprise"]
 
+    def test_analyze_combined_fields(self):
+        """Test fields applies to both results"""
+        response = client.post(
+            "/api/v1/analyze?fields=label,primary_emotion",
+            json={"text": "I love this product! It's amazing!"}
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["sentiment"] == {"label": "positive"}
+        assert set(data["emotion"]) == {"primary_emotion"}
+
 
 class TestBatchEndpoint:
     """Test batch analysis endpoint"""
@@ -180,6 +230,36 @@ class TestBatchEndpoint:
         assert data["summary"]["positive"] >= 1
         assert data["summary"]["negative"] >= 1
 
+    def test_analyze_batch_compact(self):
+        """Test compact results leave out text, scores and model_used"""
+        response = client.post(
+            "/api/v1/sentiment/batch?compact=true",
+            json={"texts": ["I love this!", "This is terrible!"]}
+        )
+        assert response.status_code == 200
+
+        data = response.json()
+        for result in data["results"]:
+            assert set(result) == {"label", "confidence", "language", "aspects", "approximate"}
+        assert data["summary"]["positive"] == 1
+
+    def test_analyze_batch_fields(self):
+        """Test fields keeps only the listed result fields"""
+        response = client.post(
+            "/api/v1/sentiment/batch?fields=label,confidence",
+            json={"texts": ["I love this!"]}
+        )
+        assert response.status_code == 200
+        assert set(response.json()["results"][0]) == {"label", "confidence"}
+
+    def test_analyze_batch_unknown_field(self):
+        """Test unknown result fields are rejected"""
+        response = client.post(
+            "/api/v1/sentiment/batch?fields=label,nope",
+            json={"texts": ["I love this!"]}
+        )
+        assert response.status_code == 422
+
     def test_analyze_batch_empty(self):
         """Test batch analysis with empty list"""
         response = client.post(
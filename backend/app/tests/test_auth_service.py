@@ -0,0 +1,219 @@
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from app.models.database import APIKey, User
+from app.services.auth_service import (
+    AuthService, APIKeyCache, AuthWorkerPool, AuthPoolBusyError, ExpiringLRUCache,
+    api_key_cache, token_cache, user_cache
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test with empty auth caches"""
+    api_key_cache.clear()
+    api_key_cache.drain_last_used()
+    token_cache.clear()
+    user_cache.clear()
+    yield
+    api_key_cache.clear()
+    token_cache.clear()
+    user_cache.clear()
+
+
+async def create_key(db):
+    user = await AuthService.create_user(db, "bob", "bob@example.com", "secret")
+    return user, await AuthService.create_api_key(db, user_id=user.id, name="test")
+
+
+class TestAPIKeyCache:
+    """Test cached API key verification"""
+
+    @pytest.mark.asyncio
+    async def test_verified_key_is_cached(self, db):
+        _, api_key = await create_key(db)
+        await AuthService.verify_api_key(db, api_key.key)
+
+        # Deactivated behind the cache's back, still served until invalidated
+        await db.execute(update(APIKey).where(APIKey.id == api_key.id).values(is_active=0))
+        await db.commit()
+
+        assert (await AuthService.verify_api_key(db, api_key.key)).id == api_key.id
+
+    @pytest.mark.asyncio
+    async def test_revoke_invalidates_cache(self, db):
+        user, api_key = await create_key(db)
+        assert await AuthService.verify_api_key(db, api_key.key) is not None
+
+        revoked = await AuthService.revoke_api_key(db, user_id=user.id, key_id=api_key.id)
+        assert revoked.is_active == 0
+
+        assert await AuthService.verify_api_key(db, api_key.key) is None
+
+    @pytest.mark.asyncio
+    async def test_revoke_requires_owner(self, db):
+        _, api_key = await create_key(db)
+        assert await AuthService.revoke_api_key(db, user_id=999, key_id=api_key.id) is None
+
+    @pytest.mark.asyncio
+    async def test_last_used_is_flushed_in_bulk(self, db):
+        _, api_key = await create_key(db)
+        for _ in range(3):
+            await AuthService.verify_api_key(db, api_key.key)
+
+        stored = await db.scalar(select(APIKey.last_used_at).where(APIKey.id == api_key.id))
+        assert stored is None
+
+        assert await AuthService.flush_last_used(db) == 1
+        assert await AuthService.flush_last_used(db) == 0
+
+        stored = await db.scalar(select(APIKey.last_used_at).where(APIKey.id == api_key.id))
+        assert stored is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self, db):
+        _, api_key = await create_key(db)
+        await AuthService.verify_api_key(db, api_key.key)
+
+        class FailingSession:
+            async def execute(self, *args, **kwargs):
+                raise RuntimeError("database is locked")
+
+        with pytest.raises(RuntimeError):
+            await AuthService.flush_last_used(FailingSession())
+
+        assert await AuthService.flush_last_used(db) == 1
+        stored = await db.scalar(select(APIKey.last_used_at).where(APIKey.id == api_key.id))
+        assert stored is not None
+
+    def test_requeue_keeps_newer_uses(self):
+        cache = APIKeyCache()
+        earlier, later = datetime(2024, 1, 1, 12), datetime(2024, 1, 1, 13)
+        cache.requeue_last_used({1: later})
+        cache.requeue_last_used({1: earlier, 2: earlier})
+
+        assert cache.drain_last_used() == {1: later, 2: earlier}
+
+    def test_entries_expire(self):
+        cache = APIKeyCache(ttl=-1)
+        cache.put("sk_test", APIKey(id=1, key="sk_test"))
+        assert cache.get("sk_test") is None
+
+    def test_size_is_bounded(self):
+        cache = APIKeyCache(max_size=2)
+        for idx in range(3):
+            cache.put(f"sk_{idx}", APIKey(id=idx, key=f"sk_{idx}"))
+
+        assert cache.get("sk_0") is None
+        assert cache.get("sk_2").id == 2
+
+    def test_evicts_least_recently_used(self):
+        cache = APIKeyCache(max_size=2)
+        cache.put("sk_0", APIKey(id=0, key="sk_0"))
+        cache.put("sk_1", APIKey(id=1, key="sk_1"))
+        cache.get("sk_0")
+        cache.put("sk_2", APIKey(id=2, key="sk_2"))
+
+        assert cache.get("sk_0").id == 0
+        assert cache.get("sk_1") is None
+
+
+class TestAuthWorkerPool:
+    """Test the bounded bcrypt worker pool"""
+
+    @pytest.mark.asyncio
+    async def test_runs_off_the_event_loop(self):
+        pool = AuthWorkerPool(max_workers=1, max_queue=0)
+        thread_name = await pool.run(lambda: threading.current_thread().name)
+
+        assert thread_name.startswith("auth")
+        assert pool.stats()["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        pool = AuthWorkerPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AuthPoolBusyError):
+            await pool.run(release.wait)
+
+        release.set()
+        await asyncio.gather(first, second)
+
+        stats = pool.stats()
+        assert stats["completed"] == 2
+        assert stats["rejected"] == 1
+        assert stats["max_in_flight"] == 2
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_password_roundtrip(self, db):
+        user = await AuthService.create_user(db, "carol", "carol@example.com", "secret")
+
+        assert (await AuthService.authenticate_user(db, "carol", "secret")).id == user.id
+        assert await AuthService.authenticate_user(db, "carol", "wrong") is None
+
+
+class TestTokenAndUserCache:
+    """Test decoded token and user caching"""
+
+    def test_decoded_token_is_cached(self):
+        token = AuthService.create_access_token({"sub": "dave", "user_id": 1})
+
+        first = AuthService.verify_token(token)
+        second = AuthService.verify_token(token)
+
+        assert second is first
+        assert token_cache.stats()["hits"] >= 1
+
+    def test_expired_token_is_not_cached(self):
+        token = AuthService.create_access_token(
+            {"sub": "dave"}, expires_delta=timedelta(seconds=-1)
+        )
+
+        assert AuthService.verify_token(token) is None
+        assert token_cache.stats()["size"] == 0
+
+    def test_entries_expire_at_their_deadline(self):
+        now = [100.0]
+        cache = ExpiringLRUCache(max_size=2, clock=lambda: now[0])
+        cache.put("a", 1, expires_at=110)
+
+        assert cache.get("a") == 1
+        now[0] = 110
+        assert cache.get("a") is None
+
+    def test_size_is_bounded(self):
+        cache = ExpiringLRUCache(max_size=2, clock=lambda: 0)
+        for key in "abc":
+            cache.put(key, key, expires_at=1)
+
+        assert cache.get("a") is None
+        assert cache.get("c") == "c"
+
+    @pytest.mark.asyncio
+    async def test_user_is_cached(self, db):
+        user = await AuthService.create_user(db, "erin", "erin@example.com", "secret")
+        assert (await AuthService.get_cached_user(db, "erin")).id == user.id
+
+        # Renamed behind the cache's back, still served until invalidated
+        await db.execute(update(User).where(User.id == user.id).values(email="new@example.com"))
+        await db.commit()
+
+        assert (await AuthService.get_cached_user(db, "erin")).email == "erin@example.com"
+
+    @pytest.mark.asyncio
+    async def test_deactivate_invalidates_user(self, db):
+        await AuthService.create_user(db, "frank", "frank@example.com", "secret")
+        cached = await AuthService.get_cached_user(db, "frank")
+        assert cached.is_active == 1
+
+        await AuthService.deactivate_user(db, cached)
+
+        assert (await AuthService.get_cached_user(db, "frank")).is_active == 0
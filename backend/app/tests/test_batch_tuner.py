@@ -0,0 +1,222 @@
+import asyncio
+from typing import Optional
+import pytest
+from app.models.schemas import Priority
+from app.services.batch_tuner import BatchTuner, BATCH_STEP, MIN_SAMPLES, WAIT_STEP
+from app.services.inference_scheduler import InferenceScheduler, ClientDisconnectedError
+from app.services.micro_batcher import MicroBatcher
+
+
+@pytest.fixture
+def tuner(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "MODEL_BATCH_SIZE", 16)
+    monkeypatch.setattr(settings, "MODEL_BATCH_WAIT_MS", 4.0)
+    return BatchTuner(
+        target_p95=0.1, min_batch=2, max_batch=32, max_wait=0.01, interval=0, enabled=True
+    )
+
+
+def feed(
+    tuner: BatchTuner,
+    latency: float,
+    size: int,
+    queue_depth: int = 0,
+    seconds: Optional[float] = None
+):
+    """Batches of size until the tuner makes a decision, None when it makes none"""
+    if seconds is None:
+        seconds = latency / 2
+    for _ in range(MIN_SAMPLES):
+        decision = tuner.observe(size, seconds, [latency] * size, queue_depth)
+        if decision:
+            return decision
+    return None
+
+
+class TestBatchTuner:
+    """Test the batch size and wait window control loop"""
+
+    def test_halves_above_target(self, tuner):
+        decision = feed(tuner, latency=0.2, size=16)
+
+        assert decision["action"] == "decrease"
+        assert tuner.batch_size == 8
+        assert tuner.max_wait == pytest.approx(0.002)
+
+    def test_overload_does_not_collapse_batches(self, tuner):
+        # Requests wait behind fast batches: the p95 is queueing, not model time
+        for _ in range(10):
+            decision = feed(tuner, latency=0.5, size=tuner.batch_size, queue_depth=40, seconds=0.05)
+            assert decision["action"] == "increase_batch"
+        assert tuner.batch_size == 32
+        assert tuner.max_wait == pytest.approx(0.004)
+
+    def test_holds_under_overload_near_target_batches(self, tuner):
+        decision = feed(tuner, latency=0.5, size=16, queue_depth=40, seconds=0.09)
+
+        assert decision["action"] == "hold"
+        assert (tuner.batch_size, tuner.max_wait) == (16, 0.004)
+
+    def test_halves_slow_batches_under_overload(self, tuner):
+        decision = feed(tuner, latency=0.5, size=16, queue_depth=40, seconds=0.2)
+
+        assert decision["action"] == "decrease"
+        assert tuner.batch_size == 8
+
+    def test_grows_batches_that_fill_up(self, tuner):
+        decision = feed(tuner, latency=0.02, size=16)
+
+        assert decision["action"] == "increase_batch"
+        assert tuner.batch_size == 16 + BATCH_STEP
+
+    def test_grows_batches_while_calls_queue(self, tuner):
+        feed(tuner, latency=0.02, size=4, queue_depth=3)
+        assert tuner.batch_size == 16 + BATCH_STEP
+
+    def test_waits_longer_for_partly_filled_batches(self, tuner):
+        decision = feed(tuner, latency=0.02, size=4)
+
+        assert decision["action"] == "increase_wait"
+        assert tuner.max_wait == pytest.approx(0.004 + WAIT_STEP)
+        assert tuner.batch_size == 16
+
+    def test_stops_waiting_for_lone_requests(self, tuner):
+        for _ in range(4):
+            feed(tuner, latency=0.02, size=1)
+
+        assert tuner.decisions[-1]["action"] == "decrease_wait"
+        assert tuner.max_wait == 0.0
+
+    def test_holds_near_target(self, tuner):
+        assert feed(tuner, latency=0.09, size=16)["action"] == "hold"
+        assert (tuner.batch_size, tuner.max_wait) == (16, 0.004)
+
+    def test_stays_within_bounds(self, tuner):
+        for _ in range(10):
+            feed(tuner, latency=0.5, size=2)
+        assert tuner.batch_size == 2
+
+        for _ in range(10):
+            feed(tuner, latency=0.01, size=tuner.batch_size)
+        assert tuner.batch_size == 32
+
+        for _ in range(10):
+            feed(tuner, latency=0.01, size=2)
+        assert tuner.max_wait == pytest.approx(0.01)
+
+    def test_waits_for_enough_samples_and_the_interval(self, tuner):
+        assert tuner.observe(4, 0.01, [0.2] * 4, 0) is None
+
+        tuner.interval = 60
+        assert feed(tuner, latency=0.2, size=16) is None
+        assert tuner.batch_size == 16
+
+    def test_disabled_only_observes(self, tuner):
+        tuner.enabled = False
+        decision = feed(tuner, latency=0.2, size=16)
+
+        assert decision["action"] == "observe"
+        assert (tuner.batch_size, tuner.max_wait) == (16, 0.004)
+
+    def test_stats(self, tuner):
+        feed(tuner, latency=0.2, size=16)
+        stats = tuner.stats()
+
+        assert stats["batch_size"] == 8
+        assert stats["target_p95_ms"] == pytest.approx(100)
+        assert stats["bounds"] == {
+            "min_batch": 2, "max_batch": 32, "max_wait_ms": pytest.approx(10)
+        }
+        assert stats["adjustments"] == 1
+        assert stats["decisions"][0]["p95_ms"] == pytest.approx(200)
+
+
+class TestMicroBatcher:
+    """Test coalescing single-text calls into batches"""
+
+    @pytest.fixture
+    def scheduler(self):
+        scheduler = InferenceScheduler(max_workers=1)
+        yield scheduler
+        scheduler.shutdown()
+
+    @pytest.fixture
+    def batcher(self, tuner, scheduler):
+        tuner.interval = 60
+        return MicroBatcher(tuner, scheduler)
+
+    @staticmethod
+    def upper(calls):
+        def run(items):
+            calls.append(list(items))
+            return [item.upper() for item in items]
+        return run
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_a_batch(self, batcher):
+        calls = []
+        results = await asyncio.gather(
+            *(batcher.submit("g", self.upper(calls), text) for text in "abc")
+        )
+
+        assert results == ["A", "B", "C"]
+        assert calls == [["a", "b", "c"]]
+        assert batcher.stats()["mean_batch"] == 3
+        assert len(batcher.tuner.latencies) == 3
+
+    @pytest.mark.asyncio
+    async def test_flushes_at_batch_size(self, batcher):
+        batcher.tuner.batch_size, batcher.tuner.max_wait = 2, 5.0
+        calls = []
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit("g", self.upper(calls), text) for text in "ab")), 1
+        )
+
+        assert results == ["A", "B"]
+        assert calls == [["a", "b"]]
+
+    @pytest.mark.asyncio
+    async def test_groups_are_separate(self, batcher):
+        calls = []
+        await asyncio.gather(
+            batcher.submit("sentiment", self.upper(calls), "a"),
+            batcher.submit("emotion", self.upper(calls), "b")
+        )
+
+        assert sorted(calls) == [["a"], ["b"]]
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_call(self, batcher):
+        def fail(items):
+            raise RuntimeError("model failed")
+
+        results = await asyncio.gather(
+            batcher.submit("g", fail, "a"), batcher.submit("g", fail, "b"), return_exceptions=True
+        )
+
+        assert [str(result) for result in results] == ["model failed"] * 2
+
+    @pytest.mark.asyncio
+    async def test_disconnected_client_is_left_out(self, batcher):
+        calls = []
+
+        async def gone():
+            return True
+
+        results = await asyncio.gather(
+            batcher.submit("g", self.upper(calls), "a", is_disconnected=gone),
+            batcher.submit("g", self.upper(calls), "b"),
+            return_exceptions=True
+        )
+
+        assert isinstance(results[0], ClientDisconnectedError)
+        assert results[1] == "B"
+        assert calls == [["b"]]
+
+    @pytest.mark.asyncio
+    async def test_runs_as_one_interactive_call(self, batcher, scheduler):
+        await asyncio.gather(*(batcher.submit("g", self.upper([]), text) for text in "abcd"))
+
+        interactive = scheduler.stats()["classes"][Priority.INTERACTIVE.value]
+        assert interactive["completed"] == 1
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import pytest
+from app.api.event_endpoints import event_stream, stream_job
+from app.services.event_broker import EventBroker, event_broker, format_sse
+from app.services.job_service import job_service
+
+
+class FakeRequest:
+    """Request whose client disconnects after a number of checks"""
+
+    def __init__(self, checks=1000):
+        self.checks = checks
+
+    async def is_disconnected(self):
+        self.checks -= 1
+        return self.checks < 0
+
+
+def parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+
+class TestEventBroker:
+    """Test topic fan-out"""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_every_subscriber(self):
+        broker = EventBroker()
+        with broker.subscribe("monitor:1") as first, broker.subscribe("monitor:1") as second:
+            broker.publish("monitor:1", "window", {"total": 3})
+            broker.publish("monitor:2", "window", {"total": 9})
+
+            assert (await first.get())["data"] == {"total": 3}
+            assert (await second.get())["data"] == {"total": 3}
+            assert first.empty() and second.empty()
+
+        assert broker.subscriber_count("monitor:1") == 0
+        assert broker.stats()["delivered"] == 2
+
+    def test_slow_subscriber_drops_oldest(self):
+        broker = EventBroker(queue_size=2)
+        with broker.subscribe("job:a") as queue:
+            for idx in range(3):
+                broker.publish("job:a", "item", idx)
+
+            assert [queue.get_nowait()["data"] for _ in range(2)] == [1, 2]
+            assert broker.stats()["dropped"] == 1
+
+    def test_format_sse(self):
+        message = format_sse({"id": 7, "event": "item", "data": {"index": 1}})
+        assert message == 'id: 7\nevent: item\ndata: {"index": 1}\n\n'
+
+
+class TestEventStream:
+    """Test relaying a topic as Server-Sent Events"""
+
+    @pytest.mark.asyncio
+    async def test_streams_until_terminal_event(self):
+        stream = event_stream(
+            FakeRequest(),
+            "job:test",
+            initial=lambda: {"event": "snapshot", "data": {"results": []}},
+            until=("done",)
+        )
+
+        assert parse(await stream.__anext__()) == ("snapshot", {"results": []})
+
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        event_broker.publish("job:test", "item", {"index": 0})
+        assert parse(await pending) == ("item", {"index": 0})
+
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0)
+        event_broker.publish("job:test", "done", {"completed": 1})
+        assert parse(await pending)[0] == "done"
+
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        assert event_broker.subscriber_count("job:test") == 0
+
+    @pytest.mark.asyncio
+    async def test_stops_when_client_disconnects(self):
+        messages = [message async for message in event_stream(FakeRequest(checks=0), "monitor:9")]
+
+        assert messages == []
+        assert event_broker.subscriber_count("monitor:9") == 0
+
+    @pytest.mark.asyncio
+    async def test_job_finishing_before_the_stream_starts(self):
+        release = asyncio.Event()
+
+        async def runner(job):
+            await release.wait()
+            return {"total": 0}
+
+        job = job_service.start("batch", 0, runner)
+        response = await stream_job(job.id, FakeRequest())
+
+        # The job ends between the handler returning and the first iteration
+        release.set()
+        await job.task
+
+        messages = [message async for message in response.body_iterator]
+        assert len(messages) == 1
+        event, data = parse(messages[0])
+        assert (event, data["status"]) == ("done", "done")
+        assert event_broker.subscriber_count(job.topic) == 0
@@ -0,0 +1,170 @@
+import csv
+import gzip
+import json
+import pytest
+from datetime import datetime
+from io import StringIO, BytesIO
+from app.models.database import Analysis
+from app.services.export_service import ExportService, EXPORT_FIELDS
+from app.services.history_service import HistoryService
+
+
+def make_analysis(idx, label="positive"):
+    return Analysis(
+        id=idx,
+        text=f"text, with \"quotes\" {idx}",
+        analysis_type="sentiment",
+        sentiment_label=label,
+        sentiment_confidence=0.9,
+        language="en",
+        created_at=datetime(2026, 1, 1, 12, 0, 0)
+    )
+
+
+async def batches_of(*batches):
+    for batch in batches:
+        yield batch
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+class TestStreamingCsv:
+    """Test streaming CSV export"""
+
+    @pytest.mark.asyncio
+    async def test_stream_csv_rows(self):
+        content = await collect(ExportService.stream_csv(batches_of(
+            [make_analysis(1), make_analysis(2)],
+            [make_analysis(3, "negative")]
+        )))
+
+        rows = list(csv.DictReader(StringIO(content.decode())))
+        assert [int(row["id"]) for row in rows] == [1, 2, 3]
+        assert rows[0]["text"] == 'text, with "quotes" 1'
+        assert rows[2]["sentiment_label"] == "negative"
+        assert list(rows[0].keys()) == EXPORT_FIELDS
+
+    @pytest.mark.asyncio
+    async def test_stream_csv_empty_has_header(self):
+        content = await collect(ExportService.stream_csv(batches_of()))
+        assert content.decode().strip() == ",".join(EXPORT_FIELDS)
+
+    @pytest.mark.asyncio
+    async def test_gzip_stream_roundtrip(self):
+        analyses = [make_analysis(i) for i in range(500)]
+        compressed = await collect(ExportService.gzip_stream(
+            ExportService.stream_csv(batches_of(analyses))
+        ))
+        plain = await collect(ExportService.stream_csv(batches_of(analyses)))
+
+        assert gzip.decompress(compressed) == plain
+        assert len(compressed) < len(plain)
+
+    @pytest.mark.asyncio
+    async def test_stream_analyses_batches(self, db):
+        for idx in range(5):
+            await HistoryService.create_analysis_record(db, f"text {idx}", "sentiment")
+
+        batches = [batch async for batch in HistoryService.stream_analyses(db, batch_size=2)]
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+class TestStreamingJson:
+    """Test streaming JSON and NDJSON export"""
+
+    @pytest.mark.asyncio
+    async def test_stream_json_array(self):
+        content = await collect(ExportService.stream_json(batches_of(
+            [make_analysis(1), make_analysis(2)],
+            [],
+            [make_analysis(3)]
+        )))
+
+        rows = json.loads(content)
+        assert [row["id"] for row in rows] == [1, 2, 3]
+        assert rows[0]["created_at"] == "2026-01-01T12:00:00"
+
+    @pytest.mark.asyncio
+    async def test_stream_json_empty_array(self):
+        content = await collect(ExportService.stream_json(batches_of()))
+        assert json.loads(content) == []
+
+    @pytest.mark.asyncio
+    async def test_stream_ndjson(self):
+        content = await collect(ExportService.stream_json(
+            batches_of([make_analysis(1)], [make_analysis(2), make_analysis(3)]),
+            ndjson=True
+        ))
+
+        lines = content.decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+
+
+class TestColumnarExport:
+    """Test Parquet and Arrow IPC export"""
+
+    @pytest.mark.asyncio
+    async def test_stream_parquet_row_groups(self):
+        import pyarrow.parquet as pq
+
+        content = await collect(ExportService.stream_columnar(
+            batches_of([make_analysis(1), make_analysis(2)], [make_analysis(3, "negative")]),
+            format="parquet",
+            row_group_size=2
+        ))
+
+        parquet = pq.ParquetFile(BytesIO(content))
+        assert parquet.metadata.num_row_groups == 2
+
+        table = parquet.read()
+        assert table.column("id").to_pylist() == [1, 2, 3]
+        assert table.column("sentiment_label").to_pylist() == ["positive", "positive", "negative"]
+        assert str(table.schema.field("sentiment_label").type).startswith("dictionary")
+        assert str(table.schema.field("created_at").type) == "timestamp[us]"
+
+    @pytest.mark.asyncio
+    async def test_stream_arrow_ipc(self):
+        import pyarrow as pa
+
+        content = await collect(ExportService.stream_columnar(
+            batches_of([make_analysis(1)], [make_analysis(2, "neutral")]),
+            format="arrow"
+        ))
+
+        table = pa.ipc.open_stream(content).read_all()
+        assert table.num_rows == 2
+        assert table.column("sentiment_label").to_pylist() == ["positive", "neutral"]
+
+
+class TestExcelExport:
+    """Test write-only Excel export"""
+
+    @pytest.mark.asyncio
+    async def test_stream_excel_splits_sheets(self):
+        from openpyxl import load_workbook
+
+        content = await collect(ExportService.stream_excel(
+            batches_of([make_analysis(i) for i in range(1, 4)], [make_analysis(4)]),
+            max_rows_per_sheet=3
+        ))
+
+        workbook = load_workbook(BytesIO(content), read_only=True)
+        assert workbook.sheetnames == ["Analysis Results", "Analysis Results 2"]
+
+        rows = [list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets]
+        assert [len(sheet_rows) for sheet_rows in rows] == [3, 3]
+        assert rows[0][0] == tuple(EXPORT_FIELDS)
+        assert [row[0] for row in rows[0][1:] + rows[1][1:]] == [1, 2, 3, 4]
+        assert rows[0][1][EXPORT_FIELDS.index("created_at")] == datetime(2026, 1, 1, 12, 0, 0)
+
+    @pytest.mark.asyncio
+    async def test_stream_excel_empty_has_header(self):
+        from openpyxl import load_workbook
+
+        content = await collect(ExportService.stream_excel(batches_of()))
+
+        workbook = load_workbook(BytesIO(content), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        assert rows == [tuple(EXPORT_FIELDS)]
@@ -0,0 +1,274 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.models.schemas import Priority
+from app.services.inference_scheduler import (
+    InferenceScheduler, DeadlineExceededError, ClientDisconnectedError, gather_or_cancel, percentile
+)
+
+WEIGHTS = {Priority.INTERACTIVE: 8, Priority.BATCH: 2, Priority.BACKGROUND: 1}
+DEADLINES = {Priority.INTERACTIVE: 10.0, Priority.BATCH: 60.0, Priority.BACKGROUND: 600.0}
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = InferenceScheduler(max_workers=1, weights=WEIGHTS, deadlines=DEADLINES)
+    yield scheduler
+    scheduler.shutdown()
+
+
+async def occupy(scheduler: InferenceScheduler, release: threading.Event) -> asyncio.Task:
+    """Hold the only worker until release is set"""
+    task = asyncio.create_task(scheduler.run(Priority.BACKGROUND, release.wait, 5))
+    while scheduler.running == 0:
+        await asyncio.sleep(0)
+    return task
+
+
+class TestInferenceScheduler:
+    """Test weighted-fair scheduling of model calls"""
+
+    @pytest.mark.asyncio
+    async def test_runs_and_returns(self, scheduler):
+        assert await scheduler.run(Priority.INTERACTIVE, sum, [1, 2, 3]) == 6
+        assert scheduler.running == 0
+        assert scheduler.stats()["classes"]["interactive"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_interactive_goes_before_queued_background(self, scheduler):
+        release, order = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        calls = [
+            asyncio.create_task(scheduler.run(priority, order.append, priority.value))
+            for priority in (Priority.BACKGROUND, Priority.BACKGROUND, Priority.INTERACTIVE)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(blocker, *calls)
+
+        assert order == ["interactive", "background", "background"]
+
+    @pytest.mark.asyncio
+    async def test_weights_share_the_workers(self, scheduler):
+        release, order = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        calls = [
+            asyncio.create_task(scheduler.run(priority, order.append, priority))
+            for priority in (Priority.INTERACTIVE, Priority.BATCH)
+            for _ in range(10)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(blocker, *calls)
+
+        # Weights 8 to 2: four interactive calls per batch call while both wait
+        assert order[:5].count(Priority.BATCH) == 1
+        assert order[:10].count(Priority.BATCH) == 2
+
+    @pytest.mark.asyncio
+    async def test_cost_counts_against_the_class(self, scheduler):
+        release, order = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        big = asyncio.create_task(scheduler.run(Priority.BATCH, order.append, "big", cost=32))
+        small = [
+            asyncio.create_task(scheduler.run(Priority.BACKGROUND, order.append, "small"))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(blocker, big, *small)
+
+        assert order == ["small", "small", "small", "big"]
+
+    @pytest.mark.asyncio
+    async def test_expired_call_is_dropped(self, scheduler):
+        release, ran = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        late = asyncio.create_task(
+            scheduler.run(Priority.INTERACTIVE, ran.append, 1, deadline=time.monotonic() + 0.01)
+        )
+        await asyncio.sleep(0.05)
+        release.set()
+
+        with pytest.raises(DeadlineExceededError):
+            await late
+        await blocker
+
+        assert ran == []
+        assert scheduler.stats()["classes"]["interactive"]["expired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnected_client_is_dropped(self, scheduler):
+        ran = []
+
+        async def gone():
+            return True
+
+        with pytest.raises(ClientDisconnectedError):
+            await scheduler.run(Priority.INTERACTIVE, ran.append, 1, is_disconnected=gone)
+
+        assert ran == []
+        assert scheduler.running == 0
+        assert scheduler.stats()["classes"]["interactive"]["disconnected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_while_queued_never_runs(self, scheduler):
+        release, ran = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        queued = asyncio.create_task(scheduler.run(Priority.INTERACTIVE, ran.append, 1))
+        await asyncio.sleep(0)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+        assert scheduler.stats()["classes"]["interactive"]["queued"] == 0
+        release.set()
+        await blocker
+        assert ran == []
+
+    @pytest.mark.asyncio
+    async def test_cancelled_while_queued_is_not_charged(self, scheduler):
+        release, order = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        big = asyncio.create_task(scheduler.run(Priority.BATCH, order.append, "big", cost=32))
+        await asyncio.sleep(0)
+        big.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await big
+
+        calls = [
+            asyncio.create_task(scheduler.run(priority, order.append, priority.value))
+            for priority in (Priority.BACKGROUND, Priority.BATCH)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(blocker, *calls)
+
+        assert order == ["batch", "background"]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_while_running_holds_the_worker(self, scheduler):
+        release = threading.Event()
+        blocker = await occupy(scheduler, release)
+
+        blocker.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await blocker
+        # The thread cannot be interrupted, its worker stays taken until it returns
+        assert scheduler.running == 1
+
+        waiting = asyncio.create_task(scheduler.run(Priority.INTERACTIVE, sum, [1]))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+        release.set()
+        assert await waiting == 1
+        assert scheduler.running == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_after_expiring_releases_nothing(self, scheduler, monkeypatch):
+        release = threading.Event()
+        blocker = await occupy(scheduler, release)
+
+        late = asyncio.create_task(
+            scheduler.run(Priority.INTERACTIVE, sum, [1], deadline=time.monotonic() + 0.01)
+        )
+        await asyncio.sleep(0.05)
+        call = scheduler.queues[Priority.INTERACTIVE][0]
+
+        # Cancel the caller after its call expired, before it wakes up
+        dispatch = scheduler._dispatch
+
+        def dispatch_then_cancel():
+            dispatch()
+            if call.granted.done():
+                late.cancel()
+
+        monkeypatch.setattr(scheduler, "_dispatch", dispatch_then_cancel)
+        release.set()
+        await blocker
+        with pytest.raises(asyncio.CancelledError):
+            await late
+
+        assert scheduler.running == 0
+        assert scheduler.stats()["classes"]["interactive"]["running"] == 0
+        assert await scheduler.run(Priority.INTERACTIVE, sum, [1]) == 1
+
+    @pytest.mark.asyncio
+    async def test_error_frees_the_worker(self, scheduler):
+        def fail():
+            raise RuntimeError("model failed")
+
+        with pytest.raises(RuntimeError, match="model failed"):
+            await scheduler.run(Priority.BATCH, fail)
+
+        assert scheduler.running == 0
+        assert scheduler.stats()["classes"]["batch"]["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stats(self, scheduler):
+        for _ in range(4):
+            await scheduler.run(Priority.INTERACTIVE, sum, [1])
+
+        stats = scheduler.stats()
+        assert stats["workers"] == 1
+        interactive = stats["classes"]["interactive"]
+        assert interactive["submitted"] == interactive["completed"] == 4
+        assert interactive["weight"] == 8
+        assert interactive["latency_p95_ms"] >= interactive["latency_p50_ms"] >= 0
+        assert stats["classes"]["background"]["latency_p50_ms"] is None
+
+
+class TestGatherOrCancel:
+    """Test dropping sibling calls once one fails"""
+
+    @pytest.mark.asyncio
+    async def test_returns_results_in_order(self, scheduler):
+        assert await gather_or_cancel(
+            scheduler.run(Priority.BATCH, sum, [1]), scheduler.run(Priority.BATCH, sum, [2])
+        ) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_the_siblings(self, scheduler):
+        release, ran = threading.Event(), []
+        blocker = await occupy(scheduler, release)
+
+        chunks = gather_or_cancel(
+            scheduler.run(Priority.BATCH, ran.append, 1, deadline=time.monotonic() + 0.01),
+            scheduler.run(Priority.BATCH, ran.append, 2),
+            scheduler.run(Priority.BATCH, ran.append, 3)
+        )
+        waiting = asyncio.create_task(chunks)
+        await asyncio.sleep(0.05)
+        release.set()
+
+        with pytest.raises(DeadlineExceededError):
+            await waiting
+        await blocker
+        await asyncio.sleep(0.01)
+
+        # The second call took the freed worker before the first failed, the third never ran
+        assert ran == [2]
+        assert scheduler.running == 0
+        assert scheduler.stats()["classes"]["batch"]["cancelled"] == 2
+
+
+class TestPercentile:
+    """Test nearest-rank percentiles"""
+
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 100) == 100
+        assert percentile([3], 99) == 3
+
+    def test_empty(self):
+        assert percentile([], 50) is None
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.models.schemas import SentimentLabel, SentimentResult, SentimentScore
+from app.services.event_broker import EventBroker
+from app.services.job_service import JobService
+
+
+def fake_analyze(calls):
+    def analyze(texts, languages, model=None, approximate=False):
+        calls.append(list(texts))
+        if "boom" in texts:
+            raise RuntimeError("model failed")
+        return [
+            SentimentResult(
+                text=text,
+                label=SentimentLabel.POSITIVE if "good" in text else SentimentLabel.NEGATIVE,
+                scores=SentimentScore(positive=0.9, negative=0.1, neutral=0.0),
+                confidence=0.9,
+                language=language or "en",
+                model_used="test"
+            )
+            for text, language in zip(texts, languages)
+        ]
+    return analyze
+
+
+class TestJobService:
+    """Test background batch jobs and their events"""
+
+    @pytest.mark.asyncio
+    async def test_batch_publishes_items_progress_and_done(self, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MODEL_BATCH_SIZE", 2)
+
+        broker = EventBroker()
+        calls = []
+        service = JobService(broker=broker, analyze_batch=fake_analyze(calls))
+        texts = ["good one", "bad one", "good two"]
+
+        job = service.start_batch(texts)
+        with broker.subscribe(job.topic) as queue:
+            await job.task
+
+            events = []
+            while not queue.empty():
+                events.append(queue.get_nowait())
+
+        assert calls == [["good one", "bad one"], ["good two"]]
+        assert [event["event"] for event in events] == [
+            "item", "item", "progress", "item", "progress", "done"
+        ]
+        assert [event["data"]["index"] for event in events if event["event"] == "item"] == [0, 1, 2]
+
+        done = events[-1]["data"]
+        assert done["result"]["summary"] == {"positive": 2, "negative": 1, "neutral": 0}
+        assert job.snapshot()["status"] == "done"
+        assert len(job.snapshot()["results"]) == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_job_publishes_error(self):
+        broker = EventBroker()
+        service = JobService(broker=broker, analyze_batch=fake_analyze([]))
+
+        job = service.start_batch(["boom"])
+        with broker.subscribe(job.topic) as queue:
+            await job.task
+            event = queue.get_nowait()
+
+        assert event["event"] == "error"
+        assert job.status == "failed"
+        assert job.error == "model failed"
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_pruned(self):
+        service = JobService(broker=EventBroker(), max_jobs=2, analyze_batch=fake_analyze([]))
+
+        jobs = [service.start_batch(["good"]) for _ in range(3)]
+        await asyncio.gather(*(job.task for job in jobs))
+        service.start_batch(["good"])
+
+        assert service.get(jobs[0].id) is None
+        assert len(service.jobs) == 2
+        await service.shutdown()
@@ -0,0 +1,83 @@
+import os
+import pytest
+from app.services.model_store import ModelStore
+
+MODEL_ID = "org/some-model"
+
+
+def fake_snapshot(weights: bytes = b"weights"):
+    """Writer producing the files of a tiny exported model"""
+    def write(directory):
+        with open(os.path.join(directory, "model.safetensors"), "wb") as f:
+            f.write(weights)
+        with open(os.path.join(directory, "config.json"), "w") as f:
+            f.write("{}")
+    return write
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ModelStore(str(tmp_path))
+
+
+class TestModelStore:
+    """Test versioned model snapshots"""
+
+    def test_empty_store(self, store):
+        assert store.current(MODEL_ID) is None
+        assert store.versions(MODEL_ID) == []
+
+    def test_save_writes_manifest_and_activates(self, store):
+        path = store.save(MODEL_ID, "sentiment-analysis", "abc123", fake_snapshot())
+
+        assert path == os.path.join(store.root, "org--some-model", "abc123")
+        assert store.current(MODEL_ID) == path
+
+        manifest = store.manifest(path)
+        assert manifest["model_id"] == MODEL_ID
+        assert manifest["task"] == "sentiment-analysis"
+        assert set(manifest["files"]) == {"model.safetensors", "config.json"}
+        assert manifest["files"]["model.safetensors"]["size"] == len(b"weights")
+        assert store.verify(path) == []
+
+    def test_failed_write_leaves_nothing(self, store):
+        def write(directory):
+            fake_snapshot()(directory)
+            raise RuntimeError("download failed")
+
+        with pytest.raises(RuntimeError):
+            store.save(MODEL_ID, "sentiment-analysis", "abc123", write)
+
+        assert store.current(MODEL_ID) is None
+        assert os.listdir(store.model_dir(MODEL_ID)) == []
+
+    def test_versions_and_activate(self, store):
+        store.save(MODEL_ID, "sentiment-analysis", "v1", fake_snapshot(b"one"))
+        store.save(MODEL_ID, "sentiment-analysis", "v2", fake_snapshot(b"two"))
+
+        assert store.versions(MODEL_ID) == ["v1", "v2"]
+        assert os.path.basename(store.current(MODEL_ID)) == "v2"
+
+        store.activate(MODEL_ID, "v1")
+        assert os.path.basename(store.current(MODEL_ID)) == "v1"
+
+    def test_verify_detects_changes(self, store):
+        path = store.save(MODEL_ID, "sentiment-analysis", "v1", fake_snapshot())
+
+        with open(os.path.join(path, "model.safetensors"), "wb") as f:
+            f.write(b"tampered")
+        os.remove(os.path.join(path, "config.json"))
+
+        assert sorted(store.verify(path)) == [
+            "config.json: missing",
+            "model.safetensors: checksum mismatch",
+        ]
+
+    def test_prune_keeps_newest_and_current(self, store):
+        for version in ["v1", "v2", "v3", "v4"]:
+            store.save(MODEL_ID, "sentiment-analysis", version, fake_snapshot(version.encode()))
+        store.activate(MODEL_ID, "v1")
+
+        assert store.prune(MODEL_ID, keep=2) == ["v2"]
+        assert store.versions(MODEL_ID) == ["v1", "v3", "v4"]
+        assert os.path.basename(store.current(MODEL_ID)) == "v1"
@@ -0,0 +1,281 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.database import MonitorTrend, TrendData
+from app.services.monitor_service import MonitorService, RollingWindow, aggregate_tweets
+
+
+def analyzed(tweet_id, label="positive", emotion="joy"):
+    return {
+        "id": tweet_id,
+        "text": f"tweet {tweet_id}",
+        "sentiment": {
+            "label": label,
+            "confidence": 0.8,
+            "scores": {
+                "positive": 0.8 if label == "positive" else 0.1,
+                "negative": 0.8 if label == "negative" else 0.1,
+                "neutral": 0.1
+            }
+        },
+        "emotion": {"label": emotion, "confidence": 0.7}
+    }
+
+
+class FakeTweetSource:
+    """Serves the newest tweets between since_id and until_id from a growing timeline"""
+
+    def __init__(self):
+        self.timeline = []
+        self.calls = []
+
+    def post(self, *labels, created_at=None):
+        next_id = len(self.timeline) + 1
+        for offset, label in enumerate(labels):
+            tweet = {"id": next_id + offset, "text": f"tweet {next_id + offset}", "label": label}
+            if created_at is not None:
+                tweet["created_at"] = str(created_at)
+            self.timeline.append(tweet)
+
+    async def __call__(self, query, max_results, since_id=None, until_id=None):
+        self.calls.append(since_id)
+        tweets = [
+            tweet for tweet in self.timeline
+            if (since_id is None or tweet["id"] > since_id)
+            and (until_id is None or tweet["id"] < until_id)
+        ]
+        return list(reversed(tweets))[:max_results]
+
+
+def fake_analyze(batches):
+    def analyze(tweets, language=None):
+        batches.append([tweet["id"] for tweet in tweets])
+        return [{**tweet, **analyzed(tweet["id"], tweet["label"])} for tweet in tweets]
+    return analyze
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def service(db, clock):
+    source = FakeTweetSource()
+    batches = []
+    service = MonitorService(
+        source=source,
+        analyze=fake_analyze(batches),
+        session_factory=async_sessionmaker(db.bind, expire_on_commit=False),
+        clock=clock
+    )
+    service.fake_source = source
+    service.batches = batches
+    yield service
+
+
+class TestRollingWindow:
+    """Test ring buffer aggregates"""
+
+    def test_old_buckets_expire(self):
+        window = RollingWindow(bucket_seconds=1, buckets=60, clock=lambda: 0)
+        window.add(aggregate_tweets([analyzed(1)]), now=0)
+        window.add(aggregate_tweets([analyzed(2, "negative")]), now=30)
+
+        assert window.snapshot(now=59)["total"] == 2
+        distribution = window.snapshot(now=60)["sentiment_distribution"]
+        assert distribution == {"positive": 0, "negative": 1, "neutral": 0}
+        assert window.snapshot(now=500)["total"] == 0
+
+    def test_averages(self):
+        window = RollingWindow(bucket_seconds=60, buckets=60, clock=lambda: 0)
+        window.add(aggregate_tweets([analyzed(1), analyzed(2, "negative", "anger")]), now=0)
+
+        snapshot = window.snapshot(now=0)
+        assert snapshot["average_sentiment_scores"]["positive"] == pytest.approx(0.45)
+        assert snapshot["emotion_distribution"]["anger"] == 1
+
+
+class TestMonitorService:
+    """Test polling with a fake tweet source"""
+
+    @pytest.mark.asyncio
+    async def test_polls_only_new_tweets(self, service):
+        monitor = service.create("#brand", interval=3600)
+        await service.delete(monitor.id)
+
+        service.fake_source.post("positive", "negative")
+        assert await service.poll(monitor) == 2
+        assert monitor.since_id == 2
+
+        service.fake_source.post("positive")
+        assert await service.poll(monitor) == 1
+        assert await service.poll(monitor) == 0
+
+        assert service.fake_source.calls == [None, 2, 3]
+        assert service.batches == [[2, 1], [3]]
+        assert monitor.snapshot()["total_tweets"] == 3
+
+    @pytest.mark.asyncio
+    async def test_windows_roll(self, service, clock):
+        monitor = service.create("#brand", interval=3600)
+        await service.delete(monitor.id)
+
+        service.fake_source.post("positive", "positive")
+        await service.poll(monitor)
+
+        clock.now += 120
+        service.fake_source.post("negative")
+        await service.poll(monitor)
+
+        windows = monitor.snapshot()["windows"]
+        distribution = windows["minute"]["sentiment_distribution"]
+        assert distribution == {"positive": 0, "negative": 1, "neutral": 0}
+        assert windows["hour"]["total"] == 3
+
+    @pytest.mark.asyncio
+    async def test_persists_hourly_trend(self, service, db):
+        monitor = service.create("#brand", interval=3600)
+        await service.delete(monitor.id)
+
+        service.fake_source.post("positive", "negative", "positive")
+        await service.poll(monitor)
+        service.fake_source.post("neutral")
+        await service.poll(monitor)
+
+        query = select(MonitorTrend).where(MonitorTrend.query == "#brand")
+        trends = (await db.execute(query)).scalars().all()
+        assert len(trends) == 1
+        assert trends[0].total_analyses == 4
+        assert trends[0].positive_count == 2
+        assert trends[0].hour.minute == 0
+
+        # Daily trend rows are left alone
+        assert (await db.execute(select(TrendData))).scalars().all() == []
+
+    @pytest.mark.asyncio
+    async def test_monitors_of_one_query_keep_their_own_rows(self, service, db):
+        first = service.create("#brand", interval=3600)
+        second = service.create("#brand", interval=3600)
+        await service.shutdown()
+
+        service.fake_source.post("positive", "negative")
+        await service.poll(first)
+        service.fake_source.post("neutral")
+        await service.poll(second)
+
+        query = select(MonitorTrend).where(MonitorTrend.query == "#brand")
+        trends = (await db.execute(query)).scalars().all()
+        assert sorted(trend.total_analyses for trend in trends) == [2, 3]
+
+    @pytest.mark.asyncio
+    async def test_failed_analysis_is_retried(self, service):
+        monitor = service.create("#brand", interval=3600)
+        await service.delete(monitor.id)
+        analyze = service.analyze
+
+        def fail(tweets, language=None):
+            raise RuntimeError("model not ready")
+
+        service.fake_source.post("positive", "negative")
+        service.analyze = fail
+        with pytest.raises(RuntimeError):
+            await service.poll(monitor)
+        assert monitor.since_id is None
+
+        service.analyze = analyze
+        assert await service.poll(monitor) == 2
+        assert monitor.since_id == 2
+        assert monitor.snapshot()["total_tweets"] == 2
+
+    @pytest.mark.asyncio
+    async def test_backlog_is_paged_through(self, service, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MONITOR_MAX_RESULTS", 2)
+
+        monitor = service.create("#brand", interval=3600)
+        await service.delete(monitor.id)
+
+        # A new monitor starts from the newest tweets instead of the search history
+        service.fake_source.post(*["positive"] * 5)
+        assert await service.poll(monitor) == 2
+        assert not monitor.snapshot()["backlog"]
+        assert monitor.since_id == 5
+
+        service.fake_source.post(*["positive"] * 5)
+        assert await service.poll(monitor) == 2
+        assert monitor.snapshot()["backlog"]
+
+        # A tweet posted while the backlog drains waits for the next round
+        service.fake_source.post("negative")
+        while monitor.snapshot()["backlog"]:
+            await service.poll(monitor)
+        assert monitor.since_id == 10
+
+        await service.poll(monitor)
+        assert sorted(id for batch in service.batches for id in batch) == [4, 5, 6, 7, 8, 9, 10, 11]
+        assert monitor.snapshot()["total_tweets"] == 8
+
+    @pytest.mark.asyncio
+    async def test_tweets_count_when_they_were_posted(self, service, db):
+        monitor = service.create("#brand", interval=3600)
+        await service.delete(monitor.id)
+
+        posted = datetime.now(timezone.utc) - timedelta(hours=2)
+        service.fake_source.post("negative", created_at=posted)
+        recent = datetime.now(timezone.utc) - timedelta(seconds=5)
+        service.fake_source.post("positive", created_at=recent)
+        await service.poll(monitor)
+
+        snapshot = monitor.snapshot()
+        assert snapshot["total_tweets"] == 2
+        assert snapshot["windows"]["minute"]["sentiment_distribution"]["positive"] == 1
+        assert snapshot["windows"]["hour"]["total"] == 1
+
+        by_hour = select(MonitorTrend).order_by(MonitorTrend.hour)
+        trends = (await db.execute(by_hour)).scalars().all()
+        assert trends[0].hour == posted.replace(tzinfo=None, minute=0, second=0, microsecond=0)
+        assert [trend.negative_count for trend in trends] == [1, 0]
+
+        # A later tweet of the same hour adds to its row
+        service.fake_source.post("negative", created_at=posted)
+        await service.poll(monitor)
+        trend = (await db.execute(by_hour)).scalars().first()
+        await db.refresh(trend)
+        assert (trend.total_analyses, trend.negative_count) == (2, 2)
+
+    @pytest.mark.asyncio
+    async def test_background_task_polls(self, service):
+        service.fake_source.post("positive")
+        monitor = service.create("#brand", interval=3600)
+
+        for _ in range(50):
+            if monitor.polls:
+                break
+            await asyncio.sleep(0.01)
+
+        assert monitor.polls == 1
+        assert monitor.snapshot()["windows"]["minute"]["total"] == 1
+        await service.shutdown()
+        assert service.monitors == {}
+
+    @pytest.mark.asyncio
+    async def test_monitor_limit(self, service, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MONITOR_MAX", 1)
+
+        service.create("#one", interval=3600)
+        with pytest.raises(ValueError):
+            service.create("#two", interval=3600)
+
+        await service.shutdown()
@@ -0,0 +1,213 @@
+import random
+from pathlib import Path
+import pytest
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from app.services.near_duplicate_index import NearDuplicateIndex, fingerprint, negation_signature
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.services.text_normalizer import TextNormalizer
+from app.services.vader_engine import VaderEngine
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+TEXT = "The new phone is amazing and the camera is the best I have ever used"
+
+
+def distance(first: str, second: str) -> int:
+    return (fingerprint(first, min_tokens=0) ^ fingerprint(second, min_tokens=0)).bit_count()
+
+
+@pytest.fixture
+def index():
+    return NearDuplicateIndex(max_size=100, max_distance=3)
+
+
+class TestFingerprint:
+    """Test SimHash fingerprints"""
+
+    def test_deterministic(self):
+        assert fingerprint(TEXT) == fingerprint(TEXT)
+
+    def test_case_and_spacing_do_not_matter(self):
+        assert distance(TEXT, TEXT.upper().replace(" ", "  ")) == 0
+
+    def test_small_edits_stay_close(self):
+        assert distance(TEXT, TEXT + " 😍") <= 3
+        assert distance(TEXT, TEXT.replace("camera", "camra")) <= 3
+
+    def test_different_texts_are_far(self):
+        other = "Customer service was terrible and the delivery took three weeks"
+        assert distance(TEXT, other) > 10
+
+    def test_short_texts_have_no_fingerprint(self):
+        assert fingerprint("not good at all", min_tokens=6) is None
+        assert fingerprint(TEXT, min_tokens=6) is not None
+
+    def test_negation_signature(self):
+        assert negation_signature(TEXT) == ""
+        assert negation_signature("It isn't amazing, not at all, NOT ever") == "n't not"
+        assert negation_signature("Não gostei, nunca mais") == "nunca não"
+
+
+class TestNearDuplicateIndex:
+    """Test the bounded near-duplicate index"""
+
+    def test_finds_closest_within_distance(self, index):
+        index.add("en", "far", 0b1111)
+        index.add("en", "near", 0b1)
+
+        assert index.find("en", 0) == "near"
+        assert index.find("en", 1 << 40 | 0b1) == "near"
+        assert index.find("en", 0b1111 << 20) is None
+
+    def test_band_split_finds_every_match(self):
+        rng = random.Random(1)
+        for max_distance in range(8):
+            index = NearDuplicateIndex(max_size=10, max_distance=max_distance)
+            for _ in range(50):
+                value = rng.getrandbits(64)
+                index.add("", "entry", value)
+                flipped = value
+                for bit in rng.sample(range(64), max_distance):
+                    flipped ^= 1 << bit
+                assert index.find("", flipped) == "entry"
+
+    def test_namespaces_are_separate(self, index):
+        index.add("transformers\0en", "key", 42)
+        assert index.find("transformers\0pt", 42) is None
+
+    def test_evicts_least_recently_used(self):
+        index = NearDuplicateIndex(max_size=2, max_distance=0)
+        index.add("", "a", 1)
+        index.add("", "b", 2)
+        index.find("", 1)
+        index.add("", "c", 3)
+
+        assert index.find("", 2) is None
+        assert index.find("", 1) == "a"
+        assert index.stats()["size"] == 2
+        assert len(index._buckets) == 2
+
+    def test_discard(self, index):
+        index.add("", "a", 1)
+        index.discard("a")
+
+        assert index.find("", 1) is None
+        assert index._buckets == {}
+
+    def test_disabled_with_zero_size(self):
+        index = NearDuplicateIndex(max_size=0, max_distance=3)
+        index.add("", "a", 1)
+        assert index.find("", 1) is None
+
+
+class TestApproximateReuse:
+    """Test near-duplicate reuse in the analyzer result cache"""
+
+    @pytest.fixture
+    def analyzer(self):
+        return SentimentAnalyzer()
+
+    @staticmethod
+    def predict(calls):
+        def run(texts, languages):
+            calls.extend(texts)
+            return [{"text": text} for text in texts]
+        return run
+
+    def test_opt_in(self, analyzer):
+        calls = []
+        analyzer._cached("nltk", [TEXT], ["en"], self.predict(calls))
+        results, approximated = analyzer._cached("nltk", [TEXT + " 😍"], ["en"], self.predict(calls))
+
+        assert calls == [TEXT, TEXT + " 😍"]
+        assert approximated == [False]
+
+    def test_reuses_near_duplicate(self, analyzer):
+        calls = []
+        analyzer._cached("nltk", [TEXT], ["en"], self.predict(calls))
+        results, approximated = analyzer._cached(
+            "nltk", [TEXT + " 😍", TEXT], ["en", "en"], self.predict(calls), approximate=True
+        )
+
+        assert calls == [TEXT]
+        assert results == [{"text": TEXT}, {"text": TEXT}]
+        assert approximated == [True, False]
+
+    def test_approximate_results_are_not_cached_as_exact(self, analyzer):
+        calls = []
+        analyzer._cached("nltk", [TEXT], ["en"], self.predict(calls))
+        analyzer._cached("nltk", [TEXT + " 😍"], ["en"], self.predict(calls), approximate=True)
+        results, approximated = analyzer._cached("nltk", [TEXT + " 😍"], ["en"], self.predict(calls))
+
+        assert results == [{"text": TEXT + " 😍"}]
+        assert approximated == [False]
+
+    def test_other_model_or_language_is_not_reused(self, analyzer):
+        calls = []
+        analyzer._cached("nltk", [TEXT], ["en"], self.predict(calls))
+        analyzer._cached(
+            "transformers", [TEXT + " 😍"], ["en"], self.predict(calls), approximate=True
+        )
+        analyzer._cached("nltk", [TEXT + " 😍"], ["pt"], self.predict(calls), approximate=True)
+
+        assert len(calls) == 3
+
+    def test_negated_text_is_not_reused(self, analyzer):
+        negated = TEXT.replace("is amazing", "is not amazing")
+        calls = []
+        analyzer._cached("nltk", [TEXT], ["en"], self.predict(calls))
+        results, approximated = analyzer._cached(
+            "nltk", [negated], ["en"], self.predict(calls), approximate=True
+        )
+
+        assert distance(TEXT, negated) <= 3
+        assert calls == [TEXT, negated]
+        assert approximated == [False]
+
+    def test_expired_result_is_not_reused(self, analyzer):
+        calls = []
+        analyzer._cached("nltk", [TEXT], ["en"], self.predict(calls))
+        analyzer.result_cache.clear()
+        results, approximated = analyzer._cached(
+            "nltk", [TEXT + " 😍"], ["en"], self.predict(calls), approximate=True
+        )
+
+        assert approximated == [False]
+        assert calls == [TEXT, TEXT + " 😍"]
+        # The stale entry was dropped, the fresh result took its place
+        namespace = SentimentAnalyzer._near_namespace("nltk", TEXT, "en")
+        fresh_key = analyzer.cache_key(TEXT + " 😍", "en", "nltk")
+        assert analyzer.near_duplicates.find(namespace, fingerprint(TEXT)) == fresh_key
+        assert analyzer.near_duplicates.stats()["size"] == 1
+
+
+class TestNearDuplicateBenchmark:
+    """Hit rate and accuracy of approximate reuse on the fixture corpus"""
+
+    def test_hit_rate_and_accuracy(self):
+        normalizer = TextNormalizer()
+        corpus = (FIXTURES / "near_duplicate_corpus.txt").read_text(encoding="utf-8")
+        texts = [normalizer.normalize(line) for line in corpus.splitlines()]
+        lexicon_file = f"file:{FIXTURES / 'vader_lexicon_sample.txt'}"
+        lexicon = SentimentIntensityAnalyzer(lexicon_file=lexicon_file).lexicon
+        scores = VaderEngine(lexicon, workers=0).polarity_scores_batch(texts)
+        labels = {
+            text: SentimentAnalyzer._vader_result(text_scores)["label"]
+            for text, text_scores in zip(texts, scores)
+        }
+
+        def predict(batch, _):
+            return [labels[text] for text in batch]
+
+        analyzer = SentimentAnalyzer()
+        reused = correct = 0
+        for text in texts:
+            (label,), (approximate,) = analyzer._cached(
+                "nltk", [text], ["en"], predict, approximate=True
+            )
+            if approximate:
+                reused += 1
+                correct += label == labels[text]
+
+        assert reused / len(set(texts)) > 0.25
+        assert correct / reused > 0.95
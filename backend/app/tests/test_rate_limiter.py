@@ -0,0 +1,140 @@
+import pytest
+from fastapi import HTTPException, Response
+from app.api.dependencies import RateLimitIdentity, enforce_rate_limit
+from app.services.rate_limiter import TokenBucketLimiter, RedisTokenBucketLimiter, WINDOW_SECONDS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucketLimiter:
+    """Test in-process token buckets"""
+
+    @pytest.mark.asyncio
+    async def test_cost_is_weighted(self):
+        limiter = TokenBucketLimiter(clock=FakeClock())
+
+        result = await limiter.acquire("key:1", limit=100, cost=60)
+        assert result.allowed
+        assert result.remaining == 40
+
+        result = await limiter.acquire("key:1", limit=100, cost=60)
+        assert not result.allowed
+        assert result.remaining == 40
+        assert int(result.headers["Retry-After"]) == 20 * WINDOW_SECONDS // 100
+
+    @pytest.mark.asyncio
+    async def test_refills_over_time(self):
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(clock=clock)
+
+        await limiter.acquire("key:1", limit=3600, cost=3600)
+        assert not (await limiter.acquire("key:1", limit=3600)).allowed
+
+        clock.now += 10
+        result = await limiter.acquire("key:1", limit=3600, cost=10)
+        assert result.allowed
+        assert result.headers["X-RateLimit-Reset"] == str(WINDOW_SECONDS)
+
+    @pytest.mark.asyncio
+    async def test_keys_are_independent(self):
+        limiter = TokenBucketLimiter(clock=FakeClock())
+
+        await limiter.acquire("key:1", limit=10, cost=10)
+        result = await limiter.acquire("key:2", limit=10, cost=1)
+
+        assert result.allowed
+        assert result.headers == {
+            "X-RateLimit-Limit": "10",
+            "X-RateLimit-Remaining": "9",
+            "X-RateLimit-Reset": str(WINDOW_SECONDS // 10),
+        }
+
+    @pytest.mark.asyncio
+    async def test_zero_limit_rejects(self):
+        limiter = TokenBucketLimiter()
+        assert not (await limiter.acquire("key:1", limit=0)).allowed
+
+    @pytest.mark.asyncio
+    async def test_bucket_count_is_bounded(self):
+        limiter = TokenBucketLimiter(max_buckets=2)
+        for idx in range(3):
+            await limiter.acquire(f"ip:{idx}", limit=10)
+
+        assert list(limiter._buckets) == ["ip:1", "ip:2"]
+
+    @pytest.mark.asyncio
+    async def test_refund_is_capped_at_the_limit(self):
+        limiter = TokenBucketLimiter(clock=FakeClock())
+
+        await limiter.acquire("key:1", limit=100, cost=100)
+        assert (await limiter.refund("key:1", limit=100, tokens=60)).remaining == 60
+        assert (await limiter.refund("key:1", limit=100, tokens=60)).remaining == 100
+
+
+class TestEnforceRateLimit:
+    """Test charging requests to their identity"""
+
+    @pytest.mark.asyncio
+    async def test_cost_above_the_limit_fails_fast(self):
+        identity = RateLimitIdentity("key:over-limit", 100)
+
+        with pytest.raises(HTTPException) as error:
+            await enforce_rate_limit(identity, Response(), cost=101)
+
+        assert error.value.status_code == 413
+        assert "Retry-After" not in (error.value.headers or {})
+
+    @pytest.mark.asyncio
+    async def test_capped_cost_is_charged(self):
+        identity = RateLimitIdentity("key:capped", 100)
+        response = Response()
+
+        await enforce_rate_limit(identity, response, cost=identity.cap(5000))
+
+        assert identity.cap(5000) == 100
+        assert response.headers["X-RateLimit-Remaining"] == "0"
+
+
+class TestRedisTokenBucketLimiter:
+    """Test the shared Redis limiter"""
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_redis_is_down(self):
+        import redis.asyncio as redis
+
+        client = redis.Redis(host="127.0.0.1", port=1, socket_connect_timeout=0.1)
+        limiter = RedisTokenBucketLimiter(client=client)
+
+        result = await limiter.acquire("key:1", limit=10, cost=4)
+        assert result.allowed
+        assert result.remaining == 6
+
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_atomic_script(self):
+        import redis.asyncio as redis
+        from app.core.config import settings
+
+        client = redis.Redis(
+            host=settings.REDIS_HOST, port=settings.REDIS_PORT, socket_connect_timeout=0.5
+        )
+        try:
+            await client.ping()
+        except Exception:
+            pytest.skip("Redis is not available")
+
+        limiter = RedisTokenBucketLimiter(client=client, prefix="ratelimit:test:")
+        await client.delete("ratelimit:test:key:1")
+
+        assert (await limiter.acquire("key:1", limit=10, cost=7)).allowed
+        result = await limiter.acquire("key:1", limit=10, cost=7)
+        assert not result.allowed
+        assert result.remaining == 3
+
+        await client.delete("ratelimit:test:key:1")
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import pytest
+from datetime import datetime, timedelta
+from app.services.history_service import HistoryService
+from app.services.report_service import ReportService
+
+DATA = [{
+    "id": 1,
+    "text": "I love this product",
+    "sentiment_label": "positive",
+    "sentiment_confidence": 0.95,
+    "emotion_label": "joy",
+    "language": "en"
+}]
+
+
+class TestReportKeys:
+    """Test report content addressing"""
+
+    def test_key_depends_on_params_and_watermark(self):
+        key = ReportService.report_key({"days": 7}, "10:42")
+
+        assert key == ReportService.report_key({"days": 7}, "10:42")
+        assert key != ReportService.report_key({"days": 30}, "10:42")
+        assert key != ReportService.report_key({"days": 7}, "11:43")
+
+    @pytest.mark.asyncio
+    async def test_watermark_changes_with_new_analyses(self, db):
+        since = datetime.utcnow() - timedelta(days=1)
+        before = await ReportService.get_watermark(db, since)
+
+        await HistoryService.create_analysis_record(db, "new text", "sentiment")
+
+        assert await ReportService.get_watermark(db, since) != before
+
+    def test_invalid_key_is_missing(self, tmp_path):
+        service = ReportService(cache_dir=str(tmp_path))
+        assert service.get_status("../secret")["status"] == "missing"
+
+
+class TestBackgroundRendering:
+    """Test rendering reports in the worker pool"""
+
+    @pytest.mark.asyncio
+    async def test_render_then_serve_from_cache(self, tmp_path):
+        service = ReportService(cache_dir=str(tmp_path), max_workers=1)
+        key = ReportService.report_key({"days": 7}, "1:1")
+
+        try:
+            assert service.submit(key, DATA)["status"] == "pending"
+            assert service.get_status(key)["status"] == "pending"
+
+            await asyncio.wait_for(service.jobs[key], timeout=60)
+
+            status = service.get_status(key)
+            assert status["status"] == "ready"
+            with open(status["path"], "rb") as f:
+                assert f.read(4) == b"%PDF"
+
+            # A cached report is not rendered again
+            assert service.submit(key, DATA)["status"] == "ready"
+            assert key not in service.jobs
+            assert os.listdir(tmp_path) == [f"{key}.pdf"]
+        finally:
+            service.shutdown()
+
+
+class TestSharedStatus:
+    """Test report status shared by server workers through the cache directory"""
+
+    KEY = "a" * 64
+
+    @pytest.mark.asyncio
+    async def test_pending_is_visible_to_other_workers(self, tmp_path):
+        first = ReportService(cache_dir=str(tmp_path))
+        second = ReportService(cache_dir=str(tmp_path))
+        os.close(os.open(first.marker_path(self.KEY, "pending"), os.O_CREAT | os.O_WRONLY))
+
+        assert second.get_status(self.KEY)["status"] == "pending"
+        # The other worker does not start a second render
+        assert second.submit(self.KEY, DATA)["status"] == "pending"
+        assert second.jobs == {}
+
+    @pytest.mark.asyncio
+    async def test_failure_is_recorded_and_expires(self, tmp_path, monkeypatch):
+        first = ReportService(cache_dir=str(tmp_path))
+        second = ReportService(cache_dir=str(tmp_path))
+        os.close(os.open(first.marker_path(self.KEY, "pending"), os.O_CREAT | os.O_WRONLY))
+
+        job = asyncio.get_running_loop().create_future()
+        job.set_exception(RuntimeError("font missing"))
+        first._finish(self.KEY, job)
+
+        assert second.get_status(self.KEY) == {"status": "failed", "error": "font missing"}
+
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "REPORT_FAILURE_TTL", 0)
+        assert second.get_status(self.KEY)["status"] == "missing"
+        assert os.listdir(tmp_path) == []
+
+    def test_stale_pending_expires(self, tmp_path, monkeypatch):
+        service = ReportService(cache_dir=str(tmp_path))
+        os.close(os.open(service.marker_path(self.KEY, "pending"), os.O_CREAT | os.O_WRONLY))
+
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "REPORT_PENDING_TIMEOUT", 0)
+        assert service.get_status(self.KEY)["status"] == "missing"
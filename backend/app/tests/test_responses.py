@@ -0,0 +1,91 @@
+import json
+import pytest
+from fastapi import HTTPException, Response
+import app.api.responses as responses
+from app.api.dependencies import ResultFields
+from app.api.responses import FastJSONResponse, each, model_response
+from app.models.schemas import (
+    BatchSentimentResult, EmotionResult, SentimentLabel, SentimentResult, SentimentScore
+)
+
+
+def sentiment_result(text="I love it"):
+    return SentimentResult.model_construct(
+        text=text,
+        label=SentimentLabel.POSITIVE,
+        scores=SentimentScore.model_construct(positive=0.9, negative=0.1, neutral=0.0),
+        confidence=0.9,
+        language="en",
+        model_used="NLTK (VADER)"
+    )
+
+
+class TestModelResponse:
+    """Test rendering trusted models"""
+
+    def test_renders_like_the_validated_model(self):
+        result = sentiment_result()
+        validated = SentimentResult.model_validate(result.model_dump())
+
+        body = json.loads(model_response(result).body)
+        assert body == json.loads(validated.model_dump_json())
+        assert body["label"] == "positive"
+
+    def test_keeps_injected_headers(self):
+        injected = Response()
+        injected.headers["X-RateLimit-Remaining"] = "41"
+
+        rendered = model_response(sentiment_result(), injected)
+        assert rendered.headers["X-RateLimit-Remaining"] == "41"
+        assert rendered.headers["content-type"] == "application/json"
+
+    def test_excludes_from_each_item(self):
+        batch = BatchSentimentResult.model_construct(
+            results=[sentiment_result("a"), sentiment_result("b")],
+            summary={"positive": 2, "negative": 0, "neutral": 0},
+            average_confidence=0.9
+        )
+
+        body = json.loads(model_response(batch, exclude={"results": each({"text", "scores"})}).body)
+        assert [set(result) for result in body["results"]] == [
+            {"label", "confidence", "language", "model_used", "aspects", "approximate"}
+        ] * 2
+        assert body["summary"]["positive"] == 2
+
+
+class TestFastJSONResponse:
+    """Test the default response class"""
+
+    def test_renders_with_orjson(self):
+        content = {"label": SentimentLabel.POSITIVE, "counts": {1: 2}}
+        expected = {"label": "positive", "counts": {"1": 2}}
+        assert json.loads(FastJSONResponse(content).body) == expected
+
+    def test_renders_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(responses, "orjson", None)
+        content = {"label": SentimentLabel.POSITIVE}
+        assert json.loads(FastJSONResponse(content).body) == {"label": "positive"}
+
+
+class TestResultFields:
+    """Test the fields and compact query parameters"""
+
+    def test_all_fields_by_default(self):
+        assert ResultFields(fields=None, compact=False).exclude(SentimentResult) is None
+
+    def test_compact(self):
+        fields = ResultFields(fields=None, compact=True)
+        assert fields.exclude(SentimentResult) == {"text", "scores", "model_used"}
+        assert fields.exclude(EmotionResult) == {"text", "scores", "model_used"}
+
+    def test_fields(self):
+        fields = ResultFields(fields="label, confidence", compact=False)
+        kept = set(SentimentResult.model_fields) - fields.exclude(SentimentResult)
+        assert kept == {"label", "confidence"}
+        assert set(EmotionResult.model_fields) - fields.exclude(EmotionResult) == {"confidence"}
+
+    def test_unknown_field(self):
+        with pytest.raises(HTTPException) as error:
+            ResultFields(fields="label,nope", compact=False)
+        assert error.value.status_code == 422
+        assert "nope" in error.value.detail
@@ -0,0 +1,123 @@
+import gzip
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, func
+from app.models.database import Analysis, TrendData
+from app.services.retention_service import RetentionService
+
+NOW = datetime(2026, 6, 15, 12, 0, 0)
+
+
+def old_analysis(days_ago, label="positive", emotion="joy"):
+    return Analysis(
+        text=f"{label} text",
+        analysis_type="sentiment",
+        sentiment_label=label,
+        sentiment_positive=0.8 if label == "positive" else 0.1,
+        sentiment_negative=0.8 if label == "negative" else 0.1,
+        sentiment_confidence=0.8,
+        emotion_label=emotion,
+        created_at=NOW - timedelta(days=days_ago, hours=1)
+    )
+
+
+class TestPartitionNaming:
+    """Test monthly partition helpers"""
+
+    def test_partition_name_and_bounds(self):
+        name = RetentionService.partition_name(datetime(2026, 12, 9))
+        assert name == "analyses_y2026m12"
+        assert RetentionService.partition_bounds(name) == (
+            datetime(2026, 12, 1), datetime(2027, 1, 1)
+        )
+
+    def test_default_partition_has_no_bounds(self):
+        assert RetentionService.partition_bounds("analyses_default") is None
+
+    def test_cutoff_is_aligned_to_midnight(self):
+        assert RetentionService.get_cutoff(30, NOW) == datetime(2026, 5, 16)
+
+
+class TestRetentionRun:
+    """Test rollup-then-purge against SQLite"""
+
+    @pytest.mark.asyncio
+    async def test_rollup_archive_and_purge(self, db, tmp_path):
+        db.add_all([
+            old_analysis(100, "positive", "joy"),
+            old_analysis(100, "negative", "anger"),
+            old_analysis(120, "neutral", "joy"),
+            old_analysis(1, "positive", "joy"),
+        ])
+        await db.commit()
+
+        result = await RetentionService.run(
+            db, retention_days=90, archive_dir=str(tmp_path), now=NOW
+        )
+
+        assert result["rows"] == 3
+        assert result["days_rolled_up"] == 2
+        assert result["rows_deleted"] == 3
+
+        remaining = (await db.execute(select(func.count(Analysis.id)))).scalar()
+        assert remaining == 1
+
+        trends = (await db.execute(select(TrendData).order_by(TrendData.date))).scalars().all()
+        assert [t.total_analyses for t in trends] == [1, 2]
+        assert trends[1].positive_count == 1
+        assert trends[1].negative_count == 1
+        assert trends[1].emotion_distribution == {"joy": 1, "anger": 1}
+
+        with gzip.open(result["archive"], "rt") as archive:
+            rows = [json.loads(line) for line in archive]
+        assert len(rows) == 3
+        assert {row["sentiment_label"] for row in rows} == {"positive", "negative", "neutral"}
+
+    @pytest.mark.asyncio
+    async def test_dry_run_keeps_rows(self, db):
+        db.add(old_analysis(200))
+        await db.commit()
+
+        result = await RetentionService.run(
+            db, retention_days=90, archive_dir="", dry_run=True, now=NOW
+        )
+        assert result["rows"] == 1
+
+        remaining = (await db.execute(select(func.count(Analysis.id)))).scalar()
+        assert remaining == 1
+
+    @pytest.mark.asyncio
+    async def test_partitions_skipped_on_sqlite(self, db):
+        assert await RetentionService.ensure_partitions(db) == []
+
+    @pytest.mark.asyncio
+    async def test_rollup_across_batches(self, db):
+        db.add_all([old_analysis(100 + idx) for idx in range(5)])
+        await db.commit()
+
+        cutoff = RetentionService.get_cutoff(90, NOW)
+        result = await RetentionService.rollup_and_archive(db, cutoff, batch_size=2)
+
+        assert result == {"rows": 5, "days": 5}
+
+    @pytest.mark.asyncio
+    async def test_rollup_without_archive_skips_payloads(self, db):
+        db.add(old_analysis(100))
+        await db.commit()
+
+        statements = []
+
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.bind.sync_engine, "before_cursor_execute", capture)
+        try:
+            cutoff = RetentionService.get_cutoff(90, NOW)
+            assert await RetentionService.rollup_and_archive(db, cutoff) == {"rows": 1, "days": 1}
+        finally:
+            event.remove(db.bind.sync_engine, "before_cursor_execute", capture)
+
+        (query,) = [statement for statement in statements if "FROM analyses" in statement]
+        assert "sentiment_label" in query
+        assert "twitter_data" not in query and "analyses.text" not in query
@@ -6,7 +6,9 @@ from app.models.schemas import ModelType, SentimentLabel, EmotionLabel
 @pytest.fixture
 def analyzer():
     """Create sentiment analyzer instance"""
-    return SentimentAnalyzer()
+    analyzer = SentimentAnalyzer()
+    analyzer.load_models()
+    return analyzer
 
 
 class TestSentimentAnalyzer:
@@ -105,6 +107,21 @@ class TestSentimentAnalyzer:
         assert results[1].label == SentimentLabel.NEGATIVE
         assert all(r.confidence >= 0 for r in results)
 
+    def test_batch_matches_single_analysis(self, analyzer):
+        """Test batched passes return the same results as one text at a time"""
+        texts = ["I love this!", "This is terrible!", "Eu amo este produto!"]
+        languages = ["en", "en", "pt"]
+
+        sentiments = analyzer.analyze_sentiment_batch(texts, languages)
+        emotions = analyzer.analyze_emotions_batch(texts, languages)
+
+        for text, language, sentiment, emotion in zip(texts, languages, sentiments, emotions):
+            single = analyzer.analyze_sentiment(text, language=language)
+            assert sentiment.label == single.label
+            assert sentiment.confidence == pytest.approx(single.confidence, abs=1e-4)
+            single_emotion = analyzer.analyze_emotions(text, language)
+            assert emotion.primary_emotion == single_emotion.primary_emotion
+
     def test_empty_text(self, analyzer):
         """Test handling of empty or very short text"""
         try:
@@ -141,3 +158,41 @@ class TestSentimentAnalyzer:
         # Transformers
         result_transformers = analyzer.analyze_sentiment(text, model=ModelType.TRANSFORMERS)
         assert "Transformers" in result_transformers.model_used
+
+    def test_spacy_aspect_sentiment(self, analyzer):
+        """Test aspect-level sentiment from spaCy entities and noun chunks"""
+        text = "I love the camera on my new Samsung phone. The battery life is terrible."
+        result = analyzer.analyze_sentiment(text, language="en", model=ModelType.SPACY)
+
+        assert "spaCy" in result.model_used
+        aspects = {aspect.text: aspect for aspect in result.aspects}
+        assert aspects["The battery life"].type == "NOUN_CHUNK"
+        assert aspects["The battery life"].label == SentimentLabel.NEGATIVE
+        assert any(aspect.label == SentimentLabel.POSITIVE for aspect in result.aspects)
+
+    def test_spacy_batch_matches_single_analysis(self, analyzer):
+        """Test that batched spaCy analysis gives the same aspects"""
+        texts = ["The hotel in Lisbon was lovely.", "O atendimento do banco foi péssimo."]
+        languages = ["en", "pt"]
+
+        batch = analyzer.analyze_sentiment_batch(texts, languages, ModelType.SPACY)
+        single = [
+            analyzer.analyze_sentiment(text, language, ModelType.SPACY)
+            for text, language in zip(texts, languages)
+        ]
+
+        assert batch == single
+
+    def test_normalized_text_feeds_cache(self, analyzer):
+        """Test that variants of a tweet share one cached result but keep their own text"""
+        first = analyzer.analyze_sentiment(
+            "@alice I loooove this https://t.co/a", "en", ModelType.NLTK
+        )
+        hits = analyzer.result_cache.hits
+        second = analyzer.analyze_sentiment(
+            "@bob I looooooove this https://t.co/b", "en", ModelType.NLTK
+        )
+
+        assert analyzer.result_cache.hits == hits + 1
+        assert second.text.startswith("@bob")
+        assert second.scores == first.scores
@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.core.cache import SingleFlight
+from app.services.sentiment_analyzer import SentimentAnalyzer
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class TestSingleFlight:
+    """Test sharing one computation between callers of a key"""
+
+    def test_first_caller_leads(self):
+        flight = SingleFlight()
+        assert flight.claim(["a", "b"]) == {}
+
+        waiting = flight.claim(["b", "c"])
+        assert list(waiting) == ["b"]
+
+        flight.resolve({"a": 1, "b": 2})
+        assert waiting["b"].result() == 2
+        assert flight.stats() == {"in_flight": 1, "led": 3, "coalesced": 1, "failed": 0}
+
+    def test_waiters_get_the_error(self):
+        flight = SingleFlight()
+        flight.claim(["a"])
+        waiting = flight.claim(["a"])
+
+        flight.fail(["a"], RuntimeError("model failed"))
+
+        with pytest.raises(RuntimeError, match="model failed"):
+            waiting["a"].result()
+        assert flight.stats()["in_flight"] == 0
+        assert flight.stats()["failed"] == 1
+
+    def test_key_is_free_once_resolved(self):
+        flight = SingleFlight()
+        flight.claim(["a"])
+        flight.resolve({"a": 1})
+
+        assert flight.claim(["a"]) == {}
+
+
+class TestCoalescedPredictions:
+    """Test concurrent analyses of the same text sharing one prediction"""
+
+    @pytest.fixture
+    def analyzer(self, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "ENABLE_CACHING", False)
+        return SentimentAnalyzer()
+
+    @staticmethod
+    def blocking_predict(calls, release, error=None):
+        def predict(texts, languages):
+            calls.append(list(texts))
+            release.wait(5)
+            if error:
+                raise error
+            return [{"text": text} for text in texts]
+        return predict
+
+    def test_concurrent_requests_share_one_prediction(self, analyzer):
+        calls, release = [], threading.Event()
+        predict = self.blocking_predict(calls, release)
+
+        with ThreadPoolExecutor(4) as pool:
+            leader = pool.submit(analyzer._cached, "nltk", ["viral post"], ["en"], predict)
+            wait_for(lambda: calls)
+            followers = [
+                pool.submit(analyzer._cached, "nltk", ["viral post"], ["en"], predict)
+                for _ in range(3)
+            ]
+            wait_for(lambda: analyzer.in_flight.stats()["coalesced"] == 3)
+            release.set()
+
+            results = [future.result(5)[0] for future in [leader] + followers]
+
+        assert calls == [["viral post"]]
+        assert results == [[{"text": "viral post"}]] * 4
+        assert analyzer.in_flight.stats() == {"in_flight": 0, "led": 1, "coalesced": 3, "failed": 0}
+
+    def test_other_language_or_model_is_not_coalesced(self, analyzer):
+        calls, release = [], threading.Event()
+        release.set()
+        predict = self.blocking_predict(calls, release)
+
+        analyzer._cached("nltk", ["post"], ["en"], predict)
+        analyzer._cached("nltk", ["post"], ["pt"], predict)
+        analyzer._cached("transformers", ["post"], ["en"], predict)
+
+        assert len(calls) == 3
+
+    def test_error_reaches_every_waiter(self, analyzer):
+        calls, release = [], threading.Event()
+        predict = self.blocking_predict(calls, release, RuntimeError("model failed"))
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(analyzer._cached, "nltk", ["post"], ["en"], predict)
+            wait_for(lambda: calls)
+            follower = pool.submit(analyzer._cached, "nltk", ["post"], ["en"], predict)
+            wait_for(lambda: analyzer.in_flight.stats()["coalesced"] == 1)
+            release.set()
+
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError, match="model failed"):
+                    future.result(5)
+
+        assert len(calls) == 1
+        assert analyzer.in_flight.stats()["in_flight"] == 0
+
+        # Failures are not remembered, the next request predicts again
+        release.set()
+        retry = self.blocking_predict(calls, release)
+        assert analyzer._cached("nltk", ["post"], ["en"], retry)[0] == [{"text": "post"}]
+
+    def test_batches_leading_each_others_texts_do_not_deadlock(self, analyzer):
+        calls, release = [], threading.Event()
+        predict = self.blocking_predict(calls, release)
+
+        with ThreadPoolExecutor(2) as pool:
+            first = pool.submit(analyzer._cached, "nltk", ["a"], ["en"], predict)
+            wait_for(lambda: calls)
+            second = pool.submit(analyzer._cached, "nltk", ["b", "a"], ["en", "en"], predict)
+            wait_for(lambda: len(calls) == 2)
+            release.set()
+
+            assert first.result(5)[0] == [{"text": "a"}]
+            assert second.result(5)[0] == [{"text": "b"}, {"text": "a"}]
+
+        assert calls == [["a"], ["b"]]
@@ -0,0 +1,44 @@
+import pytest
+from app.services.text_normalizer import TextNormalizer
+
+
+@pytest.fixture
+def normalizer():
+    return TextNormalizer(cache_size=16)
+
+
+class TestTextNormalizer:
+    """Test social text normalization"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("RT @brand_official: love it", "RT @user: love it"),
+        ("see https://t.co/abc123 now", "see now"),
+        ("www.example.com/deal is great", "is great"),
+        ("#NewPhone is #awesome", "NewPhone is awesome"),
+        ("Loooooove it!!!!!!", "Looove it!!!"),
+        ("😍😍😍😍😍", "😍😍😍"),
+        ("Tom &amp; Jerry &lt;3", "Tom & Jerry <3"),
+        ("  lots \n\n of\tspace  ", "lots of space"),
+        ("costs $1000000", "costs $1000000"),
+        ("write to me@example.com", "write to me@example.com"),
+        ("C# is fine", "C# is fine"),
+    ])
+    def test_normalize(self, normalizer, text, expected):
+        assert normalizer.normalize(text) == expected
+
+    def test_keeps_text_with_nothing_left(self, normalizer):
+        assert normalizer.normalize("https://t.co/abc") == "https://t.co/abc"
+
+    def test_memoized(self, normalizer):
+        for _ in range(3):
+            normalizer.normalize("same @text https://t.co/x")
+
+        assert normalizer.stats() == {"size": 1, "hits": 2, "misses": 1}
+
+    def test_variants_share_normalized_text(self, normalizer):
+        variants = [
+            "@alice I loooove this https://t.co/a",
+            "@bob I looooooove this https://t.co/b",
+            "@carol   I looove this",
+        ]
+        assert len({normalizer.normalize(text) for text in variants}) == 1
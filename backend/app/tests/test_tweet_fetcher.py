@@ -0,0 +1,126 @@
+import json
+import os
+import time
+import pytest
+import requests
+import tweepy
+from app.services.tweet_fetcher import TweetFetcher
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "twitter_search_pages.json")
+
+
+def rate_limited(reset: float) -> tweepy.TooManyRequests:
+    response = requests.Response()
+    response.status_code = 429
+    response._content = b'{"title": "Too Many Requests"}'
+    response.headers["x-rate-limit-reset"] = str(reset)
+    return tweepy.TooManyRequests(response)
+
+
+class FakeTwitterClient:
+    """Replays recorded search_recent_tweets pages, keyed by next_token"""
+
+    def __init__(self, failures=None):
+        with open(FIXTURE) as f:
+            pages = json.load(f)
+
+        self.pages = {None: pages[0]}
+        for previous, page in zip(pages, pages[1:]):
+            self.pages[previous["meta"]["next_token"]] = page
+
+        self.failures = list(failures or [])
+        self.calls = []
+
+    def search_recent_tweets(self, query, max_results=10, next_token=None, **kwargs):
+        self.calls.append({"query": query, "max_results": max_results, "next_token": next_token})
+        if self.failures:
+            raise self.failures.pop(0)
+
+        page = self.pages[next_token]
+        return tweepy.Response(
+            data=[tweepy.Tweet(tweet) for tweet in page["data"][:max_results]],
+            includes={"users": [tweepy.User(user) for user in page["includes"]["users"]]},
+            errors=[],
+            meta=page["meta"]
+        )
+
+
+class TestTweetFetcher:
+    """Test paginated tweet search against recorded pages"""
+
+    @pytest.mark.asyncio
+    async def test_follows_next_token(self):
+        client = FakeTwitterClient()
+        tweets = await TweetFetcher(client).search("#python", 1000)
+
+        assert len(tweets) == 237
+        assert len({tweet["id"] for tweet in tweets}) == 237
+        assert [call["next_token"] for call in client.calls] == [
+            None, "b26v89c19zqg8o3f0001", "b26v89c19zqg8o3f0002"
+        ]
+        assert tweets[0]["author"]["username"].startswith("user")
+        assert tweets[0]["lang"] == "en"
+
+    @pytest.mark.asyncio
+    async def test_stops_at_max_results(self):
+        client = FakeTwitterClient()
+        tweets = await TweetFetcher(client).search("#python", 150)
+
+        assert len(tweets) == 150
+        assert [call["max_results"] for call in client.calls] == [100, 50]
+
+    @pytest.mark.asyncio
+    async def test_small_requests_use_minimum_page_size(self):
+        client = FakeTwitterClient()
+        tweets = await TweetFetcher(client).search("#python", 3)
+
+        assert len(tweets) == 3
+        assert client.calls[0]["max_results"] == 10
+
+    @pytest.mark.asyncio
+    async def test_waits_out_rate_limit(self):
+        client = FakeTwitterClient(failures=[rate_limited(time.time() + 0.2)])
+        fetcher = TweetFetcher(client, max_retries=1)
+
+        started = time.monotonic()
+        tweets = await fetcher.search("#python", 100)
+
+        assert len(tweets) == 100
+        assert time.monotonic() - started >= 0.1
+        assert fetcher.stats()["rate_limited"] == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        client = FakeTwitterClient(failures=[rate_limited(time.time())] * 2)
+
+        with pytest.raises(tweepy.TooManyRequests):
+            await TweetFetcher(client, max_retries=1).search("#python", 100)
+
+    @pytest.mark.asyncio
+    async def test_pipeline_analyzes_pages_while_fetching(self):
+        client = FakeTwitterClient()
+        fetcher = TweetFetcher(client)
+        pages_fetched = []
+
+        def analyze(tweets):
+            # Give the producer time to request the next page during analysis
+            deadline = time.monotonic() + 1
+            while len(client.calls) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            pages_fetched.append(len(client.calls))
+            return [{**tweet, "analyzed": True} for tweet in tweets]
+
+        pages = [page async for page in fetcher.pipeline("#python", 1000, analyze, prefetch=1)]
+
+        assert [len(page) for page in pages] == [100, 100, 37]
+        assert all(tweet["analyzed"] for page in pages for tweet in page)
+        # The next page was requested before the first finished analysis
+        assert pages_fetched[0] >= 2
+
+    @pytest.mark.asyncio
+    async def test_pipeline_raises_fetch_errors(self):
+        client = FakeTwitterClient(failures=[tweepy.TwitterServerError(requests.Response())])
+
+        with pytest.raises(tweepy.TwitterServerError):
+            async for _ in TweetFetcher(client).pipeline("#python", 100, lambda tweets: tweets):
+                pass
@@ -0,0 +1,100 @@
+import pytest
+from app.models.schemas import (
+    SentimentResult, SentimentScore, SentimentLabel,
+    EmotionResult, EmotionScore, EmotionLabel
+)
+from app.services.tweet_fetcher import TweetFetcher
+from app.services.twitter_service import TwitterService, sentiment_analyzer, tweet_language
+from app.tests.test_tweet_fetcher import FakeTwitterClient
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Record the batches sent to the analyzer and return canned results"""
+    calls = []
+
+    def analyze_sentiment_batch(texts, languages=None, model=None):
+        calls.append(("sentiment", list(texts), list(languages)))
+        return [
+            SentimentResult(
+                text=text,
+                label=(
+                    SentimentLabel.POSITIVE if "love" in text or "Best" in text
+                    else SentimentLabel.NEGATIVE
+                ),
+                scores=SentimentScore(positive=0.8, negative=0.2, neutral=0.0),
+                confidence=0.8,
+                language=language,
+                model_used="test"
+            )
+            for text, language in zip(texts, languages)
+        ]
+
+    def analyze_emotions_batch(texts, languages=None):
+        calls.append(("emotion", list(texts), list(languages)))
+        return [
+            EmotionResult(
+                text=text,
+                primary_emotion=EmotionLabel.JOY,
+                scores=EmotionScore(
+                    joy=0.9, sadness=0.0, anger=0.0, fear=0.0, surprise=0.0, love=0.1
+                ),
+                confidence=0.9,
+                language=language,
+                model_used="test"
+            )
+            for text, language in zip(texts, languages)
+        ]
+
+    monkeypatch.setattr(sentiment_analyzer, "analyze_sentiment_batch", analyze_sentiment_batch)
+    monkeypatch.setattr(sentiment_analyzer, "analyze_emotions_batch", analyze_emotions_batch)
+    return calls
+
+
+@pytest.fixture
+def service():
+    service = TwitterService()
+    service.fetcher = TweetFetcher(FakeTwitterClient())
+    return service
+
+
+class TestTwitterService:
+    """Test batched tweet analysis"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_texts_are_analyzed_once(self, service, batches):
+        result = await service.analyze_tweets("#python", max_results=1000)
+
+        assert result.total_tweets == 237
+        analyzed = [text for kind, texts, _ in batches if kind == "sentiment" for text in texts]
+        assert len(analyzed) == len(set(analyzed)) == 6
+        labels = {tweet["sentiment"]["label"] for tweet in result.tweets}
+        assert labels <= {"positive", "negative"}
+
+    @pytest.mark.asyncio
+    async def test_one_batch_per_model_per_page(self, service, batches):
+        await service.analyze_tweets("#python", max_results=100)
+
+        assert [kind for kind, _, _ in batches] == ["sentiment", "emotion"]
+
+    @pytest.mark.asyncio
+    async def test_uses_tweet_language(self, service, batches):
+        await service.analyze_tweets("#python", max_results=10)
+        assert set(batches[0][2]) == {"en"}
+
+    @pytest.mark.asyncio
+    async def test_requested_language_wins(self, service, batches):
+        await service.analyze_tweets("#python", max_results=10, language="pt")
+        assert set(batches[0][2]) == {"pt"}
+
+    @pytest.mark.asyncio
+    async def test_aggregates_distributions(self, service, batches):
+        result = await service.analyze_tweets("#python", max_results=1000)
+
+        assert sum(result.sentiment_distribution.values()) == 237
+        assert result.emotion_distribution["joy"] == 237
+        assert result.average_sentiment_scores.positive == pytest.approx(0.8)
+
+    def test_undetermined_language_is_detected(self):
+        assert tweet_language({"lang": "und"}) is None
+        assert tweet_language({"lang": "pt"}) == "pt"
@@ -0,0 +1,104 @@
+import random
+from pathlib import Path
+import nltk
+import pytest
+from nltk.sentiment.vader import SentimentIntensityAnalyzer, VaderConstants
+from app.services.vader_engine import VaderEngine
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SAMPLE_LEXICON = f"file:{FIXTURES / 'vader_lexicon_sample.txt'}"
+
+
+def lexicon_files():
+    """The sample lexicon, plus NLTK's own when its data is installed"""
+    files = [SAMPLE_LEXICON]
+    try:
+        nltk.data.find("sentiment/vader_lexicon.zip")
+        files.append("sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt")
+    except LookupError:
+        pass
+    return files
+
+
+@pytest.fixture(scope="module", params=lexicon_files())
+def nltk_vader(request):
+    return SentimentIntensityAnalyzer(lexicon_file=request.param)
+
+
+@pytest.fixture(scope="module")
+def engine(nltk_vader):
+    engine = VaderEngine(nltk_vader.lexicon, workers=0)
+    yield engine
+    engine.shutdown()
+
+
+def regression_corpus():
+    return (FIXTURES / "vader_regression_corpus.txt").read_text(encoding="utf-8").splitlines()
+
+
+def random_texts(lexicon, count, seed=42):
+    """Texts mixing lexicon words, boosters, negations, idioms and punctuation"""
+    rng = random.Random(seed)
+    vocabulary = (
+        list(lexicon)
+        + list(VaderConstants.BOOSTER_DICT)
+        + list(VaderConstants.NEGATE)
+        + list(VaderConstants.SPECIAL_CASE_IDIOMS)
+        + ["the", "it", "was", "at", "least", "never", "so", "this", "but", "kind", "of", "a", "I"]
+    )
+    decorations = ["", "", "", "!", "?", ".", ",", "!!", "?!?", "'", '"', "(", ")", "..."]
+
+    texts = []
+    for _ in range(count):
+        words = []
+        for word in rng.choices(vocabulary, k=rng.randint(0, 18)):
+            if rng.random() < 0.15:
+                word = word.upper()
+            elif rng.random() < 0.1:
+                word = word.capitalize()
+            words.append(rng.choice(decorations) + word + rng.choice(decorations))
+        texts.append(" ".join(words))
+    return texts
+
+
+class TestVaderEngine:
+    """Test the batch VADER engine against NLTK's analyzer"""
+
+    def test_matches_nltk_on_regression_corpus(self, engine, nltk_vader):
+        for text in regression_corpus() + [""]:
+            assert engine.polarity_scores(text) == nltk_vader.polarity_scores(text), text
+
+    def test_matches_nltk_on_random_texts(self, engine, nltk_vader):
+        for text in random_texts(nltk_vader.lexicon, 3000):
+            assert engine.polarity_scores(text) == nltk_vader.polarity_scores(text), text
+
+    def test_tokenize_strips_one_punctuation_run(self, engine):
+        tokens = engine.tokenize("!!great ok. 'quoted' ?!?yes a :) x!")
+        assert tokens == ["great", "ok", "'quoted'", "yes", ":)", "x!"]
+
+    def test_batch_keeps_order_and_duplicates(self, engine, nltk_vader):
+        texts = ["good", "bad", "good", "", "not good"]
+        scores = engine.polarity_scores_batch(texts)
+
+        assert scores == [nltk_vader.polarity_scores(text) for text in texts]
+        assert scores[0] is not scores[2]
+
+    def test_batch_fans_out_to_workers(self, nltk_vader, monkeypatch):
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "VADER_PARALLEL_MIN", 50)
+        monkeypatch.setattr(settings, "VADER_CHUNK_SIZE", 40)
+
+        texts = regression_corpus() * 2
+        engine = VaderEngine(nltk_vader.lexicon, workers=2)
+        try:
+            scores = engine.polarity_scores_batch(texts)
+            assert engine.pool is not None
+        finally:
+            engine.shutdown()
+
+        assert scores == [nltk_vader.polarity_scores(text) for text in texts]
+
+    def test_small_batch_stays_in_process(self, nltk_vader):
+        engine = VaderEngine(nltk_vader.lexicon, workers=2)
+        engine.polarity_scores_batch(["good", "bad"])
+        assert engine.pool is None
@@ -0,0 +1,97 @@
+"""
+Near-duplicate reuse benchmark
+Replays a corpus through the near-duplicate index and reports, for each
+SimHash distance, how often a result is reused and how often the reused
+label matches the one the text gets on its own (VADER scores both)
+"""
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.near_duplicate_index import NearDuplicateIndex, fingerprint, negation_signature
+from app.services.text_normalizer import TextNormalizer
+from app.services.vader_engine import VaderEngine
+from app.services.sentiment_analyzer import SentimentAnalyzer
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'app', 'tests', 'fixtures')
+
+
+def load_lexicon(path):
+    """VADER lexicon, NLTK's own unless a file is given"""
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    if path:
+        return SentimentIntensityAnalyzer(lexicon_file=f"file:{os.path.abspath(path)}").lexicon
+    return SentimentIntensityAnalyzer().lexicon
+
+
+def replay(texts, labels, max_distance, min_tokens, max_size):
+    """Exact and approximate hits of a corpus replayed in order, and the labels the approximate hits got right"""
+    index = NearDuplicateIndex(max_size=max_size, max_distance=max_distance)
+    seen = {}
+    exact = approximate = correct = 0
+
+    for position, text in enumerate(texts):
+        if text in seen:
+            exact += 1
+            continue
+
+        value = fingerprint(text, min_tokens=min_tokens)
+        # The same negation guard as the analyzer
+        namespace = negation_signature(text)
+        match = index.find(namespace, value) if value is not None else None
+        if match is not None:
+            approximate += 1
+            correct += labels[int(match)] == labels[position]
+            continue
+
+        seen[text] = position
+        if value is not None:
+            index.add(namespace, str(position), value)
+
+    return exact, approximate, correct
+
+
+def run(args) -> int:
+    normalizer = TextNormalizer()
+    with open(args.corpus, encoding="utf-8") as f:
+        texts = [normalizer.normalize(line) for line in f.read().splitlines() if line.strip()]
+
+    engine = VaderEngine(load_lexicon(args.lexicon), workers=0)
+    labels = [
+        SentimentAnalyzer._vader_result(scores)["label"]
+        for scores in engine.polarity_scores_batch(texts)
+    ]
+
+    start = time.perf_counter()
+    for text in texts:
+        fingerprint(text, min_tokens=0)
+    per_text = (time.perf_counter() - start) / len(texts) * 1e6
+
+    print(f"{len(texts)} texts, {len(set(texts))} distinct after normalization, fingerprint {per_text:.0f}us/text")
+    print(f"{'distance':>8} {'exact':>6} {'approx':>6} {'hit rate':>8} {'accuracy':>8}")
+    for max_distance in range(args.max_distance + 1):
+        exact, approximate, correct = replay(texts, labels, max_distance, args.min_tokens, args.size)
+        misses = len(texts) - exact
+        hit_rate = approximate / misses if misses else 0.0
+        accuracy = correct / approximate if approximate else 1.0
+        print(f"{max_distance:>8} {exact:>6} {approximate:>6} {hit_rate:>8.1%} {accuracy:>8.1%}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=os.path.join(FIXTURES, "near_duplicate_corpus.txt"), help="One text per line")
+    parser.add_argument("--lexicon", default=None, help="VADER lexicon file (default NLTK's vader_lexicon)")
+    parser.add_argument("--max-distance", type=int, default=8, help="Largest SimHash distance tried")
+    parser.add_argument("--min-tokens", type=int, default=None, help="Default NEAR_DUPLICATE_MIN_TOKENS")
+    parser.add_argument("--size", type=int, default=10000, help="Index size")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
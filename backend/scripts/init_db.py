@@ -2,13 +2,14 @@
 Database initialization script
 Creates all tables and optionally adds sample data
 """
+import asyncio
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.core.database import engine, Base, SessionLocal
+from app.core.database import engine, create_tables as create_all_tables, AsyncSessionLocal
 from app.models.database import User, APIKey, Analysis, TrendData
 from app.services.auth_service import auth_service
 import logging
@@ -17,27 +18,27 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def create_tables():
+async def create_tables():
     """Create all database tables"""
     logger.info("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    await create_all_tables()
     logger.info("Database tables created successfully!")
 
 
-def create_sample_data():
+async def create_sample_data():
     """Create sample user and API key for testing"""
-    db = SessionLocal()
+    db = AsyncSessionLocal()
 
     try:
         # Check if sample user already exists
-        existing_user = db.query(User).filter(User.username == "demo").first()
+        existing_user = await auth_service.get_user_by_username(db, "demo")
         if existing_user:
             logger.info("Sample user already exists")
             return
 
         # Create sample user
         logger.info("Creating sample user...")
-        user = auth_service.create_user(
+        user = await auth_service.create_user(
             db,
             username="demo",
             email="demo@example.com",
@@ -46,7 +47,7 @@ def create_sample_data():
         logger.info(f"Sample user created: username='demo', password='demo123'")
 
         # Create sample API key
-        api_key = auth_service.create_api_key(
+        api_key = await auth_service.create_api_key(
             db,
             user_id=user.id,
             name="Demo API Key",
@@ -56,16 +57,22 @@ def create_sample_data():
 
     except Exception as e:
         logger.error(f"Error creating sample data: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
-if __name__ == "__main__":
-    create_tables()
+async def main():
+    await create_tables()
 
     # Optionally create sample data
     if "--with-samples" in sys.argv:
-        create_sample_data()
+        await create_sample_data()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
 
     logger.info("Database initialization complete!")
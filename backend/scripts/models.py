@@ -0,0 +1,96 @@
+"""
+Model snapshot script
+Exports the configured Transformers models to the local model store
+as safetensors, so the API loads them offline and memory-mapped
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.model_store import ModelStore
+from app.services.sentiment_analyzer import TRANSFORMERS_MODELS
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def selected_models(args):
+    """(task, model id) of the models named on the command line, all by default"""
+    models = list(TRANSFORMERS_MODELS.values())
+    if args.model:
+        models = [(task, model_id) for task, model_id in models if model_id in args.model]
+    return models
+
+
+def export_models(store: ModelStore, args) -> int:
+    """Download and store a snapshot of each model"""
+    for task, model_id in selected_models(args):
+        logger.info(f"Exporting {model_id}...")
+        path = store.export(model_id, task, revision=args.revision)
+        logger.info(f"Exported {model_id} to {path}")
+    return 0
+
+
+def list_models(store: ModelStore, args) -> int:
+    """Print the stored versions of each model"""
+    for _, model_id in selected_models(args):
+        current = store.current(model_id)
+        versions = store.versions(model_id)
+        if not versions:
+            print(f"{model_id}: no snapshot")
+        for version in versions:
+            marker = "*" if current and os.path.basename(current) == version else " "
+            print(f"{marker} {model_id} {version}")
+    return 0
+
+
+def verify_models(store: ModelStore, args) -> int:
+    """Check the current snapshot of each model against its manifest"""
+    failed = 0
+    for _, model_id in selected_models(args):
+        current = store.current(model_id)
+        problems = store.verify(current) if current else ["no snapshot"]
+        for problem in problems:
+            logger.error(f"{model_id}: {problem}")
+        failed += bool(problems)
+    return 1 if failed else 0
+
+
+def prune_models(store: ModelStore, args) -> int:
+    """Delete old versions of each model"""
+    for _, model_id in selected_models(args):
+        removed = store.prune(model_id, keep=args.keep)
+        logger.info(f"{model_id}: removed {removed or 'nothing'}")
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", default=None, help="Model store directory (default MODEL_STORE_DIR)")
+    parser.add_argument("--model", action="append", help="Model id to act on, repeatable (default all)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Download the models and store safetensors snapshots")
+    export.add_argument("--revision", default=None, help="Hub revision to export (default latest)")
+    export.set_defaults(handler=export_models)
+
+    listing = commands.add_parser("list", help="List stored snapshots, * marks the current one")
+    listing.set_defaults(handler=list_models)
+
+    verify = commands.add_parser("verify", help="Check current snapshots against their manifests")
+    verify.set_defaults(handler=verify_models)
+
+    prune = commands.add_parser("prune", help="Delete old snapshots")
+    prune.add_argument("--keep", type=int, default=2, help="Versions kept per model")
+    prune.set_defaults(handler=prune_models)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(args.handler(ModelStore(args.dir), args))
@@ -0,0 +1,66 @@
+"""
+Analyses retention script
+Rolls old analyses up into trend data, archives and purges them,
+and maintains monthly partitions on Postgres
+"""
+import argparse
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.core.database import engine, AsyncSessionLocal
+from app.services.retention_service import retention_service
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def run_retention(args):
+    """Compact analyses older than the retention window"""
+    async with AsyncSessionLocal() as db:
+        result = await retention_service.run(
+            db,
+            retention_days=args.days,
+            archive_dir=args.archive_dir,
+            dry_run=args.dry_run
+        )
+    logger.info(f"Retention result: {result}")
+
+
+async def create_partitions(args):
+    """Create upcoming monthly partitions"""
+    async with AsyncSessionLocal() as db:
+        created = await retention_service.ensure_partitions(db, months_ahead=args.months_ahead)
+    logger.info(f"Partitions created: {created or 'none'}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Roll up, archive and purge old analyses")
+    run.add_argument("--days", type=int, default=None, help="Retention window (default RETENTION_DAYS)")
+    run.add_argument("--archive-dir", default=None, help="Archive directory (default RETENTION_ARCHIVE_DIR)")
+    run.add_argument("--dry-run", action="store_true", help="Only count the analyses to compact")
+    run.set_defaults(handler=run_retention)
+
+    partitions = commands.add_parser("partitions", help="Create upcoming monthly partitions")
+    partitions.add_argument("--months-ahead", type=int, default=None)
+    partitions.set_defaults(handler=create_partitions)
+
+    return parser.parse_args()
+
+
+async def main(args):
+    try:
+        await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { analyzeBatch } from '../services/api';
+import React, { useEffect, useRef, useState } from 'react';
+import { startBatchJob, subscribeToEvents } from '../services/api';
 import { Pie } from 'react-chartjs-2';
 import { Chart as ChartJS, ArcElement, Tooltip, Legend } from 'chart.js';
 
@@ -9,9 +9,14 @@ function BatchAnalyzer() {
   const [texts, setTexts] = useState('');
   const [language, setLanguage] = useState('');
   const [model, setModel] = useState('');
-  const [result, setResult] = useState(null);
+  const [items, setItems] = useState(null);
+  const [progress, setProgress] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const closeStream = useRef(null);
+
+  // Stop listening when the component unmounts
+  useEffect(() => () => closeStream.current && closeStream.current(), []);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -22,22 +27,68 @@ function BatchAnalyzer() {
 
     setLoading(true);
     setError(null);
-    setResult(null);
+    setItems([]);
+    setProgress({ completed: 0, total: textArray.length });
+    if (closeStream.current) closeStream.current();
 
     try {
-      const data = await analyzeBatch(
+      const job = await startBatchJob(
         textArray,
         language || null,
         model || null
       );
-      setResult(data);
+
+      // Results are keyed by index, so ones repeated by the snapshot are harmless
+      closeStream.current = subscribeToEvents(job.events_url, {
+        snapshot: (data) => {
+          setItems((prev) => {
+            const next = [...prev];
+            data.results.forEach((item, index) => { next[index] = item; });
+            return next;
+          });
+          setProgress(data);
+        },
+        item: ({ index, result }) => {
+          setItems((prev) => {
+            const next = [...prev];
+            next[index] = result;
+            return next;
+          });
+        },
+        progress: (data) => setProgress(data),
+        done: (data) => {
+          setProgress(data);
+          setLoading(false);
+        },
+        error: (data) => {
+          setError(data.error || 'Error analyzing batch');
+          setLoading(false);
+        },
+        disconnect: () => {
+          setError('Lost connection to the server');
+          setLoading(false);
+        },
+      });
     } catch (err) {
       setError(err.response?.data?.detail || 'Error analyzing batch');
-    } finally {
       setLoading(false);
     }
   };
 
+  // Summary follows the results as they arrive
+  const results = items ? items.filter(Boolean) : [];
+  const result = items ? {
+    results,
+    summary: {
+      positive: results.filter(r => r.label === 'positive').length,
+      negative: results.filter(r => r.label === 'negative').length,
+      neutral: results.filter(r => r.label === 'neutral').length,
+    },
+    average_confidence: results.length
+      ? results.reduce((sum, r) => sum + r.confidence, 0) / results.length
+      : 0,
+  } : null;
+
   const chartData = result ? {
     labels: ['Positive', 'Negative', 'Neutral'],
     datasets: [{
@@ -100,7 +151,9 @@ function BatchAnalyzer() {
         </div>
 
         <button type="submit" className="button" disabled={loading}>
-          {loading ? 'Analyzing...' : 'Analyze Batch'}
+          {loading
+            ? `Analyzing... ${progress ? `${progress.completed}/${progress.total}` : ''}`
+            : 'Analyze Batch'}
         </button>
       </form>
 
@@ -156,7 +209,7 @@ function BatchAnalyzer() {
 
           <div style={{ marginTop: '30px' }}>
             <h3 style={{ marginBottom: '15px' }}>Individual Results</h3>
-            {result.results.map((item, index) => (
+            {items.map((item, index) => item && (
               <div key={index} className="result-card" style={{ marginBottom: '15px' }}>
                 <div style={{ marginBottom: '10px', color: '#333' }}>
                   <strong>Text {index + 1}:</strong> {item.text}
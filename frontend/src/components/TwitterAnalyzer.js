@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import { analyzeTwitter } from '../services/api';
+import React, { useEffect, useRef, useState } from 'react';
+import { startTwitterJob, subscribeToEvents } from '../services/api';
 import { Bar, Pie } from 'react-chartjs-2';
 import {
   Chart as ChartJS,
@@ -26,9 +26,13 @@ function TwitterAnalyzer() {
   const [query, setQuery] = useState('');
   const [maxResults, setMaxResults] = useState(10);
   const [language, setLanguage] = useState('');
-  const [result, setResult] = useState(null);
+  const [tweets, setTweets] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
+  const closeStream = useRef(null);
+
+  // Stop listening when the component unmounts
+  useEffect(() => () => closeStream.current && closeStream.current(), []);
 
   const handleSubmit = async (e) => {
     e.preventDefault();
@@ -36,22 +40,59 @@ function TwitterAnalyzer() {
 
     setLoading(true);
     setError(null);
-    setResult(null);
+    setTweets([]);
+    if (closeStream.current) closeStream.current();
 
     try {
-      const data = await analyzeTwitter(
+      const job = await startTwitterJob(
         query,
         maxResults,
         language || null
       );
-      setResult(data);
+
+      closeStream.current = subscribeToEvents(job.events_url, {
+        snapshot: (data) => setTweets(data.results),
+        page: (data) => setTweets((prev) => {
+          // Pages already included in the snapshot are skipped
+          const seen = new Set(prev.map(tweet => tweet.id));
+          return [...prev, ...data.tweets.filter(tweet => !seen.has(tweet.id))];
+        }),
+        done: () => setLoading(false),
+        error: (data) => {
+          setError(data.error || 'Error analyzing Twitter.');
+          setLoading(false);
+        },
+        disconnect: () => {
+          setError('Lost connection to the server');
+          setLoading(false);
+        },
+      });
     } catch (err) {
       setError(err.response?.data?.detail || 'Error analyzing Twitter. Make sure API credentials are configured.');
-    } finally {
       setLoading(false);
     }
   };
 
+  // Distributions follow the pages as they arrive
+  const countBy = (label) => (tweets || []).reduce((counts, tweet) => {
+    const value = label(tweet);
+    counts[value] = (counts[value] || 0) + 1;
+    return counts;
+  }, {});
+
+  const result = tweets && tweets.length ? {
+    total_tweets: tweets.length,
+    sentiment_distribution: {
+      positive: 0, negative: 0, neutral: 0,
+      ...countBy(tweet => tweet.sentiment.label)
+    },
+    emotion_distribution: {
+      joy: 0, sadness: 0, anger: 0, fear: 0, surprise: 0, love: 0,
+      ...countBy(tweet => tweet.emotion.label)
+    },
+    tweets,
+  } : null;
+
   const sentimentChartData = result ? {
     labels: ['Positive', 'Negative', 'Neutral'],
     datasets: [{
@@ -109,7 +150,7 @@ function TwitterAnalyzer() {
               value={maxResults}
               onChange={(e) => setMaxResults(parseInt(e.target.value))}
               min="1"
-              max="100"
+              max="5000"
               required
             />
           </div>
@@ -126,7 +167,9 @@ function TwitterAnalyzer() {
         </div>
 
         <button type="submit" className="button" disabled={loading}>
-          {loading ? 'Searching & Analyzing...' : 'Analyze Tweets'}
+          {loading
+            ? `Searching & Analyzing... ${tweets ? tweets.length : 0}/${maxResults}`
+            : 'Analyze Tweets'}
         </button>
       </form>
 
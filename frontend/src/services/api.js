@@ -54,6 +54,16 @@ export const analyzeBatch = async (texts, language = null, model = null) => {
   return response.data;
 };
 
+// Batch sentiment analysis in the background, results arrive on events_url
+export const startBatchJob = async (texts, language = null, model = null) => {
+  const response = await api.post('/sentiment/batch/jobs', {
+    texts,
+    language,
+    model,
+  });
+  return response.data;
+};
+
 // Twitter analysis
 export const analyzeTwitter = async (query, maxResults = 10, language = null) => {
   const response = await api.post('/twitter/analyze', {
@@ -64,6 +74,41 @@ export const analyzeTwitter = async (query, maxResults = 10, language = null) =>
   return response.data;
 };
 
+// Twitter analysis in the background, analyzed pages arrive on events_url
+export const startTwitterJob = async (query, maxResults = 10, language = null) => {
+  const response = await api.post('/twitter/jobs', {
+    query,
+    max_results: maxResults,
+    language,
+  });
+  return response.data;
+};
+
+// Listen to a Server-Sent Events stream, returns a function that closes it
+export const subscribeToEvents = (url, handlers) => {
+  const source = new EventSource(url);
+
+  Object.entries(handlers).forEach(([event, handler]) => {
+    source.addEventListener(event, (e) => {
+      // Connection errors reach 'error' listeners without data
+      if (e.data === undefined) return;
+      const data = JSON.parse(e.data);
+      if (event === 'done' || event === 'error' || event === 'closed') {
+        source.close();
+      }
+      handler(data);
+    });
+  });
+
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED && handlers.disconnect) {
+      handlers.disconnect();
+    }
+  };
+
+  return () => source.close();
+};
+
 // Get available models
 export const getModels = async () => {
   const response = await api.get('/models');